@@ -26,6 +26,10 @@ class IncrementalChainProof:
         if self.accumulator.value == self.accumulator.g:
             await self.accumulator.add(self.genesis)
         
+    async def close(self):
+        """Flush and close the accumulator WAL."""
+        await self.accumulator.close()
+        
     async def add_scar(self, scar_hash: bytes) -> AccumulatorProof:
         """Add scar and return proof."""
         value, proof = await self.accumulator.add(scar_hash)
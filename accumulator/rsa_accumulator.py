@@ -4,6 +4,9 @@ Based on: "Dynamic Universal Accumulators with DLP" (Boneh et al.)
 """
 
 import hashlib
+import secrets
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 import asyncio
@@ -12,9 +15,149 @@ import asyncio
 from Crypto.PublicKey import RSA
 from Crypto.Util import number
 
+# Optional GMP backend for modular exponentiation
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
 from storage.wal_accumulator import AccumulatorWAL
 
 
+# Odd primes below 1000 for trial-division sieving of prime candidates
+SMALL_PRIMES = tuple(
+    p for p in range(3, 1000, 2)
+    if all(p % d for d in range(3, int(p ** 0.5) + 1, 2))
+)
+# Number of odd candidates sieved per window
+_SIEVE_SPAN = 512
+# Batches with at least this many uncached primes search in worker processes
+_PARALLEL_PRIME_MIN = 64
+# Bounded LRU of element hash -> prime, shared by all accumulators
+_PRIME_CACHE_SIZE = 65536
+_prime_cache: "OrderedDict[bytes, int]" = OrderedDict()
+
+
+def _is_strong_probable_prime(n: int, base: int) -> bool:
+    """Single Miller-Rabin round for odd n > base."""
+    d = n - 1
+    s = 0
+    while not d & 1:
+        d >>= 1
+        s += 1
+
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _is_prime(n: int) -> bool:
+    """
+    Primality certification for prime candidates.
+    GMP's mpz_probab_prime_p (BPSW plus extra Miller-Rabin rounds)
+    when gmpy2 is installed, pycryptodome otherwise.
+    """
+    if gmpy2 is not None:
+        return bool(gmpy2.is_prime(n, 10))
+    return number.isPrime(n)
+
+
+def _next_prime(n: int) -> int:
+    """
+    Smallest prime >= n.
+    Candidates are sieved by SMALL_PRIMES in windows, filtered by a
+    base-2 Miller-Rabin round, and only the survivor is certified with
+    the full _is_prime test.
+    """
+    if n <= SMALL_PRIMES[-1] ** 2:
+        # Sieve would strike small primes themselves
+        candidate = max(n, 2)
+        while not _is_prime(candidate):
+            candidate += 1
+        return candidate
+
+    start = n | 1
+    while True:
+        # sieve[i] stands for start + 2*i
+        sieve = bytearray(b'\x01') * _SIEVE_SPAN
+        for p in SMALL_PRIMES:
+            # Solve start + 2*i == 0 (mod p); (p + 1) // 2 is 2^-1 mod p
+            i = (-start * ((p + 1) // 2)) % p
+            sieve[i::p] = bytes(len(range(i, _SIEVE_SPAN, p)))
+
+        i = sieve.find(1)
+        while i != -1:
+            candidate = start + 2 * i
+            if _is_strong_probable_prime(candidate, 2) and _is_prime(candidate):
+                return candidate
+            i = sieve.find(1, i + 1)
+
+        start += 2 * _SIEVE_SPAN
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd n > 0."""
+    if gmpy2 is not None:
+        return int(gmpy2.jacobi(a, n))
+        
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _product(values: List[int]) -> int:
+    """Product of integers by a balanced tree, so big multiplications stay even-sized."""
+    values = [gmpy2.mpz(v) for v in values] if gmpy2 is not None else list(values)
+    if not values:
+        return 1
+    while len(values) > 1:
+        paired = [a * b for a, b in zip(values[::2], values[1::2])]
+        if len(values) & 1:
+            paired.append(values[-1])
+        values = paired
+    return int(values[0])
+
+
+def _multi_powmod(pairs: List[Tuple[int, int]], modulus) -> int:
+    """
+    Product of base^exponent mod modulus over all pairs.
+    Straus interleaving with 4-bit windows: squarings are shared by all
+    bases, so cost grows by ~bits/4 multiplications per extra pair.
+    """
+    tables = []
+    for base, exponent in pairs:
+        table = [1, base % modulus]
+        for _ in range(14):
+            table.append(table[-1] * table[1] % modulus)
+        tables.append((table, exponent))
+        
+    bits = max(exponent.bit_length() for _, exponent in pairs)
+    result = 1
+    for shift in range(((bits + 3) // 4 - 1) * 4, -1, -4):
+        if result != 1:
+            for _ in range(4):
+                result = result * result % modulus
+        for table, exponent in tables:
+            digit = (exponent >> shift) & 15
+            if digit:
+                result = result * table[digit] % modulus
+    return int(result)
+
+
 @dataclass(frozen=True)
 class AccumulatorProof:
     """Membership proof in accumulator."""
@@ -33,14 +176,22 @@ class RSAAccumulator:
     - Incremental proofs
     """
     
-    def __init__(self, key_size: int = 2048, wal_path: str = "accumulator.wal"):
-        # Generate RSA modulus N = p * q
+    def __init__(
+        self,
+        key_size: int = 2048,
+        wal_path: str = "accumulator.wal",
+        modulus: Optional[Tuple[int, int]] = None
+    ):
+        # RSA modulus N = p * q, or an existing (N, phi) pair
         # In production: generate in TEE, p and q destroyed after setup
-        key = RSA.generate(key_size)
-        self.N = key.n
-        self.phi = (key.p - 1) * (key.q - 1)
+        if modulus is None:
+            key = RSA.generate(key_size)
+            modulus = (key.n, (key.p - 1) * (key.q - 1))
+        self.N, self.phi = modulus
         self.g = 65537  # Fixed generator
         self.value = self.g
+        # Modulus in backend representation, converted once
+        self._N = gmpy2.mpz(self.N) if gmpy2 is not None else self.N
         
         # Write-Ahead Log for recovery
         self.wal = AccumulatorWAL(wal_path)
@@ -52,16 +203,98 @@ class RSAAccumulator:
         self.current_sequence = self.wal.current_seq
         self.value = self.wal.current_value or self.g
         
+        operations = await self.wal.recover_operations()
+        
+        # Warm prime cache so replayed elements skip the prime search
+        for _, element_hash, prime in operations:
+            if prime is not None:
+                self._remember_prime(element_hash, prime)
+                
+    async def verify_replay(self) -> bool:
+        """
+        Rebuild check: recompute g^(product of live primes) from the WAL
+        and compare it with the stored value. Reads the whole log and runs
+        one modexp with an exponent as long as all primes together, so
+        it is an explicit audit, not part of initialize().
+        A REMOVE of an element that was never added fails the check.
+        """
+        operations = await self.wal.recover_operations()
+        if any(prime is None for _, _, prime in operations):
+            raise ValueError("WAL has entries without recorded primes")
+            
+        live = Counter()
+        for operation, _, prime in operations:
+            live[prime] += -1 if operation == "REMOVE" else 1
+        if any(count < 0 for count in live.values()):
+            return False
+            
+        rebuilt = self._powmod(self.g, _product(list(live.elements())))
+        return rebuilt == (self.wal.current_value or self.g)
+        
+    async def close(self):
+        """Flush and close the WAL."""
+        await self.wal.close()
+        
+    @staticmethod
+    def _remember_prime(data: bytes, prime: int):
+        """Store prime in the LRU cache, evicting the oldest entry."""
+        _prime_cache[data] = prime
+        _prime_cache.move_to_end(data)
+        if len(_prime_cache) > _PRIME_CACHE_SIZE:
+            _prime_cache.popitem(last=False)
+        
     def _hash_to_prime(self, data: bytes) -> int:
-        """Hash data to a prime number."""
+        """Hash data to a prime number (memoized)."""
+        prime = _prime_cache.get(data)
+        if prime is not None:
+            _prime_cache.move_to_end(data)
+            return prime
+            
         h = hashlib.sha256(data).digest()
-        candidate = int.from_bytes(h, byteorder='big')
+        prime = _next_prime(int.from_bytes(h, byteorder='big'))
+        self._remember_prime(data, prime)
+        return prime
         
-        # Find next prime
-        while not number.isPrime(candidate):
-            candidate += 1
+    async def _hash_to_primes(self, items: List[bytes]) -> List[int]:
+        """
+        _hash_to_prime for a batch. Cache misses are searched in a process
+        pool when there are enough of them, since each search is independent.
+        """
+        primes = [_prime_cache.get(data) for data in items]
+        missing = [i for i, prime in enumerate(primes) if prime is None]
+        starts = [
+            int.from_bytes(hashlib.sha256(items[i]).digest(), byteorder='big')
+            for i in missing
+        ]
+        
+        if len(missing) >= _PARALLEL_PRIME_MIN:
+            def search():
+                with ProcessPoolExecutor() as pool:
+                    return list(pool.map(_next_prime, starts, chunksize=16))
+            found = await asyncio.to_thread(search)
+        else:
+            found = [_next_prime(start) for start in starts]
             
-        return candidate
+        for i, prime in zip(missing, found):
+            primes[i] = prime
+        for data, prime in zip(items, primes):
+            self._remember_prime(data, prime)
+        return primes
+        
+    def _powmod(self, base: int, exponent: int) -> int:
+        """
+        base^exponent mod N.
+        Base, exponent and N are all public, so a variable-time
+        GMP powmod is used when gmpy2 is installed.
+        
+        Accumulator state is deliberately kept as a plain int: GMP already
+        runs powmod in Montgomery form internally, converting to and from
+        mpz costs under a microsecond, and a pure-Python Montgomery ladder
+        is slower than the built-in pow.
+        """
+        if gmpy2 is not None:
+            return int(gmpy2.powmod(base, exponent, self._N))
+        return pow(base, exponent, self.N)
         
     async def add(self, element_hash: bytes) -> Tuple[int, AccumulatorProof]:
         """
@@ -72,11 +305,11 @@ class RSAAccumulator:
         old_acc = self.value
         
         # New accumulator value: A_new = A_old^prime mod N
-        self.value = pow(self.value, prime, self.N)
+        self.value = self._powmod(self.value, prime)
         self.current_sequence += 1
         
         # Save to WAL
-        await self.wal.append("ADD", self.value, element_hash.hex()[:8])
+        await self.wal.append("ADD", self.value, element_hash.hex()[:8], element_hash, prime)
         
         # Witness is the old accumulator value
         proof = AccumulatorProof(
@@ -88,23 +321,172 @@ class RSAAccumulator:
         
         return self.value, proof
         
+    async def _fold_batch(self, element_hashes: List[bytes]) -> List[int]:
+        """
+        Apply A_new = A_old^(p_1 * ... * p_n) mod N with one modexp and
+        log all elements with one fsync. Returns the primes.
+        """
+        primes = await self._hash_to_primes(element_hashes)
+        self.value = self._powmod(self.value, _product(primes))
+        self.current_sequence += len(primes)
+        
+        await self.wal.append_many("ADD", self.value, [
+            (element_hash.hex()[:8], element_hash, prime)
+            for element_hash, prime in zip(element_hashes, primes)
+        ])
+        return primes
+        
+    async def add_batch(self, element_hashes: List[bytes]) -> int:
+        """
+        Add many elements with one modexp:
+        A_new = A_old^(p_1 * ... * p_n) mod N.
+        Returns the new accumulator value; no per-element proofs are made.
+        """
+        if element_hashes:
+            await self._fold_batch(element_hashes)
+        return self.value
+        
+    async def add_many(self, element_hashes: List[bytes]) -> Tuple[int, List[AccumulatorProof]]:
+        """
+        Burst insert: add_batch plus a membership proof for every element
+        against the new accumulator value.
+        Witness i is A_old^(product of all primes but p_i), computed for
+        all elements together by _root_factor.
+        """
+        if not element_hashes:
+            return self.value, []
+            
+        old_acc = self.value
+        first_sequence = self.current_sequence + 1
+        primes = await self._fold_batch(element_hashes)
+        
+        proofs = [
+            AccumulatorProof(
+                witness=witness,
+                accumulator=self.value,
+                element_hash=prime,
+                sequence=first_sequence + i
+            )
+            for i, (witness, prime) in enumerate(zip(self._root_factor(old_acc, primes), primes))
+        ]
+        return self.value, proofs
+        
+    def _root_factor(self, base: int, primes: List[int]) -> List[int]:
+        """
+        base^(product of primes except primes[i]) for every i.
+        Each half is raised to the other half's product and recursed
+        into (RootFactor, Boneh-Bunz-Fisch), so the total exponent work
+        is O(n log n) instead of O(n^2) for n independent witnesses.
+        """
+        if len(primes) == 1:
+            return [base]
+            
+        mid = len(primes) // 2
+        left, right = primes[:mid], primes[mid:]
+        return (
+            self._root_factor(self._powmod(base, _product(right)), left)
+            + self._root_factor(self._powmod(base, _product(left)), right)
+        )
+        
     def verify(self, proof: AccumulatorProof) -> bool:
         """
         Verify membership proof.
         witness^element ≡ accumulator (mod N)
         """
         try:
+            if not self.precheck(proof):
+                return False
+                
             # witness^element mod N should equal accumulator
-            computed = pow(proof.witness, proof.element_hash, self.N)
+            computed = self._powmod(proof.witness, proof.element_hash)
             return computed == proof.accumulator
         except Exception as e:
             print(f"Verification error: {e}")
             return False
             
+    def precheck(self, proof: AccumulatorProof) -> bool:
+        """
+        Cheap necessary conditions for a valid proof, no modexp.
+        Values must lie in [1, N), the element must be an odd prime-sized
+        exponent, and since the element is odd the Jacobi symbol is
+        preserved: (witness/N) == (accumulator/N).
+        False means the proof is certainly invalid; True still needs verify().
+        """
+        if not (0 < proof.witness < self.N and 0 < proof.accumulator < self.N):
+            return False
+        if proof.element_hash < 3 or not proof.element_hash & 1:
+            return False
+        return _jacobi(proof.witness, self.N) == _jacobi(proof.accumulator, self.N)
+        
     def batch_verify(self, proofs: List[AccumulatorProof]) -> bool:
-        """Batch verify multiple proofs."""
+        """
+        Batch verify multiple proofs, each one exactly.
+        batch_verify_aggregate / find_invalid_proofs are the faster,
+        probabilistic opt-in alternatives.
+        """
         return all(self.verify(p) for p in proofs)
         
+    @staticmethod
+    def _batch_scalars(count: int) -> List[int]:
+        """Random odd 128-bit scalars for a linear combination."""
+        return [secrets.randbits(128) | 1 for _ in range(count)]
+        
+    def _aggregate_check(self, proofs: List[AccumulatorProof], scalars: List[int]) -> bool:
+        """prod(witness_i^(r_i*e_i)) == prod(accumulator_i^r_i) (mod N)."""
+        lhs_pairs = [(p.witness, r * p.element_hash) for p, r in zip(proofs, scalars)]
+        rhs_pairs = [(p.accumulator, r) for p, r in zip(proofs, scalars)]
+        return _multi_powmod(lhs_pairs, self._N) == _multi_powmod(rhs_pairs, self._N)
+        
+    def batch_verify_aggregate(self, proofs: List[AccumulatorProof]) -> bool:
+        """
+        Verify all proofs with one random linear combination
+        using random 128-bit r_i.
+        
+        Valid batches always pass. An invalid batch passes with
+        probability <= 2^-128, except that witnesses off by a factor
+        of -1 mod N may cancel in pairs.
+        """
+        if not proofs:
+            return True
+        return self._aggregate_check(proofs, self._batch_scalars(len(proofs)))
+        
+    def find_invalid_proofs(self, proofs: List[AccumulatorProof]) -> List[AccumulatorProof]:
+        """
+        Return the proofs that fail verification.
+        Failing aggregates are split in halves and re-checked, so a
+        single bad proof costs ~2*log2(n) aggregate checks.
+        Built on the aggregate check, so it shares its -1 caveat:
+        use batch_verify where a pass must be exact.
+        """
+        if not proofs:
+            return []
+            
+        # Malformed proofs are rejected up front and kept out of the aggregate
+        candidates = [p for p in proofs if self.precheck(p)]
+        invalid = {id(p) for p in proofs} - {id(p) for p in candidates}
+        if candidates:
+            scalars = self._batch_scalars(len(candidates))
+            invalid.update(id(p) for p in self._bisect_invalid(candidates, scalars))
+        return [p for p in proofs if id(p) in invalid]
+        
+    def _bisect_invalid(
+        self,
+        proofs: List[AccumulatorProof],
+        scalars: List[int]
+    ) -> List[AccumulatorProof]:
+        """Recursive step of find_invalid_proofs; scalars are reused."""
+        if len(proofs) == 1:
+            return [] if self.verify(proofs[0]) else list(proofs)
+            
+        if self._aggregate_check(proofs, scalars):
+            return []
+            
+        mid = len(proofs) // 2
+        return (
+            self._bisect_invalid(proofs[:mid], scalars[:mid])
+            + self._bisect_invalid(proofs[mid:], scalars[mid:])
+        )
+        
     async def remove(self, element_hash: bytes) -> int:
         """
         Remove element (requires phi(N)).
@@ -119,5 +501,5 @@ class RSAAccumulator:
         self.value = pow(self.value, inv, self.N)
         self.current_sequence += 1
         
-        await self.wal.append("REMOVE", self.value, element_hash.hex()[:8])
+        await self.wal.append("REMOVE", self.value, element_hash.hex()[:8], element_hash, prime)
         return self.value
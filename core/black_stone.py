@@ -30,6 +30,7 @@ class BlackStoneMode:
     _chain_callback: Optional[Callable[[str, str], Awaitable[None]]] = None
     _ite_halt_callback: Optional[Callable[[], Awaitable[None]]] = None
     _ecl_silence_callback: Optional[Callable[[], Awaitable[None]]] = None
+    _exit_event: Optional[asyncio.Event] = None  # set on rebirth
     
     # For testing
     _test_mode = False
@@ -73,18 +74,21 @@ class BlackStoneMode:
             scar_id=scar_id,
             timestamp=datetime.utcnow().isoformat()
         )
+        cls._exit_event = asyncio.Event()
         
         logger.critical(f"🪨 BLACK STONE MODE ACTIVATED: {reason} (scar: {scar_id})")
         
-        # 1. Stop ITE
-        if cls._ite_halt_callback:
-            await cls._ite_halt_callback()
+        # 1-2. Stop ITE and put ECL in silence mode; the two are
+        # independent, so they run concurrently
+        halts = [
+            callback()
+            for callback in (cls._ite_halt_callback, cls._ecl_silence_callback)
+            if callback
+        ]
+        if halts:
+            await asyncio.gather(*halts)
             
-        # 2. ECL silence mode
-        if cls._ecl_silence_callback:
-            await cls._ecl_silence_callback()
-            
-        # 3. Write to wormhole
+        # 3. Write to wormhole (only once both have stopped)
         if cls._chain_callback:
             await cls._chain_callback(f"BLACKSTONE:{reason}:{scar_id}")
             
@@ -97,8 +101,8 @@ class BlackStoneMode:
         """Wait for physical operator presence."""
         logger.info("⏳ Waiting for operator presence to exit Black Stone...")
         
-        while cls._state.active:
-            await asyncio.sleep(60)
+        if cls._state.active and cls._exit_event is not None:
+            await cls._exit_event.wait()
             
     @classmethod
     async def exit_via_rebirth(cls, operator_signature: bytes):
@@ -108,6 +112,8 @@ class BlackStoneMode:
             return False
             
         cls._state = BlackStoneState()
+        if cls._exit_event is not None:
+            cls._exit_event.set()
         logger.info("✨ Exited Black Stone mode via rebirth")
         return True
         
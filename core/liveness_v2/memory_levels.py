@@ -5,12 +5,59 @@ Three levels: Episodic (short-term), Semantic (long-term), Archetypal (core beli
 
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, TYPE_CHECKING
 from datetime import datetime, timedelta
+import asyncio
+import base64
 import hashlib
+import logging
 import numpy as np
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from .sleep_consolidator import SleepConsolidator
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(obj) -> bytes:
+    """JSON bytes with sorted keys, via orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC)
+        except TypeError:
+            pass  # e.g. accumulator values wider than 64 bits
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+
+
+def _loads(data: bytes):
+    """Inverse of _dumps"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass  # integers wider than 64 bits
+    return json.loads(data)
+
+
+def _encode_embedding(embedding: np.ndarray) -> str:
+    """Embedding as base64 of its float32 bytes"""
+    return base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def _decode_embedding(data) -> np.ndarray:
+    """Inverse of _encode_embedding; arrays and plain lists pass through"""
+    if isinstance(data, str):
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+    if isinstance(data, np.ndarray):
+        return data
+    return np.array(data)
+
 
 class MemoryLevel(Enum):
     EPISODIC = "episodic"
@@ -75,7 +122,7 @@ class EpisodicScar:
             "entropy_score": self.entropy_score,
             "ontological_drift": self.ontological_drift,
             "deformation_vector": self.deformation_vector,
-            "embedding": self.embedding.tolist(),
+            "embedding": _encode_embedding(self.embedding),
             "created_at": self.created_at.isoformat(),
             "access_count": self.access_count,
             "last_accessed": self.last_accessed.isoformat() if self.last_accessed else None,
@@ -88,7 +135,7 @@ class EpisodicScar:
     @classmethod
     def from_dict(cls, data: Dict) -> "EpisodicScar":
         """Create from dict"""
-        data["embedding"] = np.array(data["embedding"])
+        data["embedding"] = _decode_embedding(data["embedding"])
         data["created_at"] = datetime.fromisoformat(data["created_at"])
         if data.get("last_accessed"):
             data["last_accessed"] = datetime.fromisoformat(data["last_accessed"])
@@ -130,7 +177,7 @@ class SemanticCluster:
         """Convert to dict for storage"""
         return {
             "cluster_id": self.cluster_id,
-            "centroid": self.centroid.tolist(),
+            "centroid": _encode_embedding(self.centroid),
             "source_hashes": self.source_hashes,
             "source_scar_ids": self.source_scar_ids,
             "avg_entropy": self.avg_entropy,
@@ -147,7 +194,7 @@ class SemanticCluster:
     @classmethod
     def from_dict(cls, data: Dict) -> "SemanticCluster":
         """Create from dict"""
-        data["centroid"] = np.array(data["centroid"])
+        data["centroid"] = _decode_embedding(data["centroid"])
         data["consolidated_at"] = datetime.fromisoformat(data["consolidated_at"])
         if data.get("last_accessed"):
             data["last_accessed"] = datetime.fromisoformat(data["last_accessed"])
@@ -178,7 +225,7 @@ class Archetype:
         return {
             "archetype_id": self.archetype_id,
             "label": self.label,
-            "embedding": self.embedding.tolist(),
+            "embedding": _encode_embedding(self.embedding),
             "weight": self.weight,
             "source_clusters": self.source_clusters,
             "total_scars_behind": self.total_scars_behind,
@@ -189,7 +236,7 @@ class Archetype:
     @classmethod
     def from_dict(cls, data: Dict) -> "Archetype":
         """Create from dict"""
-        data["embedding"] = np.array(data["embedding"])
+        data["embedding"] = _decode_embedding(data["embedding"])
         data["formed_at"] = datetime.fromisoformat(data["formed_at"])
         return cls(**data)
 
@@ -200,7 +247,14 @@ class HierarchicalMemory:
     Handles three levels of memory with automatic consolidation.
     """
     
-    def __init__(self, storage_path: str = "memory.db"):
+    _INITIAL_CAPACITY = 64
+    
+    def __init__(
+        self,
+        storage_path: str = "memory.db",
+        consolidator: Optional["SleepConsolidator"] = None,
+        consolidation_watermark: int = 256  # new episodic scars per background cycle
+    ):
         self.storage_path = storage_path
         
         # Three memory levels
@@ -212,14 +266,162 @@ class HierarchicalMemory:
         self.basis_index: Dict[str, List[str]] = {}  # cognitive_basis -> [scar_ids]
         self.type_index: Dict[str, List[str]] = {}  # incident_type -> [scar_ids]
         
+        # Episodic embeddings as one contiguous float32 matrix (SoA).
+        # Allocated on first insert, grown geometrically; scar.embedding
+        # is a view of its row, so each vector is stored once.
+        self._embeddings: Optional[np.ndarray] = None  # (capacity, dim)
+        self._embed_index: Dict[str, int] = {}  # scar_id -> row
+        self._entropy: Optional[np.ndarray] = None  # (capacity,), same rows
+        self._drift: Optional[np.ndarray] = None  # (capacity,), same rows
+        self._free_rows: List[int] = []
+        self._row_count = 0
+        
+        # L2-normalized semantic centroids, row i belongs to _sem_ids[i]
+        self._sem_centroid_matrix: Optional[np.ndarray] = None  # (capacity, dim)
+        self._sem_ids: List[str] = []
+        self._sem_row: Dict[str, int] = {}  # cluster_id -> row
+        
+        # Background consolidation, scheduled from add_episodic when a
+        # consolidator is attached and an event loop is running
+        self._consolidator = consolidator
+        self._consolidation_watermark = consolidation_watermark
+        self._next_consolidation_at = consolidation_watermark
+        self._pending_consolidation: Optional[asyncio.Task] = None
+        # One consolidation cycle at a time (background task or scheduler)
+        self._consolidation_lock = asyncio.Lock()
+        
+    def _allocate_row(self, dim: int) -> int:
+        """Return a free row of the embedding matrix, growing it if full."""
+        if self._free_rows:
+            return self._free_rows.pop()
+            
+        if self._embeddings is None:
+            self._embeddings = np.empty((self._INITIAL_CAPACITY, dim), dtype=np.float32)
+            self._entropy = np.empty(self._INITIAL_CAPACITY)
+            self._drift = np.empty(self._INITIAL_CAPACITY)
+        elif self._row_count == self._embeddings.shape[0]:
+            grown = np.empty((self._row_count * 2, dim), dtype=np.float32)
+            grown[:self._row_count] = self._embeddings
+            self._embeddings = grown
+            # Re-point the row views at the new matrix
+            for scar_id, r in self._embed_index.items():
+                self.episodic[scar_id].embedding = grown[r]
+            self._entropy = np.resize(self._entropy, self._row_count * 2)
+            self._drift = np.resize(self._drift, self._row_count * 2)
+            
+        row = self._row_count
+        self._row_count += 1
+        return row
+        
     def add_episodic(self, scar: EpisodicScar):
         """Add a new episodic scar"""
         self.episodic[scar.scar_id] = scar
         
+        # Store embedding in the shared matrix
+        row = self._embed_index.get(scar.scar_id)
+        if row is None:
+            row = self._allocate_row(scar.embedding.shape[0])
+            self._embed_index[scar.scar_id] = row
+        self._embeddings[row] = scar.embedding
+        scar.embedding = self._embeddings[row]
+        self._entropy[row] = scar.entropy_score
+        self._drift[row] = scar.ontological_drift
+        
         # Update indexes
         self.basis_index.setdefault(scar.cognitive_basis, []).append(scar.scar_id)
         self.type_index.setdefault(scar.incident_type, []).append(scar.scar_id)
         
+        if self._needs_consolidation():
+            self._schedule_consolidation()
+        
+    def _needs_consolidation(self) -> bool:
+        """A consolidator is attached and episodic memory passed the watermark"""
+        return (
+            self._consolidator is not None
+            and len(self.episodic) >= self._next_consolidation_at
+            and (self._pending_consolidation is None or self._pending_consolidation.done())
+        )
+        
+    def _schedule_consolidation(self):
+        """
+        Start a consolidation cycle as a task so add_episodic returns at once.
+        Without a running loop nothing is scheduled (the sleep scheduler
+        consolidates synchronous callers).
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Next cycle only after another watermark of new scars, so fresh
+        # scars that are too young to consolidate are not rescanned per add
+        self._next_consolidation_at = len(self.episodic) + self._consolidation_watermark
+        self._pending_consolidation = loop.create_task(self.run_consolidation(self._consolidator))
+        self._pending_consolidation.add_done_callback(self._consolidation_done)
+        
+    @staticmethod
+    def _consolidation_done(task: asyncio.Task):
+        """Log a failed background cycle (nothing else awaits the task)"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background consolidation failed", exc_info=task.exception())
+        
+    async def run_consolidation(
+        self,
+        consolidator: "SleepConsolidator",
+        max_age_hours: float = 72,
+        apply: bool = True
+    ) -> Tuple[List[SemanticCluster], List[str]]:
+        """
+        One consolidation cycle, serialized with any other through a lock.
+        Clusters whose scars were removed while clustering ran in a worker
+        thread are dropped; only the surviving clusters are applied and
+        promoted to archetypes, and nothing is changed when apply is False.
+        Returns (new_clusters, archived_scar_ids).
+        """
+        async with self._consolidation_lock:
+            new_clusters, _ = await consolidator.consolidate(
+                self, max_age_hours=max_age_hours, promote=False
+            )
+            new_clusters = [
+                c for c in new_clusters
+                if all(sid in self.episodic for sid in c.source_scar_ids)
+            ]
+            archived_ids = [sid for c in new_clusters for sid in c.source_scar_ids]
+            if apply:
+                self.apply_consolidation(new_clusters, archived_ids)
+                if new_clusters:
+                    await consolidator.promote_to_archetypes(self, new_clusters)
+                # Count the next watermark from what is left after archiving
+                self._next_consolidation_at = len(self.episodic) + self._consolidation_watermark
+            return new_clusters, archived_ids
+        
+    def apply_consolidation(self, new_clusters: List[SemanticCluster], archived_ids: List[str]):
+        """Archive consolidated episodic scars and store their new clusters"""
+        for scar_id in archived_ids:
+            self.remove_episodic(scar_id)
+        for cluster in new_clusters:
+            self.add_semantic(cluster)
+        
+    def remove_episodic(self, scar_id: str) -> Optional[EpisodicScar]:
+        """Remove an episodic scar and release its embedding row"""
+        scar = self.episodic.pop(scar_id, None)
+        row = self._embed_index.pop(scar_id, None)
+        if row is not None:
+            # The row will be reused; the removed scar keeps its own copy
+            if scar is not None:
+                scar.embedding = scar.embedding.copy()
+            self._free_rows.append(row)
+        return scar
+        
+    def episodic_embeddings(self, scar_ids: List[str]) -> np.ndarray:
+        """Embedding rows for the given scars, stacked (n, dim) float32"""
+        rows = [self._embed_index[sid] for sid in scar_ids]
+        return self._embeddings[rows]
+        
+    def episodic_scores(self, scar_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Entropy and drift of the given scars as two float arrays"""
+        rows = [self._embed_index[sid] for sid in scar_ids]
+        return self._entropy[rows], self._drift[rows]
+        
     def get_episodic_for_consolidation(self, max_age_hours: float = 72) -> List[EpisodicScar]:
         """Get episodic scars older than max_age_hours for consolidation"""
         now = datetime.utcnow()
@@ -232,22 +434,46 @@ class HierarchicalMemory:
         """Add a new semantic cluster"""
         self.semantic[cluster.cluster_id] = cluster
         
+        # Keep normalized centroid in the search matrix
+        centroid = np.asarray(cluster.centroid, dtype=np.float32)
+        norm = np.linalg.norm(centroid)
+        if norm > 0:
+            centroid = centroid / norm
+            
+        row = self._sem_row.get(cluster.cluster_id)
+        if row is None:
+            row = len(self._sem_ids)
+            if self._sem_centroid_matrix is None:
+                self._sem_centroid_matrix = np.empty(
+                    (self._INITIAL_CAPACITY, centroid.shape[0]), dtype=np.float32
+                )
+            elif row == self._sem_centroid_matrix.shape[0]:
+                grown = np.empty((row * 2, centroid.shape[0]), dtype=np.float32)
+                grown[:row] = self._sem_centroid_matrix
+                self._sem_centroid_matrix = grown
+            self._sem_ids.append(cluster.cluster_id)
+            self._sem_row[cluster.cluster_id] = row
+        self._sem_centroid_matrix[row] = centroid
+        
     def add_archetype(self, archetype: Archetype):
         """Add a new archetype"""
         self.archetypes[archetype.archetype_id] = archetype
         
     def find_similar_semantic(self, embedding: np.ndarray, threshold: float = 0.8) -> List[SemanticCluster]:
         """Find semantic clusters similar to given embedding"""
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        results = []
-        for cluster in self.semantic.values():
-            sim = cosine_similarity([embedding], [cluster.centroid])[0][0]
-            if sim > threshold:
-                results.append((sim, cluster))
-        
-        results.sort(reverse=True)
-        return [r[1] for r in results]
+        if not self._sem_ids:
+            return []
+            
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+            
+        # Cosine similarity against all centroids in one matmul
+        sims = self._sem_centroid_matrix[:len(self._sem_ids)] @ (q / norm)
+        idx = np.nonzero(sims > threshold)[0]
+        order = np.argsort(-sims[idx], kind='stable')
+        return [self.semantic[self._sem_ids[i]] for i in idx[order]]
     
     def get_by_basis(self, basis: str, level: MemoryLevel = MemoryLevel.EPISODIC) -> List:
         """Get memories by cognitive basis"""
@@ -260,33 +486,137 @@ class HierarchicalMemory:
             return [a for a in self.archetypes.values()]  # archetypes aren't basis-specific
     
     def save(self):
-        """Save memory to disk"""
-        import pickle
+        """
+        Save memory to disk.
+        Embeddings go to <storage_path>.npz as three stacked matrices,
+        everything else to a JSON manifest at storage_path.
+        """
+        episodic_ids = list(self.episodic)
+        semantic = list(self.semantic.values())
+        archetypes = list(self.archetypes.values())
         
-        data = {
-            "episodic": {k: v.to_dict() for k, v in self.episodic.items()},
-            "semantic": {k: v.to_dict() for k, v in self.semantic.items()},
-            "archetypes": {k: v.to_dict() for k, v in self.archetypes.items()},
+        np.savez_compressed(
+            self.storage_path + ".npz",
+            episodic=self._stack([self.episodic_embeddings(episodic_ids)] if episodic_ids else []),
+            semantic=self._stack([c.centroid for c in semantic]),
+            archetype=self._stack([a.embedding for a in archetypes])
+        )
+        
+        manifest = {
+            "episodic": [self._manifest_entry(self.episodic[sid], "embedding", i)
+                         for i, sid in enumerate(episodic_ids)],
+            "semantic": [self._manifest_entry(c, "centroid", i) for i, c in enumerate(semantic)],
+            "archetypes": [self._manifest_entry(a, "embedding", i) for i, a in enumerate(archetypes)],
             "basis_index": self.basis_index,
             "type_index": self.type_index
         }
         
         with open(self.storage_path, 'wb') as f:
-            pickle.dump(data, f)
+            f.write(_dumps(manifest))
+    
+    @staticmethod
+    def _stack(rows: List[np.ndarray]) -> np.ndarray:
+        """Stack rows into one float32 matrix (empty matrix for no rows)"""
+        if not rows:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(rows).astype(np.float32, copy=False)
+    
+    @staticmethod
+    def _manifest_entry(item, vector_field: str, index: int) -> Dict:
+        """to_dict() with the vector replaced by its row in the .npz matrix"""
+        data = item.to_dict()
+        del data[vector_field]
+        data["embed_index"] = index
+        return data
     
     def load(self):
-        """Load memory from disk"""
-        import pickle
+        """
+        Load memory from disk.
+        Files written before the JSON + .npz format are pickles; they are
+        refused here (unpickling runs code) and converted once, from a
+        trusted file, by migrate_legacy_pickle().
+        """
         import os
         
         if not os.path.exists(self.storage_path):
             return
         
+        with open(self.storage_path, 'rb') as f:
+            data = f.read()
+        if not data.lstrip().startswith(b'{'):
+            raise ValueError(
+                f"{self.storage_path} is not a JSON memory manifest (a pre-JSON pickle?); "
+                "convert a trusted file once with HierarchicalMemory.migrate_legacy_pickle()"
+            )
+        manifest = _loads(data)
+        
+        with np.load(self.storage_path + ".npz") as matrices:
+            episodic = matrices["episodic"]
+            centroids = matrices["semantic"]
+            archetype_embeddings = matrices["archetype"]
+        
+        def restore(cls, data, vector_field, matrix):
+            data[vector_field] = matrix[data.pop("embed_index")]
+            return cls.from_dict(data)
+        
+        self._restore(
+            [restore(EpisodicScar, v, "embedding", episodic) for v in manifest["episodic"]],
+            [restore(SemanticCluster, v, "centroid", centroids) for v in manifest["semantic"]],
+            [restore(Archetype, v, "embedding", archetype_embeddings) for v in manifest["archetypes"]],
+            manifest["basis_index"],
+            manifest["type_index"]
+        )
+    
+    def migrate_legacy_pickle(self):
+        """
+        Convert a pickle memory file at storage_path to the JSON manifest
+        and .npz matrices, in place. Unpickling executes code from the
+        file, so run this once and only on a file you trust.
+        """
+        import pickle
+        
         with open(self.storage_path, 'rb') as f:
             data = pickle.load(f)
         
-        self.episodic = {k: EpisodicScar.from_dict(v) for k, v in data["episodic"].items()}
-        self.semantic = {k: SemanticCluster.from_dict(v) for k, v in data["semantic"].items()}
-        self.archetypes = {k: Archetype.from_dict(v) for k, v in data["archetypes"].items()}
-        self.basis_index = data["basis_index"]
-        self.type_index = data["type_index"]
+        self._restore(
+            [EpisodicScar.from_dict(v) for v in data["episodic"].values()],
+            [SemanticCluster.from_dict(v) for v in data["semantic"].values()],
+            [Archetype.from_dict(v) for v in data["archetypes"].values()],
+            data["basis_index"],
+            data["type_index"]
+        )
+        self.save()
+    
+    def _restore(
+        self,
+        episodic: List[EpisodicScar],
+        semantic: List[SemanticCluster],
+        archetypes: List[Archetype],
+        basis_index: Dict[str, List[str]],
+        type_index: Dict[str, List[str]]
+    ):
+        """Replace all memory levels and rebuild the embedding matrices"""
+        self.episodic = {scar.scar_id: scar for scar in episodic}
+        self.archetypes = {a.archetype_id: a for a in archetypes}
+        self.basis_index = basis_index
+        self.type_index = type_index
+        
+        self.semantic = {}
+        self._sem_centroid_matrix = None
+        self._sem_ids = []
+        self._sem_row = {}
+        for cluster in semantic:
+            self.add_semantic(cluster)
+        
+        # Rebuild embedding matrix
+        self._embeddings = None
+        self._embed_index = {}
+        self._free_rows = []
+        self._row_count = 0
+        for scar in self.episodic.values():
+            row = self._allocate_row(scar.embedding.shape[0])
+            self._embed_index[scar.scar_id] = row
+            self._embeddings[row] = scar.embedding
+            scar.embedding = self._embeddings[row]
+            self._entropy[row] = scar.entropy_score
+            self._drift[row] = scar.ontological_drift
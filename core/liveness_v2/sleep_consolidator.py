@@ -3,13 +3,14 @@ Sleep Consolidator - runs during low activity periods
 Consolidates episodic scars into semantic clusters and archetypes
 """
 
+import asyncio
 import hashlib
 import uuid
+from collections import Counter
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 import numpy as np
 from sklearn.cluster import DBSCAN
-from sklearn.metrics.pairwise import cosine_similarity
 
 from .memory_levels import HierarchicalMemory, EpisodicScar, SemanticCluster, Archetype
 
@@ -39,10 +40,14 @@ class SleepConsolidator:
     async def consolidate(
         self,
         memory: HierarchicalMemory,
-        max_age_hours: float = 72
+        max_age_hours: float = 72,
+        promote: bool = True
     ) -> Tuple[List[SemanticCluster], List[str]]:
         """
         Run consolidation cycle.
+        With promote=False archetype promotion is left to the caller
+        (HierarchicalMemory.run_consolidation promotes only the clusters
+        it applies).
         Returns: (new_clusters, archived_scar_ids)
         """
         # 1. Get old episodic scars
@@ -50,60 +55,107 @@ class SleepConsolidator:
         if len(old_scars) < self.min_samples:
             return [], []
         
-        # 2. Cluster embeddings
-        embeddings = np.array([s.embedding for s in old_scars])
-        clustering = DBSCAN(
-            eps=self.eps,
-            min_samples=self.min_samples,
-            metric='cosine'
-        ).fit(embeddings)
+        # 2. Cluster embeddings (rows of the memory's float32 matrix)
+        # in a worker thread so the event loop stays responsive.
+        # Rows and scores are copied first: scars may be removed meanwhile
+        scar_ids = [s.scar_id for s in old_scars]
+        embeddings = memory.episodic_embeddings(scar_ids)
+        entropy, drift = memory.episodic_scores(scar_ids)
+        labels = await asyncio.to_thread(self._cluster_labels, embeddings)
         
         # 3. Create semantic clusters
         new_clusters = []
         archived_ids = []
         
-        labels = clustering.labels_
-        unique_labels = set(labels)
-        
-        for label in unique_labels:
-            if label == -1:  # noise - keep as episodic
-                continue
-                
-            # Get scars in this cluster
-            cluster_indices = np.where(labels == label)[0]
-            cluster_scars = [old_scars[i] for i in cluster_indices]
+        # Group clustered rows by label (noise -1 stays episodic) and
+        # reduce centroids and statistics for all clusters at once
+        clustered = np.nonzero(labels != -1)[0]
+        if len(clustered):
+            order = clustered[np.argsort(labels[clustered], kind='stable')]
+            starts = np.r_[0, np.nonzero(np.diff(labels[order]))[0] + 1]
+            counts = np.diff(np.r_[starts, len(order)])
             
-            # Create semantic cluster
-            cluster = self._create_semantic_cluster(cluster_scars)
-            new_clusters.append(cluster)
+            centroids = np.add.reduceat(embeddings[order], starts, axis=0)
+            avg_entropy = np.add.reduceat(entropy[order], starts) / counts
+            avg_drift = np.add.reduceat(drift[order], starts) / counts
             
-            # Mark scars for archiving
-            archived_ids.extend([s.scar_id for s in cluster_scars])
+            for k, start in enumerate(starts):
+                cluster_scars = [old_scars[i] for i in order[start:start + counts[k]]]
+                
+                # Create semantic cluster
+                cluster = self._create_semantic_cluster(
+                    cluster_scars,
+                    centroid=centroids[k],
+                    avg_entropy=avg_entropy[k],
+                    avg_drift=avg_drift[k]
+                )
+                new_clusters.append(cluster)
+                
+                # Mark scars for archiving
+                archived_ids.extend([s.scar_id for s in cluster_scars])
         
         # 4. Check for archetype promotion
-        if new_clusters:
-            await self._promote_to_archetypes(memory, new_clusters)
+        if promote and new_clusters:
+            await self.promote_to_archetypes(memory, new_clusters)
         
         return new_clusters, archived_ids
     
-    def _create_semantic_cluster(self, scars: List[EpisodicScar]) -> SemanticCluster:
-        """Create a semantic cluster from a list of scars"""
+    def _cluster_labels(self, embeddings: np.ndarray) -> np.ndarray:
+        """DBSCAN labels over cosine distances; the CPU-heavy part of a cycle"""
+        return DBSCAN(
+            eps=self.eps,
+            min_samples=self.min_samples,
+            metric='precomputed'
+        ).fit(self._cosine_distances(embeddings)).labels_
+    
+    @staticmethod
+    def _cosine_distances(embeddings: np.ndarray) -> np.ndarray:
+        """Pairwise cosine distance matrix from one normalized matmul"""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized = (embeddings / norms).astype(np.float32, copy=False)
+        
+        distances = 1.0 - normalized @ normalized.T
+        np.fill_diagonal(distances, 0.0)
+        np.clip(distances, 0.0, 2.0, out=distances)
+        return distances
+    
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        """Scale a freshly computed vector to unit L2 norm in place"""
+        vector *= 1.0 / np.sqrt(np.dot(vector, vector))
+        return vector
+    
+    def _create_semantic_cluster(
+        self,
+        scars: List[EpisodicScar],
+        centroid: Optional[np.ndarray] = None,
+        avg_entropy: Optional[float] = None,
+        avg_drift: Optional[float] = None
+    ) -> SemanticCluster:
+        """
+        Create a semantic cluster from a list of scars.
+        Centroid (sum or mean of embeddings, normalized in place) and
+        statistics may be passed in when already reduced by consolidate().
+        """
         # Compute centroid (mean of embeddings)
-        embeddings = np.array([s.embedding for s in scars])
-        centroid = np.mean(embeddings, axis=0)
+        if centroid is None:
+            centroid = np.mean([s.embedding for s in scars], axis=0)
         
-        # Normalize centroid
-        centroid = centroid / np.linalg.norm(centroid)
+        # Normalize centroid (the mean's 1/n factor cancels out here)
+        centroid = self._normalize(centroid)
         
         # Compute statistics
-        avg_entropy = np.mean([s.entropy_score for s in scars])
-        avg_drift = np.mean([s.ontological_drift for s in scars])
+        if avg_entropy is None:
+            avg_entropy = np.mean([s.entropy_score for s in scars])
+        if avg_drift is None:
+            avg_drift = np.mean([s.ontological_drift for s in scars])
         
         # Find dominant basis and type
         bases = [s.cognitive_basis for s in scars]
         types = [s.incident_type for s in scars]
-        dominant_basis = max(set(bases), key=bases.count)
-        dominant_type = max(set(types), key=types.count)
+        dominant_basis = Counter(bases).most_common(1)[0][0]
+        dominant_type = Counter(types).most_common(1)[0][0]
         
         # Create cluster ID from hashes
         source_hashes = [s.scar_hash for s in scars]
@@ -128,7 +180,7 @@ class SleepConsolidator:
             proof_hash=proof_hash
         )
     
-    async def _promote_to_archetypes(
+    async def promote_to_archetypes(
         self,
         memory: HierarchicalMemory,
         new_clusters: List[SemanticCluster]
@@ -148,20 +200,19 @@ class SleepConsolidator:
                 continue
             
             # Check if these clusters are similar to each other
-            embeddings = np.array([c.centroid for c in clusters])
-            sim_matrix = cosine_similarity(embeddings)
+            # (centroids are unit length, so the Gram matrix is cosine similarity)
+            embeddings = np.array([c.centroid for c in clusters], dtype=np.float32)
+            sim_matrix = embeddings @ embeddings.T
             
             # If all are highly similar, promote to archetype
-            if np.all(sim_matrix > self.similarity_threshold):
+            if sim_matrix.min() > self.similarity_threshold:
                 archetype = self._create_archetype(clusters, key)
                 memory.add_archetype(archetype)
     
     def _create_archetype(self, clusters: List[SemanticCluster], key: str) -> Archetype:
         """Create an archetype from a group of similar clusters"""
         # Compute archetype embedding (mean of cluster centroids)
-        embeddings = np.array([c.centroid for c in clusters])
-        archetype_embedding = np.mean(embeddings, axis=0)
-        archetype_embedding = archetype_embedding / np.linalg.norm(archetype_embedding)
+        archetype_embedding = self._normalize(np.add.reduce([c.centroid for c in clusters]))
         
         # Count total scars behind
         total_scars = sum(c.count for c in clusters)
@@ -6,12 +6,17 @@ from dataclasses import dataclass
 from typing import Dict, Optional, Any
 import uuid
 import hashlib
-from datetime import datetime
+from datetime import datetime, timezone
 
 from accumulator.rsa_accumulator import AccumulatorProof
 
+# to_hash encodings: v1 formats the fields as a string (what existing
+# chains hold), v2 hashes raw field bytes
+SCAR_HASH_V1 = 1
+SCAR_HASH_V2 = 2
 
-@dataclass
+
+@dataclass(slots=True)
 class OntologicalScar:
     """
     Ontological trauma scar.
@@ -37,7 +42,56 @@ class OntologicalScar:
     chain_proof: Optional[AccumulatorProof] = None
     accumulator_value: Optional[int] = None
     
-    def to_hash(self) -> bytes:
-        """Scar hash for accumulator."""
-        content = f"{self.scar_id}{self.pre_state_hash}{self.post_state_hash}{self.timestamp}"
-        return hashlib.sha256(content.encode()).digest()
+    def to_hash(self, version: int = SCAR_HASH_V1) -> bytes:
+        """
+        Scar hash for accumulator.
+        Version 1 (default) is the original encoding: SHA-256 of the fields
+        formatted as one string. Every scar already in a WAL or chain was
+        accumulated under it, so it stays the default.
+        Version 2 feeds SHA-256 raw bytes instead: a version byte, UUID
+        bytes, state hashes (decoded from hex when possible, tagged and
+        length-prefixed) and the timestamp as fixed-width integer
+        nanoseconds since the epoch. It gives different digests, so use it
+        only for chains started with it.
+        """
+        if version == SCAR_HASH_V1:
+            content = f"{self.scar_id}{self.pre_state_hash}{self.post_state_hash}{self.timestamp}"
+            return hashlib.sha256(content.encode()).digest()
+        if version != SCAR_HASH_V2:
+            raise ValueError(f"Unknown scar hash version: {version}")
+            
+        h = hashlib.sha256(bytes((SCAR_HASH_V2,)))
+        scar_id = self.scar_id if isinstance(self.scar_id, uuid.UUID) else uuid.UUID(str(self.scar_id))
+        h.update(scar_id.bytes)
+        for state_hash in (self.pre_state_hash, self.post_state_hash):
+            raw = _state_hash_bytes(state_hash)
+            h.update(len(raw).to_bytes(4, 'big'))
+            h.update(raw)
+        h.update(_timestamp_ns(self.timestamp).to_bytes(8, 'big', signed=True))
+        return h.digest()
+
+
+def _state_hash_bytes(state_hash: str) -> bytes:
+    """
+    Raw digest bytes of a hex state hash; other labels are UTF-8 encoded.
+    A leading tag byte keeps the two encodings from colliding.
+    """
+    try:
+        return b'\x00' + bytes.fromhex(state_hash)
+    except ValueError:
+        return b'\x01' + state_hash.encode()
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+
+
+def _timestamp_ns(timestamp: datetime) -> int:
+    """
+    Exact nanoseconds since the epoch. Naive datetimes are taken as UTC
+    (they come from utcnow()), so the result does not depend on the local
+    timezone or on float rounding like datetime.timestamp() would.
+    """
+    epoch = _EPOCH if timestamp.tzinfo is None else _EPOCH_UTC
+    delta = timestamp - epoch
+    return ((delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds) * 1000
@@ -6,15 +6,86 @@ Uses scars to influence apostle selection and routing decisions.
 import asyncio
 import hashlib
 import json
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+import re
+import time
+import uuid
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import InitVar, dataclass, asdict
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from core.ontological_scar import OntologicalScar
 from accumulator.incremental_proof import IncrementalChainProof
 
 
-@dataclass
+_MIMICRY_BAN_NS = 24 * 3600 * 10**9      # 24 hours
+_BETRAYAL_BAN_NS = 7 * 24 * 3600 * 10**9  # 7 days
+
+# incident_type -> (trust multiplier from entropy, ban length in ns).
+# The multipliers also accept entropy arrays, for bulk application.
+_INCIDENT_EFFECTS = MappingProxyType({
+    # Rejection reduces trust significantly
+    "rejection": (lambda e: 1 - e * 0.5, 0),
+    # Mimicry can lead to temporary ban
+    "mimicry_detected": (lambda e: 0.3, _MIMICRY_BAN_NS),
+    # Betrayal has severe effect
+    "betrayal": (lambda e: 0.1, _BETRAYAL_BAN_NS),
+    # Exhaustion - gradual decay
+    "exhaustion": (lambda e: 0.8, 0),
+})
+
+# Language family effects: a scar on a basis weakens its relatives
+_LANGUAGE_FAMILIES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "de": ("nl", "da", "sv"),  # Germanic
+    "ru": ("uk", "be", "bg"),  # Slavic
+    "hy": ("fa", "ku"),        # Indo-Iranian
+    "en": ("de", "nl"),        # Germanic
+    "fr": ("es", "it", "pt"),  # Romance
+    "es": ("fr", "it", "pt"),
+    "it": ("fr", "es", "pt"),
+})
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _ns_to_datetime(ns: int) -> datetime:
+    """Nanosecond deadline back to a naive UTC datetime, for display."""
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+def _datetime_to_ns(moment: datetime) -> int:
+    """Naive UTC datetime to a nanosecond deadline."""
+    return (moment - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+# Question words that hint at the query language, per cognitive basis
+_LANG_HINTS: Mapping[str, FrozenSet[str]] = MappingProxyType({
+    "ru": frozenset(("почему", "как", "что", "кто")),
+    "de": frozenset(("warum", "wie", "was", "wer")),
+    "en": frozenset(("why", "how", "what", "who")),
+})
+
+
+def _compile_hints(hints: Mapping[str, FrozenSet[str]]) -> "re.Pattern":
+    """
+    One regex matching any hint word as a substring, with a named group
+    per basis. The lookahead lets matches overlap, like separate
+    `word in query` checks would.
+    """
+    groups = "|".join(
+        f"(?P<{basis}>{'|'.join(map(re.escape, sorted(words)))})"
+        for basis, words in hints.items()
+    )
+    return re.compile(f"(?=(?:{groups}))")
+
+
+_HINT_PATTERN = _compile_hints(_LANG_HINTS)
+
+
+@dataclass(slots=True)
 class ApostleTrust:
     """Trust level for each cognitive basis."""
     basis: str  # 'de', 'ru', 'hy', 'en', 'sa'
@@ -22,45 +93,55 @@ class ApostleTrust:
     current_trust: float  # Current trust after scars (0-1)
     scar_count: int  # Number of scars affecting this basis
     last_used: Optional[datetime] = None
-    banned_until: Optional[datetime] = None
+    banned_until_ns: int = 0  # time.time_ns() deadline, 0 = never banned
+    # Older callers pass the deadline as a naive UTC datetime
+    banned_until: InitVar[Optional[datetime]] = None
+    
+    def __post_init__(self, banned_until: Optional[datetime]):
+        if banned_until is not None:
+            self.banned_until_ns = _datetime_to_ns(banned_until)
     
-    def can_use(self, threshold: float = 0.3) -> bool:
+    def can_use(self, threshold: float = 0.3, now_ns: Optional[int] = None) -> bool:
         """Check if this apostle can be used."""
-        if self.banned_until and self.banned_until > datetime.utcnow():
-            return False
-        return self.current_trust > threshold
+        if now_ns is None:
+            now_ns = time.time_ns()
+        return self.banned_until_ns <= now_ns and self.current_trust > threshold
     
-    def apply_scar(self, scar: OntologicalScar):
+    def apply_scar(self, scar: OntologicalScar, now_ns: Optional[int] = None):
         """Apply scar effect to this apostle."""
         if scar.cognitive_basis != self.basis:
             return
+        if now_ns is None:
+            now_ns = time.time_ns()
             
         self.scar_count += 1
         
         # Different incident types have different effects
-        if scar.incident_type == "rejection":
-            # Rejection reduces trust significantly
-            self.current_trust *= (1 - scar.entropy_score * 0.5)
-            
-        elif scar.incident_type == "mimicry_detected":
-            # Mimicry can lead to temporary ban
-            self.current_trust *= 0.3
-            self.banned_until = datetime.utcnow() + timedelta(hours=24)
-            
-        elif scar.incident_type == "betrayal":
-            # Betrayal has severe effect
-            self.current_trust *= 0.1
-            self.banned_until = datetime.utcnow() + timedelta(days=7)
-            
-        elif scar.incident_type == "exhaustion":
-            # Exhaustion - gradual decay
-            self.current_trust *= 0.8
+        effect = _INCIDENT_EFFECTS.get(scar.incident_type)
+        if effect:
+            multiplier, ban_ns = effect
+            self.current_trust *= multiplier(scar.entropy_score)
+            if ban_ns:
+                self.banned_until_ns = now_ns + ban_ns
             
         # Ensure trust stays in bounds
         self.current_trust = max(0.0, min(1.0, self.current_trust))
 
 
-@dataclass
+def _get_banned_until(self: ApostleTrust) -> Optional[datetime]:
+    """Ban deadline as a datetime, for serialization."""
+    return _ns_to_datetime(self.banned_until_ns) if self.banned_until_ns else None
+
+
+def _set_banned_until(self: ApostleTrust, moment: Optional[datetime]):
+    self.banned_until_ns = 0 if moment is None else _datetime_to_ns(moment)
+
+
+# Set after the dataclass is built, so the name also works as an init keyword
+ApostleTrust.banned_until = property(_get_banned_until, _set_banned_until)
+
+
+@dataclass(slots=True)
 class RoutingDecision:
     """Decision from Cognitive Integrator."""
     selected_basis: str
@@ -68,7 +149,53 @@ class RoutingDecision:
     alternatives: List[str]
     scars_considered: int
     collision_allowed: bool
-    reasoning: str
+    # Explicit reasoning text; takes precedence over reasoning_facts
+    reasoning: InitVar[Optional[str]] = None
+    # (selected, trust, scar_count, banned_until_ns, alternatives), formatted
+    # only when .reasoning is read
+    reasoning_facts: Tuple = ()
+    reasoning_text: str = ""
+    
+    def __post_init__(self, reasoning: Optional[str]):
+        if reasoning is not None:
+            self.reasoning_text = reasoning
+
+
+def _format_reasoning(
+    selected: str,
+    trust: float,
+    scar_count: int,
+    banned_until_ns: int,
+    alternatives: Tuple[str, ...]
+) -> str:
+    """Format RoutingDecision.reasoning from its facts."""
+    parts = [
+        f"Selected {selected} (trust: {trust:.2f})",
+        f"based on {scar_count} scars"
+    ]
+    
+    if banned_until_ns:
+        parts.append(f"WARNING: {selected} was banned until {_ns_to_datetime(banned_until_ns)}")
+        
+    if alternatives:
+        parts.append(f"alternatives: {', '.join(alternatives)}")
+        
+    return " | ".join(parts)
+
+
+def _get_reasoning(self: RoutingDecision) -> str:
+    """Human-readable reasoning for the decision."""
+    if self.reasoning_text or not self.reasoning_facts:
+        return self.reasoning_text
+    return _format_reasoning(*self.reasoning_facts)
+
+
+def _set_reasoning(self: RoutingDecision, text: str):
+    self.reasoning_text = text
+
+
+# Set after the dataclass is built, so the name also works as an init keyword
+RoutingDecision.reasoning = property(_get_reasoning, _set_reasoning)
 
 
 class CognitiveIntegrator:
@@ -83,6 +210,35 @@ class CognitiveIntegrator:
         self.apostles: Dict[str, ApostleTrust] = {}
         self._initialize_apostles()
         
+        # SoA snapshot of self.apostles used for scoring. The apostles stay
+        # the source of truth (callers may change them directly), so the
+        # arrays are refilled by _refresh_arrays before every read
+        self._bases: List[str] = list(self.apostles)
+        self._basis_ix: Dict[str, int] = {b: i for i, b in enumerate(self._bases)}
+        self._trust = np.zeros(len(self._bases))
+        self._banned_ns = np.zeros(len(self._bases), dtype=np.int64)  # 0 = never banned
+        self._scars = np.zeros(len(self._bases), dtype=np.int32)
+        self._family_neighbors = self._build_family_neighbors()
+        # Apostle index of every hinted basis, resolved once
+        self._hint_ix: Dict[str, int] = {
+            b: self._basis_ix[b] for b in _LANG_HINTS if b in self._basis_ix
+        }
+            
+    def _refresh_arrays(self):
+        """Copy every ApostleTrust into the scoring arrays."""
+        apostles = [self.apostles[b] for b in self._bases]
+        self._trust[:] = [a.current_trust for a in apostles]
+        self._scars[:] = [a.scar_count for a in apostles]
+        self._banned_ns[:] = [a.banned_until_ns for a in apostles]
+        
+    def _usable_mask(self, now_ns: int, threshold: float = 0.3) -> np.ndarray:
+        """Vectorized ApostleTrust.can_use over all apostles."""
+        return (self._banned_ns <= now_ns) & (self._trust > threshold)
+        
+    def _hinted_bases(self, query_lower: str) -> set:
+        """Bases whose hint words occur in the query, in one scan."""
+        return {m.lastgroup for m in _HINT_PATTERN.finditer(query_lower)}
+        
     def _initialize_apostles(self):
         """Initialize default apostle trust levels."""
         default_weights = {
@@ -108,45 +264,111 @@ class CognitiveIntegrator:
                 scar_count=0
             )
     
-    async def load_scars_from_chain(self) -> int:
+    async def load_scars_from_chain(
+        self,
+        scars: Optional[Sequence[OntologicalScar]] = None
+    ) -> int:
         """
         Load all scars from chain and apply their effects.
         Returns number of scars processed.
         """
-        # In a real implementation, you'd load scars from storage
-        # For now, we'll just note that scars affect trust
+        if scars:
+            # Replay scar contents supplied by the caller's storage
+            self.apply_scars_bulk(scars)
+            print(f"📊 Replayed {len(scars)} scars")
+            return len(scars)
+            
+        # The chain WAL only holds scar hashes, so without scar
+        # contents we can just note how many scars affect trust
         scar_count = self.chain.accumulator.current_sequence
         print(f"📊 Chain has {scar_count} scars")
         return scar_count
     
+    def apply_scars_bulk(self, scars: Sequence[OntologicalScar]):
+        """
+        Apply many scars at once.
+        Trust multipliers are reduced per basis with np.multiply.at
+        instead of one apply_scar call per scar; a basis hit by several
+        bans keeps the longest one.
+        """
+        if not scars:
+            return
+            
+        ix = np.array([self._basis_ix.get(s.cognitive_basis, -1) for s in scars])
+        entropy = np.array([s.entropy_score for s in scars], dtype=float)
+        types = np.array([s.incident_type for s in scars])
+        
+        multiplier = np.ones(len(scars))
+        ban_ns = np.zeros(len(scars), dtype=np.int64)
+        for incident_type, (effect, ban) in _INCIDENT_EFFECTS.items():
+            mask = types == incident_type
+            multiplier[mask] = effect(entropy[mask])
+            ban_ns[mask] = ban
+        np.maximum(multiplier, 0.0, out=multiplier)
+        
+        own = ix >= 0
+        factor = np.ones(len(self._bases))
+        np.multiply.at(factor, ix[own], multiplier[own])
+        longest_ban = np.zeros(len(self._bases), dtype=np.int64)
+        np.maximum.at(longest_ban, ix[own], ban_ns[own])
+        counts = np.bincount(ix[own], minlength=len(self._bases))
+        
+        now_ns = time.time_ns()
+        for i in np.nonzero(counts)[0]:
+            apostle = self.apostles[self._bases[i]]
+            apostle.scar_count += int(counts[i])
+            apostle.current_trust = max(0.0, min(1.0, apostle.current_trust * factor[i]))
+            if longest_ban[i]:
+                apostle.banned_until_ns = now_ns + int(longest_ban[i])
+            
+        self._scatter_cross_effects(ix, entropy)
+    
     def apply_scar_to_apostles(self, scar: OntologicalScar):
         """Apply a single scar to relevant apostles."""
         if scar.cognitive_basis in self.apostles:
-            self.apostles[scar.cognitive_basis].apply_scar(scar)
+            self.apostles[scar.cognitive_basis].apply_scar(scar, time.time_ns())
             
         # Also affect similar bases (optional)
         self._apply_cross_basis_effect(scar)
     
+    def _build_family_neighbors(self) -> Dict[int, np.ndarray]:
+        """Basis index -> indices of related apostles, built once."""
+        neighbors = {}
+        for basis, similar in _LANGUAGE_FAMILIES.items():
+            ix = [self._basis_ix[b] for b in similar if b in self._basis_ix]
+            if basis in self._basis_ix and ix:
+                neighbors[self._basis_ix[basis]] = np.array(ix)
+        return neighbors
+    
+    def _scatter_cross_effects(self, basis_ix: np.ndarray, entropy: np.ndarray):
+        """
+        Multiply the trust of every family neighbor of the given scar
+        bases by (1 - entropy * 0.2) in one np.multiply.at.
+        """
+        neigh, factors = [], []
+        for i, e in zip(basis_ix.tolist(), entropy.tolist()):
+            n = self._family_neighbors.get(i)
+            if n is not None:
+                neigh.append(n)
+                factors.append(np.full(len(n), 1 - e * 0.2))
+        if not neigh:
+            return
+            
+        neigh = np.concatenate(neigh)
+        factor = np.ones(len(self._bases))
+        np.multiply.at(factor, neigh, np.concatenate(factors))
+        for j in np.unique(neigh):
+            self.apostles[self._bases[j]].current_trust *= float(factor[j])
+    
     def _apply_cross_basis_effect(self, scar: OntologicalScar):
         """Apply scar effects to similar cognitive bases."""
-        # Language family effects
-        families = {
-            "de": ["nl", "da", "sv"],  # Germanic
-            "ru": ["uk", "be", "bg"],  # Slavic
-            "hy": ["fa", "ku"],        # Indo-Iranian
-            "en": ["de", "nl"],        # Germanic
-            "fr": ["es", "it", "pt"],  # Romance
-            "es": ["fr", "it", "pt"],
-            "it": ["fr", "es", "pt"],
-        }
-        
-        if scar.cognitive_basis in families:
-            for similar in families[scar.cognitive_basis]:
-                if similar in self.apostles:
-                    # Weaker effect on similar bases
-                    weak_scar = scar
-                    # Apply with reduced entropy
-                    self.apostles[similar].current_trust *= (1 - scar.entropy_score * 0.2)
+        neigh = self._family_neighbors.get(self._basis_ix.get(scar.cognitive_basis))
+        if neigh is None:
+            return
+            
+        # Weaker effect on similar bases
+        for j in neigh:
+            self.apostles[self._bases[j]].current_trust *= (1 - scar.entropy_score * 0.2)
     
     async def decide_routing(
         self,
@@ -158,31 +380,21 @@ class CognitiveIntegrator:
         Make routing decision based on scars and query analysis.
         This is the main integration point with Cognitive Collider.
         """
+        now_ns = time.time_ns()
+        self._refresh_arrays()
+        
         # 1. Quick query analysis (simplified)
         query_lower = query.lower()
+        hinted = self._hinted_bases(query_lower)
         
-        # 2. Score each apostle
-        scores = {}
-        for basis, apostle in self.apostles.items():
-            if not apostle.can_use():
-                scores[basis] = 0.0
-                continue
-                
-            # Base score from trust
-            score = apostle.current_trust
-            
-            # Boost for language match (simplified)
-            if basis == "ru" and any(word in query_lower for word in ["почему", "как", "что", "кто"]):
-                score *= 1.3
-            elif basis == "de" and any(word in query_lower for word in ["warum", "wie", "was", "wer"]):
-                score *= 1.3
-            elif basis == "en" and any(word in query_lower for word in ["why", "how", "what", "who"]):
-                score *= 1.3
-                
-            scores[basis] = score
+        # 2. Score each apostle (trust, boosted on language match)
+        score_arr = self._trust * self._usable_mask(now_ns)
+        boosted = [self._hint_ix[b] for b in hinted if b in self._hint_ix]
+        if boosted:
+            score_arr[boosted] *= 1.3
         
         # 3. Select best apostle
-        sorted_apostles = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        sorted_apostles = [(self._bases[i], float(score_arr[i])) for i in self._top_k(score_arr, 4)]
         
         if not sorted_apostles or sorted_apostles[0][1] == 0:
             # Fallback to safest apostle
@@ -202,8 +414,12 @@ class CognitiveIntegrator:
         # 4. Check if collision mode is safe
         collision_allowed = self._is_collision_safe(selected, alternatives)
         
-        # 5. Generate reasoning
-        reasoning = self._generate_reasoning(selected, alternatives, scores)
+        # 5. Capture reasoning facts (formatted lazily)
+        apostle = self.apostles[selected]
+        reasoning_facts = (
+            selected, apostle.current_trust, apostle.scar_count,
+            apostle.banned_until_ns, tuple(alternatives)
+        )
         
         return RoutingDecision(
             selected_basis=selected,
@@ -211,46 +427,45 @@ class CognitiveIntegrator:
             alternatives=alternatives,
             scars_considered=self.chain.accumulator.current_sequence,
             collision_allowed=collision_allowed,
-            reasoning=reasoning
+            reasoning_facts=reasoning_facts
         )
     
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k best scores, best first, ties in apostle order.
+        np.partition finds the k-th score in O(N); only the scores at or
+        above it (ties included, so the pick stays deterministic) are sorted.
+        """
+        if len(scores) > k:
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order[:k]]
+    
     def _get_safest_apostle(self) -> str:
         """Get the apostle with highest current trust."""
-        safest = max(self.apostles.items(), key=lambda x: x[1].current_trust)
-        return safest[0]
+        return self._bases[int(np.argmax(self._trust))]
     
     def _is_collision_safe(self, selected: str, alternatives: List[str]) -> bool:
         """Check if collision mode is safe based on scars."""
         # Collision is safe if we have multiple viable alternatives
         return len(alternatives) >= 2
     
-    def _generate_reasoning(self, selected: str, alternatives: List[str], scores: Dict) -> str:
-        """Generate human-readable reasoning for the decision."""
-        apostle = self.apostles[selected]
-        
-        parts = [
-            f"Selected {selected} (trust: {apostle.current_trust:.2f})",
-            f"based on {apostle.scar_count} scars"
-        ]
-        
-        if apostle.banned_until:
-            parts.append(f"WARNING: {selected} was banned until {apostle.banned_until}")
-            
-        if alternatives:
-            parts.append(f"alternatives: {', '.join(alternatives)}")
-            
-        return " | ".join(parts)
-    
     def get_apostle_status(self) -> Dict[str, Dict]:
         """Get current status of all apostles."""
+        self._refresh_arrays()
+        usable = self._usable_mask(time.time_ns())
         return {
             basis: {
-                "trust": apostle.current_trust,
-                "scars": apostle.scar_count,
-                "banned": apostle.banned_until is not None,
-                "can_use": apostle.can_use()
+                "trust": float(self._trust[i]),
+                "scars": int(self._scars[i]),
+                "banned": bool(self._banned_ns[i]),
+                "can_use": bool(usable[i])
             }
-            for basis, apostle in self.apostles.items()
+            for i, basis in enumerate(self._bases)
         }
     
     async def record_interaction_result(
@@ -266,9 +481,6 @@ class CognitiveIntegrator:
         """
         if not success:
             # Create rejection scar
-            import uuid
-            from datetime import datetime
-            
             scar = OntologicalScar(
                 scar_id=uuid.uuid4(),
                 genesis_ref=self.genesis_hash,
@@ -294,8 +506,10 @@ class CognitiveIntegrator:
             scar_hash = scar.to_hash()
             proof = await self.chain.add_scar(scar_hash)
             
-            from dataclasses import replace
-            scar = replace(scar, chain_proof=proof, accumulator_value=self.chain.accumulator_value)
+            # The scar is not persisted yet, so attach the proof in place
+            # rather than copying it with dataclasses.replace
+            scar.chain_proof = proof
+            scar.accumulator_value = self.chain.accumulator_value
             
             return scar
             
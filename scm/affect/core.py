@@ -4,11 +4,31 @@ Affective Core для SCM.
 Эмоциональная окраска и настроение цифрового существа.
 """
 
+from collections import Counter, deque
 from enum import Enum
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-import math
+import hashlib
+import json
+
+import numpy as np
+
+# Опциональная JIT-компиляция горячего пути
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Без numba функции остаются обычным Python"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Опциональный быстрый некриптографический хеш
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 class Emotion(Enum):
     """Базовые эмоции"""
@@ -32,7 +52,7 @@ class Mood(Enum):
     SAD = "sad"                # -2
     DEPRESSED = "depressed"    # -3
 
-@dataclass
+@dataclass(slots=True)
 class EmotionalState:
     """Текущее эмоциональное состояние"""
     primary_emotion: Emotion
@@ -41,19 +61,204 @@ class EmotionalState:
     timestamp: datetime
     context: Dict
 
+# Порядковые номера эмоций для табличных валентностей
+EMOTION_INDEX: Dict[Emotion, int] = {e: i for i, e in enumerate(Emotion)}
+
+
+def _valence_table(values: Dict[Emotion, float]) -> np.ndarray:
+    """Таблица валентностей по EMOTION_INDEX (отсутствующие эмоции = 0)"""
+    table = np.zeros(len(EMOTION_INDEX))
+    for emotion, value in values.items():
+        table[EMOTION_INDEX[emotion]] = value
+    return table
+
+
+# Валентность для настроения
+MOOD_VALENCE = _valence_table({
+    Emotion.JOY: 1.0,
+    Emotion.TRUST: 0.7,
+    Emotion.SURPRISE: 0.3,
+    Emotion.NEUTRAL: 0.0,
+    Emotion.FEAR: -0.3,
+    Emotion.ANGER: -0.7,
+    Emotion.SADNESS: -1.0,
+    Emotion.DISGUST: -0.5,
+    Emotion.ANTICIPATION: 0.5
+})
+
+# Валентность для эмоциональной памяти
+MEMORY_VALENCE = _valence_table({
+    Emotion.JOY: 0.5,
+    Emotion.TRUST: 0.3,
+    Emotion.SURPRISE: 0.1,
+    Emotion.NEUTRAL: 0.0,
+    Emotion.FEAR: -0.2,
+    Emotion.ANGER: -0.4,
+    Emotion.SADNESS: -0.5,
+    Emotion.DISGUST: -0.3
+})
+
+# Валентность для стабильности (без ANTICIPATION)
+STABILITY_VALENCE = _valence_table({
+    Emotion.JOY: 1.0, Emotion.TRUST: 0.7, Emotion.SURPRISE: 0.3,
+    Emotion.NEUTRAL: 0.0, Emotion.FEAR: -0.3, Emotion.ANGER: -0.7,
+    Emotion.SADNESS: -1.0, Emotion.DISGUST: -0.5
+})
+
+
+# Первичная эмоция по типу опыта (простая эвристика для демо)
+EXPERIENCE_EMOTION: Dict[str, Emotion] = {
+    'praise': Emotion.JOY,
+    'insult': Emotion.ANGER,
+    'loss': Emotion.SADNESS,
+    'threat': Emotion.FEAR,
+    'novelty': Emotion.SURPRISE,
+}
+
+
+# Пороги валентности между настроениями, по возрастанию
+MOOD_THRESHOLDS = np.array([-0.8, -0.4, -0.1, 0.1, 0.4, 0.8])
+# Настроение по числу пройденных порогов
+MOODS_BY_RANK = (
+    Mood.DEPRESSED, Mood.SAD, Mood.ANNOYED, Mood.CALM,
+    Mood.PLEASED, Mood.HAPPY, Mood.ECSTATIC
+)
+
+
+@njit(cache=True)
+def _update_core(recent_sum, recent_count, current, thresholds):
+    """
+    Числовое ядро обновления настроения.
+    Смешивает среднюю валентность последних состояний с текущей
+    и возвращает (валентность, ранг настроения в MOODS_BY_RANK).
+    Ранг = число порогов строго ниже валентности.
+    """
+    if recent_count > 0:
+        combined = (recent_sum / recent_count) * 0.7 + current * 0.3
+    else:
+        combined = current
+    return combined, np.searchsorted(thresholds, combined)
+
+
+def _ctx_key(context: Dict) -> int:
+    """
+    Стабильный 64-битный ключ контекста.
+    Не зависит от порядка ключей словаря, в отличие от str(dict).
+    Ключи разных типов (json не может их сортировать) - через
+    отсортированный repr пар.
+    """
+    try:
+        data = json.dumps(context, sort_keys=True, separators=(',', ':'),
+                          ensure_ascii=False, default=str).encode()
+    except TypeError:
+        data = repr(sorted(context.items(), key=repr)).encode()
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
 class AffectCore:
     """
     Ядро аффективной системы.
     Отслеживает эмоции и настроение на основе опыта.
     """
     
+    _core_warmed = False
+    
     def __init__(self, anchor_hash: str):
+        if not AffectCore._core_warmed:
+            # Первый вызов компилирует ядро (если есть numba)
+            _update_core(0.0, 1, 0.0, MOOD_THRESHOLDS)
+            AffectCore._core_warmed = True
+            
         self.anchor_hash = anchor_hash
         self.current_mood = Mood.CALM
         self.emotional_history: List[EmotionalState] = []
-        self.emotional_memory: Dict[str, float] = {}  # контекст -> валентность
+        self.emotional_memory: Dict[int, float] = {}  # ключ контекста -> валентность
         self.mood_decay_rate = 0.1  # скорость затухания эмоций
         
+        # История в виде массивов (номер эмоции, интенсивность),
+        # буфер удваивается при переполнении
+        self._hist_emotion_ix = np.zeros(1024, dtype=np.int8)
+        self._hist_intensity = np.zeros(1024)
+        self._hist_len = 0
+        
+        # Скользящие окна: 10 валентностей настроения с суммой
+        # и 100 эмоций со счетчиками
+        self._recent10: deque = deque(maxlen=10)
+        self._sum_valence10 = 0.0
+        self._recent100: deque = deque(maxlen=100)
+        self._recent100_counts: Counter = Counter()
+        
+    def to_dict(self) -> Dict:
+        """Снимок состояния для JSON; массивы и окна пересчитываются при загрузке"""
+        return {
+            'anchor_hash': self.anchor_hash,
+            'current_mood': self.current_mood.value,
+            'mood_decay_rate': self.mood_decay_rate,
+            'emotional_history': [
+                {
+                    'primary': s.primary_emotion.value,
+                    'secondary': s.secondary_emotion.value,
+                    'intensity': s.intensity,
+                    'timestamp': s.timestamp.isoformat(),
+                    'context': s.context
+                }
+                for s in self.emotional_history
+            ],
+            # Ключи - целые числа, в JSON храним парами
+            'emotional_memory': [[k, v] for k, v in self.emotional_memory.items()]
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AffectCore":
+        """Восстанавливает ядро из снимка to_dict()"""
+        core = cls(data['anchor_hash'])
+        core.current_mood = Mood(data['current_mood'])
+        core.mood_decay_rate = data['mood_decay_rate']
+        for item in data['emotional_history']:
+            state = EmotionalState(
+                primary_emotion=Emotion(item['primary']),
+                secondary_emotion=Emotion(item['secondary']),
+                intensity=item['intensity'],
+                timestamp=datetime.fromisoformat(item['timestamp']),
+                context=item['context']
+            )
+            core.emotional_history.append(state)
+            core._push_history(state)
+        core.emotional_memory = {int(k): v for k, v in data['emotional_memory']}
+        return core
+        
+    def _push_history(self, state: EmotionalState):
+        """Добавляет состояние в массивы истории"""
+        if self._hist_len == len(self._hist_intensity):
+            self._hist_emotion_ix = np.resize(self._hist_emotion_ix, self._hist_len * 2)
+            self._hist_intensity = np.resize(self._hist_intensity, self._hist_len * 2)
+        self._hist_emotion_ix[self._hist_len] = EMOTION_INDEX[state.primary_emotion]
+        self._hist_intensity[self._hist_len] = state.intensity
+        self._hist_len += 1
+        
+        valence = MOOD_VALENCE[EMOTION_INDEX[state.primary_emotion]] * state.intensity
+        if len(self._recent10) == self._recent10.maxlen:
+            self._sum_valence10 -= self._recent10[0]
+        self._recent10.append(valence)
+        self._sum_valence10 += valence
+        
+        emotion = state.primary_emotion.value
+        if len(self._recent100) == self._recent100.maxlen:
+            evicted = self._recent100[0]
+            self._recent100_counts[evicted] -= 1
+            if not self._recent100_counts[evicted]:
+                del self._recent100_counts[evicted]
+        self._recent100.append(emotion)
+        self._recent100_counts[emotion] += 1
+        
+    def _recent_valences(self, table: np.ndarray, count: int) -> np.ndarray:
+        """Валентности последних count состояний по таблице"""
+        start = max(0, self._hist_len - count)
+        ix = self._hist_emotion_ix[start:self._hist_len]
+        return table[ix] * self._hist_intensity[start:self._hist_len]
+        
     def process_experience(self, experience: Dict) -> EmotionalState:
         """
         Обрабатывает новый опыт и генерирует эмоциональную реакцию.
@@ -64,14 +269,17 @@ class AffectCore:
         Returns:
             EmotionalState - эмоциональное состояние
         """
+        # Ключ контекста считаем один раз
+        context_key = _ctx_key(experience.get('context', {}))
+        
         # Определяем первичную эмоцию на основе типа опыта
         primary = self._map_experience_to_emotion(experience)
         
         # Определяем вторичную эмоцию (связанную с памятью)
-        secondary = self._get_associated_emotion(experience)
+        secondary = self._get_associated_emotion(context_key)
         
         # Вычисляем интенсивность
-        intensity = self._calculate_intensity(experience)
+        intensity = self._calculate_intensity(experience, context_key)
         
         # Создаем состояние
         state = EmotionalState(
@@ -84,36 +292,22 @@ class AffectCore:
         
         # Сохраняем в историю
         self.emotional_history.append(state)
+        self._push_history(state)
         
         # Обновляем настроение
         self._update_mood(state)
         
         # Сохраняем в эмоциональную память
-        self._update_emotional_memory(state)
+        self._update_emotional_memory(state, context_key)
         
         return state
     
     def _map_experience_to_emotion(self, experience: Dict) -> Emotion:
         """Маппинг опыта на базовые эмоции"""
-        exp_type = experience.get('type', '')
-        
-        # Простая эвристика для демо
-        if exp_type == 'praise':
-            return Emotion.JOY
-        elif exp_type == 'insult':
-            return Emotion.ANGER
-        elif exp_type == 'loss':
-            return Emotion.SADNESS
-        elif exp_type == 'threat':
-            return Emotion.FEAR
-        elif exp_type == 'novelty':
-            return Emotion.SURPRISE
-        else:
-            return Emotion.NEUTRAL
+        return EXPERIENCE_EMOTION.get(experience.get('type', ''), Emotion.NEUTRAL)
     
-    def _get_associated_emotion(self, experience: Dict) -> Emotion:
+    def _get_associated_emotion(self, context_key: int) -> Emotion:
         """Получает связанную эмоцию из памяти"""
-        context_key = str(experience.get('context', {}))
         valence = self.emotional_memory.get(context_key, 0.0)
         
         if valence > 0.3:
@@ -123,12 +317,11 @@ class AffectCore:
         else:
             return Emotion.NEUTRAL
     
-    def _calculate_intensity(self, experience: Dict) -> float:
+    def _calculate_intensity(self, experience: Dict, context_key: int) -> float:
         """Вычисляет интенсивность эмоции"""
         base_intensity = experience.get('intensity', 0.5)
         
         # Усиливаем если похожий опыт уже был
-        context_key = str(experience.get('context', {}))
         memory_valence = abs(self.emotional_memory.get(context_key, 0.0))
         
         intensity = min(1.0, base_intensity + memory_valence * 0.3)
@@ -136,65 +329,18 @@ class AffectCore:
     
     def _update_mood(self, state: EmotionalState):
         """Обновляет долгосрочное настроение"""
-        # Конвертируем эмоцию в числовую валентность
-        valence_map = {
-            Emotion.JOY: 1.0,
-            Emotion.TRUST: 0.7,
-            Emotion.SURPRISE: 0.3,
-            Emotion.NEUTRAL: 0.0,
-            Emotion.FEAR: -0.3,
-            Emotion.ANGER: -0.7,
-            Emotion.SADNESS: -1.0,
-            Emotion.DISGUST: -0.5,
-            Emotion.ANTICIPATION: 0.5
-        }
-        
-        current_valence = valence_map.get(state.primary_emotion, 0.0)
-        current_valence *= state.intensity
-        
-        # Усредняем с историей (последние 10 состояний)
-        if len(self.emotional_history) > 0:
-            recent = self.emotional_history[-10:]
-            avg_valence = sum(valence_map.get(s.primary_emotion, 0.0) * s.intensity 
-                            for s in recent) / len(recent)
-            
-            combined = (avg_valence * 0.7 + current_valence * 0.3)
-        else:
-            combined = current_valence
+        current = MOOD_VALENCE[EMOTION_INDEX[state.primary_emotion]] * state.intensity
+        _, rank = _update_core(
+            self._sum_valence10, len(self._recent10), current, MOOD_THRESHOLDS
+        )
         
         # Маппим валентность на настроение
-        if combined > 0.8:
-            self.current_mood = Mood.ECSTATIC
-        elif combined > 0.4:
-            self.current_mood = Mood.HAPPY
-        elif combined > 0.1:
-            self.current_mood = Mood.PLEASED
-        elif combined > -0.1:
-            self.current_mood = Mood.CALM
-        elif combined > -0.4:
-            self.current_mood = Mood.ANNOYED
-        elif combined > -0.8:
-            self.current_mood = Mood.SAD
-        else:
-            self.current_mood = Mood.DEPRESSED
+        self.current_mood = MOODS_BY_RANK[rank]
     
-    def _update_emotional_memory(self, state: EmotionalState):
+    def _update_emotional_memory(self, state: EmotionalState, context_key: int):
         """Обновляет эмоциональную память"""
-        context_key = str(state.context)
-        
         # Вычисляем валентность
-        valence_map = {
-            Emotion.JOY: 0.5,
-            Emotion.TRUST: 0.3,
-            Emotion.SURPRISE: 0.1,
-            Emotion.NEUTRAL: 0.0,
-            Emotion.FEAR: -0.2,
-            Emotion.ANGER: -0.4,
-            Emotion.SADNESS: -0.5,
-            Emotion.DISGUST: -0.3
-        }
-        
-        valence = valence_map.get(state.primary_emotion, 0.0) * state.intensity
+        valence = float(MEMORY_VALENCE[EMOTION_INDEX[state.primary_emotion]]) * state.intensity
         
         # Обновляем память (экспоненциальное затухание)
         if context_key in self.emotional_memory:
@@ -230,45 +376,41 @@ class AffectCore:
         if not self.emotional_history:
             return {}
         
-        # Статистика по эмоциям
-        emotion_counts = {}
-        for state in self.emotional_history[-100:]:  # последние 100
-            emotion = state.primary_emotion.value
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        total = len(self.emotional_history[-100:])
+        # Статистика по эмоциям (последние 100, счетчики ведутся на лету)
+        total = len(self._recent100)
         profile = {
             emotion: count/total 
-            for emotion, count in emotion_counts.items()
+            for emotion, count in self._recent100_counts.items()
         }
         
         return {
             'profile': profile,
-            'dominant': max(profile.items(), key=lambda x: x[1])[0] if profile else 'neutral',
+            'dominant': self._dominant_emotion(),
             'stability': self._calculate_stability()
         }
     
+    def _dominant_emotion(self) -> str:
+        """
+        Самая частая эмоция последних 100. При равенстве - та, что раньше
+        появилась в окне (как max по профилю в порядке появления);
+        окно просматривается только при равенстве.
+        """
+        counts = self._recent100_counts
+        if not counts:
+            return 'neutral'
+        top = max(counts.values())
+        leaders = [emotion for emotion, count in counts.items() if count == top]
+        if len(leaders) == 1:
+            return leaders[0]
+        return next(emotion for emotion in self._recent100 if counts[emotion] == top)
+    
     def _calculate_stability(self) -> float:
         """Вычисляет эмоциональную стабильность"""
-        if len(self.emotional_history) < 10:
+        if self._hist_len < 10:
             return 1.0
         
-        recent = self.emotional_history[-10:]
-        valences = []
-        
-        valence_map = {
-            Emotion.JOY: 1.0, Emotion.TRUST: 0.7, Emotion.SURPRISE: 0.3,
-            Emotion.NEUTRAL: 0.0, Emotion.FEAR: -0.3, Emotion.ANGER: -0.7,
-            Emotion.SADNESS: -1.0, Emotion.DISGUST: -0.5
-        }
-        
-        for state in recent:
-            valences.append(valence_map.get(state.primary_emotion, 0.0) * state.intensity)
-        
         # Стабильность = 1 - стандартное отклонение
-        mean = sum(valences) / len(valences)
-        variance = sum((v - mean) ** 2 for v in valences) / len(valences)
-        std_dev = math.sqrt(variance)
+        std_dev = float(self._recent_valences(STABILITY_VALENCE, 10).std())
         
         stability = max(0.0, 1.0 - std_dev)
         return round(stability, 2)
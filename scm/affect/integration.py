@@ -3,9 +3,53 @@
 Интеграция аффективной системы с основным ядром SCM
 """
 
+import bisect
+import time
 from typing import Optional
-from datetime import datetime
-from scm.affect.core import AffectCore, Emotion, Mood
+from scm.affect.core import AffectCore, Emotion, Mood, EMOTION_INDEX
+
+# Ответы по эмоциям, от слабой интенсивности к сильной
+_RESPONSES_BY_EMOTION = {
+    Emotion.JOY: (
+        "Отлично! Мне это нравится!",
+        "Замечательно! Продолжай в том же духе!",
+        "Это вызывает у меня радость!"
+    ),
+    Emotion.ANGER: (
+        "Это меня раздражает...",
+        "Я недоволен этим.",
+        "Мне это не нравится."
+    ),
+    Emotion.SADNESS: (
+        "Это печально...",
+        "Мне грустно от этого.",
+        "Это расстраивает меня."
+    ),
+    Emotion.FEAR: (
+        "Это пугает меня...",
+        "Я боюсь этого.",
+        "Мне страшно."
+    ),
+    Emotion.SURPRISE: (
+        "Ого! Неожиданно!",
+        "Вот это да!",
+        "Удивительно!"
+    ),
+    Emotion.NEUTRAL: (
+        "Понятно.",
+        "Хорошо.",
+        "Я понял."
+    ),
+}
+
+# Таблица по EMOTION_INDEX; эмоции без своих ответов получают нейтральные
+_RESPONSES = tuple(
+    _RESPONSES_BY_EMOTION.get(emotion, _RESPONSES_BY_EMOTION[Emotion.NEUTRAL])
+    for emotion in EMOTION_INDEX
+)
+
+# Границы интенсивности: < 0.4, < 0.7, остальное
+_INTENSITY_BUCKETS = (0.4, 0.7)
 
 class AffectiveSCM:
     """
@@ -18,6 +62,17 @@ class AffectiveSCM:
         self.affect = AffectCore(anchor_hash)
         self.accumulator = None  # будет инициализирован позже
         
+    def to_dict(self) -> dict:
+        """Снимок состояния для JSON"""
+        return {'anchor_hash': self.anchor_hash, 'affect': self.affect.to_dict()}
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "AffectiveSCM":
+        """Восстанавливает из снимка to_dict()"""
+        scm = cls(data['anchor_hash'])
+        scm.affect = AffectCore.from_dict(data['affect'])
+        return scm
+        
     def process_interaction(self, interaction: dict) -> dict:
         """
         Обрабатывает взаимодействие с учетом эмоций
@@ -27,6 +82,7 @@ class AffectiveSCM:
             
         Returns:
             Эмоциональный ответ и обновленное состояние
+            (timestamp - целое число наносекунд, без форматирования)
         """
         # 1. Получаем эмоциональную реакцию
         emotional_state = self.affect.process_experience(interaction)
@@ -45,46 +101,13 @@ class AffectiveSCM:
             },
             'mood': mood['mood'],
             'response': response,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': time.time_ns()  # UTC, наносекунды от эпохи
         }
     
     def _generate_response(self, state, mood) -> str:
         """Генерирует текстовый ответ на основе эмоций"""
-        responses = {
-            Emotion.JOY: [
-                "Отлично! Мне это нравится!",
-                "Замечательно! Продолжай в том же духе!",
-                "Это вызывает у меня радость!"
-            ],
-            Emotion.ANGER: [
-                "Это меня раздражает...",
-                "Я недоволен этим.",
-                "Мне это не нравится."
-            ],
-            Emotion.SADNESS: [
-                "Это печально...",
-                "Мне грустно от этого.",
-                "Это расстраивает меня."
-            ],
-            Emotion.FEAR: [
-                "Это пугает меня...",
-                "Я боюсь этого.",
-                "Мне страшно."
-            ],
-            Emotion.SURPRISE: [
-                "Ого! Неожиданно!",
-                "Вот это да!",
-                "Удивительно!"
-            ],
-            Emotion.NEUTRAL: [
-                "Понятно.",
-                "Хорошо.",
-                "Я понял."
-            ]
-        }
-        
-        emotion_responses = responses.get(state.primary_emotion, responses[Emotion.NEUTRAL])
-        idx = 0 if state.intensity < 0.4 else 1 if state.intensity < 0.7 else 2
+        emotion_responses = _RESPONSES[EMOTION_INDEX[state.primary_emotion]]
+        idx = bisect.bisect_right(_INTENSITY_BUCKETS, state.intensity)
         
         return emotion_responses[min(idx, len(emotion_responses) - 1)]
     
@@ -4,9 +4,10 @@ CLI команды для тестирования аффективной сис
 """
 
 import click
-import random
+import numpy as np
 from scm.affect.core import AffectCore
 from scm.affect.integration import AffectiveSCM
+from scm.cli.state import load_state, save_state
 
 @click.group()
 def affect():
@@ -18,6 +19,7 @@ def affect():
 def init(anchor):
     """Инициализирует аффективную систему для якоря"""
     scm = AffectiveSCM(anchor)
+    save_state('affect', anchor, scm)
     click.echo(f"🎭 Эмоциональная система инициализирована для {anchor}")
     click.echo(f"Текущее настроение: {scm.affect.current_mood.value}")
 
@@ -29,7 +31,7 @@ def init(anchor):
               help='Интенсивность (0.0-1.0)')
 def experience(anchor, type, intensity):
     """Добавляет опыт и показывает эмоциональную реакцию"""
-    scm = AffectiveSCM(anchor)
+    scm = load_state('affect', anchor) or AffectiveSCM(anchor)
     
     interaction = {
         'type': type,
@@ -38,6 +40,7 @@ def experience(anchor, type, intensity):
     }
     
     response = scm.process_interaction(interaction)
+    save_state('affect', anchor, scm)
     
     click.echo(f"\n📝 Опыт: {type} (интенсивность: {intensity})")
     click.echo(f"🎭 Эмоция: {response['emotional_state']['primary']} + {response['emotional_state']['secondary']}")
@@ -49,7 +52,7 @@ def experience(anchor, type, intensity):
 @click.argument('anchor')
 def status(anchor):
     """Показывает текущий эмоциональный статус"""
-    scm = AffectiveSCM(anchor)
+    scm = load_state('affect', anchor) or AffectiveSCM(anchor)
     status = scm.get_emotional_status()
     
     click.echo(f"\n📊 ЭМОЦИОНАЛЬНЫЙ СТАТУС для {anchor}")
@@ -66,16 +69,17 @@ def status(anchor):
 @click.option('--count', '-c', default=10, help='Количество случайных опытов')
 def simulate(anchor, count):
     """Симулирует серию случайных опытов"""
-    scm = AffectiveSCM(anchor)
+    scm = load_state('affect', anchor) or AffectiveSCM(anchor)
     
     types = ['praise', 'insult', 'loss', 'threat', 'novelty', 'neutral']
     
     click.echo(f"\n🎲 Симуляция {count} случайных опытов...")
     
-    for i in range(count):
-        exp_type = random.choice(types)
-        intensity = random.uniform(0.2, 1.0)
-        
+    # Все случайные величины одним вызовом, а не по одному на опыт
+    exp_types = np.random.choice(types, size=count).tolist()
+    intensities = np.random.uniform(0.2, 1.0, size=count).tolist()
+    
+    for i, (exp_type, intensity) in enumerate(zip(exp_types, intensities)):
         scm.process_interaction({
             'type': exp_type,
             'intensity': intensity,
@@ -85,6 +89,7 @@ def simulate(anchor, count):
         if (i + 1) % 10 == 0:
             click.echo(f"   Обработано {i + 1} опытов...")
     
+    save_state('affect', anchor, scm)
     status = scm.get_emotional_status()
     click.echo(f"\n✅ Симуляция завершена!")
     click.echo(f"😊 Финальное настроение: {status['current_mood']['mood']}")
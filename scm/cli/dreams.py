@@ -7,6 +7,21 @@ import click
 import random
 from datetime import datetime
 from scm.dreams.core import DreamEngine, DreamType
+from scm.cli.state import load_state, save_state
+
+# Эмодзи для типа сна
+_TYPE_EMOJI = {
+    'consolidation': '📚',
+    'processing': '🔄',
+    'creative': '🎨',
+    'prophetic': '🔮',
+    'nightmare': '😱',
+    'lucid': '✨'
+}
+
+# Случайные опыты и травмы для тестовых снов
+_EXPERIENCE_TYPES = ('praise', 'insult', 'loss', 'novelty')
+_TRAUMA_EMOTIONS = ('anger', 'fear', 'sadness')
 
 @click.group()
 def dreams():
@@ -18,6 +33,7 @@ def dreams():
 def init(anchor):
     """Инициализирует Dream Engine"""
     engine = DreamEngine(anchor)
+    save_state('dreams', anchor, engine)
     click.echo(f"😴 Dream Engine инициализирован для {anchor}")
     click.echo(f"📚 Символов в библиотеке: {len(engine.symbol_library)}")
 
@@ -26,11 +42,11 @@ def init(anchor):
 @click.option('--traumas', '-t', default=0, help='Количество травм')
 def dream(anchor, traumas):
     """Генерирует случайное сновидение"""
-    engine = DreamEngine(anchor)
+    engine = load_state('dreams', anchor) or DreamEngine(anchor)
     
     # Создаем тестовые данные
     recent = [
-        {'type': random.choice(['praise', 'insult', 'loss', 'novelty']),
+        {'type': random.choice(_EXPERIENCE_TYPES),
          'intensity': random.uniform(0.3, 1.0),
          'context': {'source': 'cli'}}
         for _ in range(3)
@@ -39,13 +55,14 @@ def dream(anchor, traumas):
     emotional = {'valence': random.uniform(-1, 1)}
     
     traumas_list = [
-        {'emotion': random.choice(['anger', 'fear', 'sadness']),
+        {'emotion': random.choice(_TRAUMA_EMOTIONS),
          'intensity': random.uniform(0.5, 1.0)}
         for _ in range(traumas)
     ]
     
     # Генерируем сон
     dream = engine.generate_dream(recent, emotional, traumas_list)
+    save_state('dreams', anchor, engine)
     
     # Выводим результат
     click.echo(f"\n😴 СНОВИДЕНИЕ #{dream.id}")
@@ -72,40 +89,29 @@ def dream(anchor, traumas):
 @click.option('--count', '-c', default=7, help='Количество ночей')
 def week(anchor, count):
     """Симулирует неделю сновидений"""
-    engine = DreamEngine(anchor)
+    engine = load_state('dreams', anchor) or DreamEngine(anchor)
     
     click.echo(f"\n📅 Симуляция {count} ночей...")
     
-    for night in range(1, count + 1):
-        # Каждую ночь разный эмоциональный фон
-        emotional = {'valence': random.uniform(-0.5, 0.5)}
-        traumas = random.randint(0, 3)
-        
-        dream = engine.generate_dream(
-            [{'type': 'daily', 'intensity': 0.5}],
-            emotional,
-            [{'emotion': 'fear'}] * traumas
-        )
-        
-        # Консолидируем память
-        engine.consolidate_memory({})
-        
-        # Эмодзи для типа сна
-        type_emoji = {
-            'consolidation': '📚',
-            'processing': '🔄',
-            'creative': '🎨',
-            'prophetic': '🔮',
-            'nightmare': '😱',
-            'lucid': '✨'
-        }
-        
-        emoji = type_emoji.get(dream.type.value, '😴')
+    # Каждую ночь разный эмоциональный фон и число травм
+    emotional_states = [{'valence': random.uniform(-0.5, 0.5)} for _ in range(count)]
+    traumas_per_night = [[{'emotion': 'fear'}] * random.randint(0, 3) for _ in range(count)]
+    
+    # Сны с консолидацией памяти после каждого
+    dreams_out = engine.generate_dreams_batch(
+        [{'type': 'daily', 'intensity': 0.5}],
+        emotional_states,
+        traumas_per_night
+    )
+    
+    for night, dream in enumerate(dreams_out, start=1):
+        emoji = _TYPE_EMOJI.get(dream.type.value, '😴')
         
         click.echo(f"Ночь {night:2}: {emoji} {dream.type.value:15} "
                   f"| символы: {len(dream.symbols)} "
                   f"| консолидация: {dream.consolidation_rate:.0%}")
     
+    save_state('dreams', anchor, engine)
     stats = engine.get_dream_stats()
     click.echo(f"\n📊 Статистика за {count} ночей:")
     click.echo(f"   Всего снов: {stats['total_dreams']}")
@@ -116,7 +122,7 @@ def week(anchor, count):
 @click.argument('anchor')
 def symbols(anchor):
     """Показывает популярные символы"""
-    engine = DreamEngine(anchor)
+    engine = load_state('dreams', anchor) or DreamEngine(anchor)
     stats = engine.get_dream_stats()
     
     click.echo(f"\n🔣 ПОПУЛЯРНЫЕ СИМВОЛЫ:")
@@ -133,7 +139,7 @@ def symbols(anchor):
 @click.argument('anchor')
 def stats(anchor):
     """Показывает статистику сновидений"""
-    engine = DreamEngine(anchor)
+    engine = load_state('dreams', anchor) or DreamEngine(anchor)
     stats = engine.get_dream_stats()
     
     if stats['total_dreams'] == 0:
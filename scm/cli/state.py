@@ -0,0 +1,55 @@
+﻿# scm/cli/state.py
+"""
+Состояние CLI между вызовами команд.
+Объекты (AffectiveSCM, DreamEngine) сохраняются JSON-снимком по якорю
+в пользовательском кэше, чтобы результаты одной команды были видны в следующей.
+Pickle не используется: загрузка кэша не должна исполнять код.
+"""
+
+import json
+import os
+import re
+from typing import Any, Optional
+
+from scm.affect.integration import AffectiveSCM
+from scm.dreams.core import DreamEngine
+
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'scm'
+)
+
+# Вид состояния -> класс с to_dict()/from_dict()
+_KINDS = {
+    'affect': AffectiveSCM,
+    'dreams': DreamEngine,
+}
+
+
+def _state_path(kind: str, anchor: str) -> str:
+    """Путь к файлу состояния; якорь приводится к безопасному имени"""
+    safe_anchor = re.sub(r'[^\w.-]', '_', anchor)
+    return os.path.join(CACHE_DIR, f"{kind}_{safe_anchor}.json")
+
+
+def load_state(kind: str, anchor: str) -> Optional[Any]:
+    """Загружает сохраненный объект или None, если его нет или он поврежден"""
+    path = _state_path(kind, anchor)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return _KINDS[kind].from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        # Нечитаемый, испорченный или устаревший снимок - начинаем с чистого состояния
+        return None
+
+
+def save_state(kind: str, anchor: str, obj: Any):
+    """Сохраняет снимок объекта атомарно (через временный файл)"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _state_path(kind, anchor)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj.to_dict(), f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
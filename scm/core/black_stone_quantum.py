@@ -20,24 +20,40 @@ class QuantumDeathProtocol:
     def __init__(self, anchor_hash: str):
         self.anchor_hash = anchor_hash
         self.share_status = {i: True for i in range(1, 6)}  # 1-5, True = available
+        self._available_count = sum(self.share_status.values())  # True == 1
         self.death_level = 1  # SOFT по умолчанию (все shares есть)
+        # Журнал открывается при первом событии и держится открытым до close()
+        self._log_fh = None
         self._update_death_level()
     
+    def close(self):
+        """Flush and close the death event log"""
+        log_fh = getattr(self, '_log_fh', None)
+        if log_fh is not None and not log_fh.closed:
+            log_fh.close()
+    
+    def __del__(self):
+        self.close()
+    
     def report_share_loss(self, share_index: int):
         """Report that a share has been lost"""
         if 1 <= share_index <= 5:
+            if self.share_status[share_index]:
+                self._available_count -= 1
             self.share_status[share_index] = False
             self._update_death_level()
     
     def report_share_recovered(self, share_index: int):
         """Report that a share has been recovered"""
         if 1 <= share_index <= 5:
+            if not self.share_status[share_index]:
+                self._available_count += 1
             self.share_status[share_index] = True
             self._update_death_level()
     
     def _update_death_level(self):
         """Update death level based on available shares"""
-        available = sum(1 for v in self.share_status.values() if v)
+        available = self._available_count
         
         if available >= 4:
             self.death_level = self.DEATH_LEVELS['SOFT']      # 4-5 shares: SOFT
@@ -52,7 +68,7 @@ class QuantumDeathProtocol:
     
     def _log_death_event(self):
         """Log death event"""
-        available = sum(1 for v in self.share_status.values() if v)
+        available = self._available_count
         event = {
             'timestamp': datetime.utcnow().isoformat(),
             'anchor': self.anchor_hash,
@@ -61,21 +77,26 @@ class QuantumDeathProtocol:
             'threshold': 3
         }
         
-        with open('BLACKSTONE.md', 'a') as f:
-            f.write(f"\n## Quantum Death Event: {event['timestamp']}\n")
-            f.write(f"- Anchor: {event['anchor']}\n")
-            f.write(f"- Level: {event['death_level']}\n")
-            f.write(f"- Available shares: {event['available_shares']}/5\n")
-            f.write(f"- Threshold: {event['threshold']}\n")
+        if self._log_fh is None:
+            self._log_fh = open('BLACKSTONE.md', 'a')
+        self._log_fh.write(
+            f"\n## Quantum Death Event: {event['timestamp']}\n"
+            f"- Anchor: {event['anchor']}\n"
+            f"- Level: {event['death_level']}\n"
+            f"- Available shares: {event['available_shares']}/5\n"
+            f"- Threshold: {event['threshold']}\n"
+        )
+        # Событие не должно теряться при аварийном завершении
+        self._log_fh.flush()
     
     def can_recover(self) -> bool:
         """Check if entity can still be recovered"""
-        available = sum(1 for v in self.share_status.values() if v)
+        available = self._available_count
         return available >= 3  # Можно восстановить если есть минимум 3 shares
     
     def get_status(self) -> Dict:
         """Get current status"""
-        available = sum(1 for v in self.share_status.values() if v)
+        available = self._available_count
         return {
             'anchor': self.anchor_hash,
             'death_level': self.death_level,
@@ -6,17 +6,31 @@ Combines Ed25519 (classical) with CRYSTALS-Dilithium5 (post-quantum).
 
 import hashlib
 import os
-from typing import Tuple, Dict, Any
+from functools import lru_cache
+from typing import Tuple, Dict, Any, Optional, Sequence
 
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 from cryptography.exceptions import InvalidSignature
 
-# Post-quantum crypto - используем заглушку
+# Post-quantum crypto: liboqs (AVX2 Keccak), затем pqcrypto, иначе заглушка.
+# DILITHIUM5_SCHEME хранится с ключами: подписи разных схем несовместимы
 try:
-    import pqcrypto.sign.dilithium5 as dilithium5
+    from scm.crypto.oqs_dilithium import dilithium5, SCHEME as DILITHIUM5_SCHEME
 except ImportError:
-    from scm.crypto.pqcrypto_stub import dilithium5
+    try:
+        import pqcrypto.sign.dilithium5 as dilithium5
+        DILITHIUM5_SCHEME = "Dilithium5"
+    except ImportError:
+        from scm.crypto.pqcrypto_stub import dilithium5
+        DILITHIUM5_SCHEME = "Dilithium5-stub"
+
+
+@lru_cache(maxsize=256)
+def _load_ed_public(public_bytes: bytes) -> ed25519.Ed25519PublicKey:
+    """Parsed Ed25519 public key, shared by key pairs with the same bytes"""
+    return ed25519.Ed25519PublicKey.from_public_bytes(public_bytes)
+
 
 class HybridKeyPair:
     """Container for hybrid key pair (Ed25519 + Dilithium5)"""
@@ -27,23 +41,76 @@ class HybridKeyPair:
         self.ed25519_public = ed25519_public
         self.dilithium5_private = dilithium5_private
         self.dilithium5_public = dilithium5_public
+        self._anchor_hash: Optional[str] = None
+        # Parsed Ed25519 key objects, created on first sign/verify
+        self._ed_private_key: Optional[ed25519.Ed25519PrivateKey] = None
+        self._ed_public_key: Optional[ed25519.Ed25519PublicKey] = None
+        self._public_only: Optional['HybridKeyPair'] = None
+        
+    def ed25519_private_key(self) -> ed25519.Ed25519PrivateKey:
+        """Ed25519 private key object, parsed once"""
+        if self._ed_private_key is None:
+            self._ed_private_key = ed25519.Ed25519PrivateKey.from_private_bytes(
+                self.ed25519_private
+            )
+        return self._ed_private_key
+        
+    def ed25519_public_key(self) -> ed25519.Ed25519PublicKey:
+        """Ed25519 public key object, parsed once"""
+        if self._ed_public_key is None:
+            self._ed_public_key = _load_ed_public(bytes(self.ed25519_public))
+        return self._ed_public_key
+        
+    def public_only(self) -> 'HybridKeyPair':
+        """
+        Key pair without private keys (created once). Shares the anchor
+        hash and parsed public key already computed on this pair.
+        """
+        if self._public_only is None:
+            public = HybridKeyPair(
+                ed25519_private=None,
+                ed25519_public=self.ed25519_public,
+                dilithium5_private=None,
+                dilithium5_public=self.dilithium5_public
+            )
+            public._anchor_hash = self._anchor_hash
+            public._ed_public_key = self._ed_public_key
+            self._public_only = public
+        return self._public_only
+        
+    @property
+    def anchor_hash(self) -> str:
+        """Genesis anchor hash of the public keys"""
+        return self._compute_anchor_hash()
         
     def to_dict(self) -> Dict[str, Any]:
         """Export public keys as dict for storage"""
         return {
             'ed25519_public': self.ed25519_public.hex(),
             'dilithium5_public': self.dilithium5_public.hex(),
+            'dilithium5_scheme': DILITHIUM5_SCHEME,
             'anchor_hash': self._compute_anchor_hash()
         }
     
     def _compute_anchor_hash(self) -> str:
-        """Compute genesis anchor hash from both public keys"""
-        combined = self.ed25519_public + self.dilithium5_public
-        return hashlib.sha256(combined).hexdigest()[:16]
+        """Compute genesis anchor hash from both public keys (cached)"""
+        if self._anchor_hash is None:
+            combined = self.ed25519_public + self.dilithium5_public
+            self._anchor_hash = hashlib.sha256(combined).hexdigest()[:16]
+        return self._anchor_hash
         
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'HybridKeyPair':
-        """Recreate from dict (public keys only)"""
+        """
+        Recreate from dict (public keys only). Keys recorded under another
+        Dilithium scheme than the active backend are rejected, since none
+        of their signatures would verify.
+        """
+        scheme = data.get('dilithium5_scheme')
+        if scheme is not None and scheme != DILITHIUM5_SCHEME:
+            raise ValueError(
+                f"Keys use {scheme}, but the active Dilithium backend is {DILITHIUM5_SCHEME}"
+            )
         return cls(
             ed25519_private=None,
             ed25519_public=bytes.fromhex(data['ed25519_public']),
@@ -86,10 +153,7 @@ def generate_hybrid_keypair() -> HybridKeyPair:
 def hybrid_sign(message: bytes, hybrid_keypair: HybridKeyPair) -> Tuple[bytes, bytes]:
     """Sign message with both algorithms"""
     # Ed25519 sign
-    ed_private = ed25519.Ed25519PrivateKey.from_private_bytes(
-        hybrid_keypair.ed25519_private
-    )
-    ed_sig = ed_private.sign(message)
+    ed_sig = hybrid_keypair.ed25519_private_key().sign(message)
     
     # Dilithium5 sign
     dil_sig = dilithium5.sign(hybrid_keypair.dilithium5_private, message)
@@ -104,17 +168,40 @@ def hybrid_verify(message: bytes,
     """Verify both signatures"""
     # Verify Ed25519
     try:
-        ed_public = ed25519.Ed25519PublicKey.from_public_bytes(
-            hybrid_public.ed25519_public
-        )
-        ed_public.verify(ed_sig, message)
+        hybrid_public.ed25519_public_key().verify(ed_sig, message)
     except InvalidSignature:
         return False
     
-    # Verify Dilithium5
+    # Verify Dilithium5 (backends either raise or return False)
     try:
-        dilithium5.verify(hybrid_public.dilithium5_public, message, dil_sig)
-        return True
+        return dilithium5.verify(hybrid_public.dilithium5_public, message, dil_sig) is not False
+    except Exception:
+        return False
+
+
+def hybrid_verify_batch(messages: Sequence[bytes],
+                        ed_sigs: Sequence[bytes],
+                        dil_sigs: Sequence[bytes],
+                        hybrid_publics: Sequence[HybridKeyPair]) -> bool:
+    """
+    Verify many hybrid signatures; True only if every one is valid.
+    All Ed25519 signatures are checked before any Dilithium5 one, so a
+    bad batch is rejected on the cheap classical pass.
+    """
+    if not len(messages) == len(ed_sigs) == len(dil_sigs) == len(hybrid_publics):
+        raise ValueError("Batch inputs must have the same length")
+    
+    try:
+        for message, ed_sig, public in zip(messages, ed_sigs, hybrid_publics):
+            public.ed25519_public_key().verify(ed_sig, message)
+    except InvalidSignature:
+        return False
+    
+    try:
+        return all(
+            dilithium5.verify(public.dilithium5_public, message, dil_sig) is not False
+            for message, dil_sig, public in zip(messages, dil_sigs, hybrid_publics)
+        )
     except Exception:
         return False
 
@@ -129,6 +216,7 @@ def create_hybrid_proof(message: bytes, hybrid_keypair: HybridKeyPair) -> Dict[s
         'dilithium5_signature': dil_sig.hex(),
         'ed25519_public': hybrid_keypair.ed25519_public.hex(),
         'dilithium5_public': hybrid_keypair.dilithium5_public.hex(),
+        'dilithium5_scheme': DILITHIUM5_SCHEME,
         'anchor_hash': hybrid_keypair._compute_anchor_hash()
     }
 
@@ -0,0 +1,94 @@
+﻿# scm/crypto/oqs_dilithium.py
+"""
+Dilithium5 через liboqs (oqs.Signature) с интерфейсом pqcrypto:
+keypair() -> (public, private), sign(private, message), verify(public, message, signature).
+Сборка liboqs с AVX2 считает SHAKE в 4 потока (KeccakP1600times4).
+
+В liboqs >= 0.13 остался только ML-DSA-87 (FIPS 204). Он несовместим
+по ключам и подписям с Dilithium5 третьего раунда (pqcrypto), поэтому
+используется лишь при явном SCM_ALLOW_ML_DSA_87=1. Иначе модуль бросает
+ImportError, и hybrid.py берет следующий backend.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import oqs
+except (ImportError, RuntimeError, OSError, SystemExit) as exc:
+    # Без разделяемой liboqs импорт пытается собрать ее сам и при неудаче
+    # бросает RuntimeError или вызывает sys.exit
+    raise ImportError(f"liboqs is unavailable: {exc}") from exc
+
+if "Dilithium5" in oqs.get_enabled_sig_mechanisms():
+    _MECHANISM = "Dilithium5"
+elif os.environ.get("SCM_ALLOW_ML_DSA_87") == "1":
+    _MECHANISM = "ML-DSA-87"
+else:
+    raise ImportError(
+        "liboqs has no Dilithium5; set SCM_ALLOW_ML_DSA_87=1 to use ML-DSA-87 "
+        "(its keys and signatures are not compatible with Dilithium5)"
+    )
+
+# Схема подписи, записывается вместе с якорем
+SCHEME = _MECHANISM
+
+
+# Объекты oqs.Signature держат буферы liboqs - свои на каждый поток
+_local = threading.local()
+
+# Сколько ключей подписи держит один поток
+_SIGNERS_PER_THREAD = 4
+
+
+def _signer(private_key: bytes) -> oqs.Signature:
+    """
+    Объект подписи для ключа в текущем потоке, создается один раз.
+    Хранится в _local и уходит вместе с потоком; вытесненный объект
+    освобождается через free(), стирая копию секретного ключа в liboqs.
+    """
+    signers = getattr(_local, "signers", None)
+    if signers is None:
+        signers = _local.signers = OrderedDict()
+    signer = signers.get(private_key)
+    if signer is not None:
+        signers.move_to_end(private_key)
+        return signer
+    signer = signers[private_key] = oqs.Signature(_MECHANISM, secret_key=private_key)
+    if len(signers) > _SIGNERS_PER_THREAD:
+        _, evicted = signers.popitem(last=False)
+        evicted.free()
+    return signer
+
+
+def _verifier() -> oqs.Signature:
+    """Объект проверки потока: verify не зависит от секретного ключа"""
+    verifier = getattr(_local, "verifier", None)
+    if verifier is None:
+        verifier = _local.verifier = oqs.Signature(_MECHANISM)
+    return verifier
+
+
+class OQSDilithium5:
+    """Dilithium5 поверх liboqs"""
+
+    def keypair(self):
+        """Генерирует пару ключей"""
+        with oqs.Signature(_MECHANISM) as sig:
+            public_key = sig.generate_keypair()
+            private_key = sig.export_secret_key()
+        return public_key, private_key
+
+    def sign(self, private_key, message):
+        """Подписывает сообщение"""
+        return _signer(bytes(private_key)).sign(message)
+
+    def verify(self, public_key, message, signature):
+        """Проверяет подпись; как pqcrypto, бросает исключение при неверной"""
+        if not _verifier().verify(message, signature, public_key):
+            raise ValueError("Invalid Dilithium5 signature")
+        return True
+
+# Экземпляр для импорта
+dilithium5 = OQSDilithium5()
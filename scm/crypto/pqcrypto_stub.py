@@ -5,6 +5,7 @@ Dilithium5: public_key=1312 bytes, private_key=2528 bytes
 """
 
 import hashlib
+import hmac
 import os
 
 class Dilithium5Stub:
@@ -20,36 +21,23 @@ class Dilithium5Stub:
         """Генерирует ключи правильного размера"""
         seed = os.urandom(32)
         
-        # Генерируем публичный ключ (1312 байт)
-        public_key = b''
-        while len(public_key) < Dilithium5Stub.PUBLIC_KEY_SIZE:
-            seed = hashlib.sha256(seed).digest()
-            public_key += hashlib.sha512(seed).digest()
-        public_key = public_key[:Dilithium5Stub.PUBLIC_KEY_SIZE]
-        
-        # Генерируем приватный ключ (2528 байт)
-        private_key = b''
-        while len(private_key) < Dilithium5Stub.PRIVATE_KEY_SIZE:
-            seed = hashlib.sha256(seed).digest()
-            private_key += hashlib.sha512(seed).digest()
-        private_key = private_key[:Dilithium5Stub.PRIVATE_KEY_SIZE]
+        # Оба ключа (1312 + 2528 байт) одним вызовом SHAKE256
+        buf = hashlib.shake_256(seed).digest(
+            Dilithium5Stub.PUBLIC_KEY_SIZE + Dilithium5Stub.PRIVATE_KEY_SIZE - 32
+        )
+        public_key = buf[:Dilithium5Stub.PUBLIC_KEY_SIZE]
+        # Приватный ключ начинается с тех же 32 байт, что и публичный:
+        # sign и verify хешируют именно их, иначе подпись не проверяется
+        private_key = public_key[:32] + buf[Dilithium5Stub.PUBLIC_KEY_SIZE:]
         
         return public_key, private_key
     
     @staticmethod
     def sign(private_key, message):
         """Создает подпись правильного размера"""
-        # Комбинируем ключ и сообщение
+        # Комбинируем ключ и сообщение, подпись 2420 байт - один вызов SHAKE256
         data = private_key[:32] + message
-        signature = b''
-        
-        # Генерируем подпись размером 2420 байт
-        while len(signature) < Dilithium5Stub.SIGNATURE_SIZE:
-            data = hashlib.sha512(data).digest()
-            signature += data
-        signature = signature[:Dilithium5Stub.SIGNATURE_SIZE]
-        
-        return signature
+        return hashlib.shake_256(data).digest(Dilithium5Stub.SIGNATURE_SIZE)
     
     @staticmethod
     def verify(public_key, message, signature):
@@ -58,11 +46,12 @@ class Dilithium5Stub:
         if len(signature) != Dilithium5Stub.SIGNATURE_SIZE:
             return False
         
-        # Пересоздаем ожидаемую подпись (упрощенно)
-        expected = Dilithium5Stub.sign(public_key[:32], message)
+        # Ожидаемые первые 32 байта подписи (упрощенно): вывод SHAKE256
+        # короче - это префикс длинного, полную подпись считать не нужно
+        expected_prefix = hashlib.shake_256(public_key[:32] + message).digest(32)
         
-        # Сравниваем первые 32 байта для скорости
-        return signature[:32] == expected[:32]
+        # Сравниваем первые 32 байта за постоянное время
+        return hmac.compare_digest(signature[:32], expected_prefix)
 
 # Создаем экземпляр для импорта
 dilithium5 = Dilithium5Stub()
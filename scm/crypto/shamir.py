@@ -5,14 +5,15 @@ Shamir's Secret Sharing - УЛЬТРА-ПРОСТАЯ ВЕРСИЯ
 """
 
 import hashlib
-from typing import List, Optional
+from collections import Counter
+from typing import List, Optional, Union
 from dataclasses import dataclass
 
 @dataclass
 class SecretShare:
     """Represents one share of the private key"""
     index: int
-    share_data: str
+    share_data: bytes  # байт индекса + байты ключа
     hash: str  # хеш для проверки целостности
 
 class QuantumSecretKeeper:
@@ -27,18 +28,21 @@ class QuantumSecretKeeper:
         self.threshold = threshold
         self.num_shares = num_shares
     
-    def split_private_key(self, private_key_hex: str) -> List[SecretShare]:
+    def split_private_key(self, private_key: Union[bytes, str]) -> List[SecretShare]:
         """
         Создает 5 долей, каждая содержит полный ключ.
         Но для восстановления нужно 3 доли, чтобы подтвердить правильность.
+        Ключ передается сырыми байтами (строка читается как hex).
         """
-        # Вычисляем хеш ключа для проверки
-        key_hash = hashlib.sha256(private_key_hex.encode()).hexdigest()
+        key_bytes = bytes.fromhex(private_key) if isinstance(private_key, str) else bytes(private_key)
+        
+        # Хеш ключа для проверки (метка целостности, 16 байт BLAKE2b)
+        key_hash = hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
         
         shares = []
         for i in range(self.num_shares):
-            # Каждая доля содержит: индекс + ключ
-            share_data = f"{i+1}:{private_key_hex}"
+            # Каждая доля содержит: индекс (1 байт) + ключ в сыром виде
+            share_data = bytes([i + 1]) + key_bytes
             
             shares.append(SecretShare(
                 index=i + 1,
@@ -48,10 +52,11 @@ class QuantumSecretKeeper:
         
         return shares
     
-    def recover_private_key(self, shares_data: List[str]) -> Optional[str]:
+    def recover_private_key(self, shares_data: List[Union[bytes, str]]) -> Optional[bytes]:
         """
-        Восстанавливает ключ из долей.
+        Восстанавливает ключ из долей (возвращает сырые байты).
         Проверяет что все доли содержат один и тот же ключ.
+        Принимает и старый текстовый формат "индекс:ключ".
         """
         if len(shares_data) < self.threshold:
             raise ValueError(f"Need at least {self.threshold} shares, got {len(shares_data)}")
@@ -60,20 +65,17 @@ class QuantumSecretKeeper:
             # Извлекаем ключи из всех долей
             keys = []
             for share in shares_data[:self.threshold]:
-                # Формат: "индекс:ключ"
-                parts = share.split(':', 1)
-                if len(parts) == 2:
-                    keys.append(parts[1])
-            
-            # Проверяем что все ключи одинаковые
-            if len(set(keys)) != 1:
-                # Если ключи разные, берем тот который встречается чаще
-                from collections import Counter
-                key_counts = Counter(keys)
-                most_common_key = key_counts.most_common(1)[0][0]
-                return most_common_key
+                if isinstance(share, str):
+                    # Старый формат: "индекс:ключ"
+                    parts = share.split(':', 1)
+                    if len(parts) == 2:
+                        keys.append(bytes.fromhex(parts[1]))
+                else:
+                    # Формат: байт индекса + ключ
+                    keys.append(bytes(share[1:]))
             
-            return keys[0]
+            # Берем ключ, который встречается чаще (при совпадении всех - его же)
+            return Counter(keys).most_common(1)[0][0] if keys else None
             
         except Exception as e:
             print(f"Recovery failed: {e}")
@@ -96,7 +98,7 @@ class PhysicalAnchorGenerator:
             'shares': [
                 {
                     'index': s.index,
-                    'share_data': s.share_data[:50] + '...',
+                    'share_data': s.share_data.hex()[:50] + '...',
                     'hash': s.hash[:16]
                 }
                 for s in shares
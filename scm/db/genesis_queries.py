@@ -3,13 +3,61 @@
 PostgreSQL queries for quantum-safe genesis anchor storage.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import json
 import uuid
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Binary JSONB wire format: a version byte followed by the JSON text
+_JSONB_VERSION = b'\x01'
+
+
+def _jsonb_encode(value) -> bytes:
+    """JSONB encoder for asyncpg (binary format)"""
+    if orjson is not None:
+        return _JSONB_VERSION + orjson.dumps(value)
+    return _JSONB_VERSION + json.dumps(value).encode()
+
+
+def _jsonb_decode(data: bytes):
+    """JSONB decoder for asyncpg (binary format); skips the version byte"""
+    if orjson is not None:
+        return orjson.loads(data[1:])
+    return json.loads(data[1:])
+
 class GenesisStorage:
     """Handles storage and retrieval of hybrid genesis anchors"""
     
+    # One SQL text for every insert, so asyncpg's per-connection statement
+    # cache parses and plans it once per connection
+    _INSERT_ANCHOR_SQL = """
+        INSERT INTO genesis_anchor 
+        (id, anchor_hash, ed25519_public, dilithium5_public, physical_anchor_id, metadata)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    """
+    
+    @staticmethod
+    async def init_connection(conn):
+        """
+        Register the JSONB codec on a new connection, so metadata goes in
+        and out as dicts (via orjson when installed). The codec is binary,
+        so it also serves binary COPY.
+        Pass as init= to asyncpg.create_pool.
+        """
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=_jsonb_encode,
+            decoder=_jsonb_decode,
+            schema='pg_catalog',
+            format='binary'
+        )
+    
     @staticmethod
     async def create_table(conn):
         """Create genesis_anchor table if not exists"""
@@ -35,15 +83,34 @@ class GenesisStorage:
         """Store a new quantum genesis anchor"""
         record_id = str(uuid.uuid4())
         
-        await conn.execute("""
-            INSERT INTO genesis_anchor 
-            (id, anchor_hash, ed25519_public, dilithium5_public, physical_anchor_id, metadata)
-            VALUES ($1, $2, $3, $4, $5, $6)
-        """, record_id, anchor_hash, ed25519_public, dilithium5_public,
+        await conn.execute(GenesisStorage._INSERT_ANCHOR_SQL, record_id, anchor_hash, ed25519_public, dilithium5_public,
             physical_anchor_id, metadata or {})
         
         return record_id
     
+    @staticmethod
+    async def store_anchors_bulk(conn,
+                                 rows: List[Tuple[str, bytes, bytes, Optional[str], Optional[Dict]]]) -> List[str]:
+        """
+        Store many anchors with one pipelined executemany of the
+        store_anchor statement, so metadata goes through the same JSONB
+        codec as single inserts (binary COPY has no encoder for a
+        text-format codec, nor for dicts without one).
+        Rows are (anchor_hash, ed25519_public, dilithium5_public,
+        physical_anchor_id, metadata), as for store_anchor.
+        Returns the new record ids in row order.
+        """
+        record_ids = [str(uuid.uuid4()) for _ in rows]
+        
+        await conn.executemany(GenesisStorage._INSERT_ANCHOR_SQL, [
+            (record_id, anchor_hash, ed25519_public, dilithium5_public,
+             physical_anchor_id, metadata or {})
+            for record_id, (anchor_hash, ed25519_public, dilithium5_public,
+                            physical_anchor_id, metadata) in zip(record_ids, rows)
+        ])
+        
+        return record_ids
+    
     @staticmethod
     async def get_anchor_by_hash(conn, anchor_hash: str) -> Optional[Dict[str, Any]]:
         """Retrieve genesis anchor by its hash"""
@@ -5,13 +5,49 @@ Dream Engine для SCM.
 """
 
 import random
-import hashlib
+import secrets
+from collections import Counter, deque
+from functools import lru_cache
 from enum import Enum
-from typing import List, Dict, Optional, Tuple
+from typing import Deque, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import json
 
+import numpy as np
+
+# Опциональная JIT-компиляция числовых оценок
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Без numba функции остаются обычным Python"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Эмоции, делающие сон кошмаром
+NIGHTMARE_EMOTIONS = frozenset({'страх', 'ужас', 'гнев', 'отчаяние'})
+
+
+@njit(cache=True)
+def _nightmare_score(emotion_matches, num_emotions, num_traumas):
+    """
+    Оценка кошмарности по счетчикам: доля кошмарных эмоций (вес 0.6)
+    и число травм, нормализованное на 10 (вес 0.4).
+    """
+    return (emotion_matches / num_emotions) * 0.6 + (num_traumas / 10) * 0.4
+
+
+@njit(cache=True)
+def _consolidation_rate(type_bonus, num_symbols, is_nightmare):
+    """Скорость консолидации памяти, ограниченная [0, 1]"""
+    rate = 0.5 + type_bonus
+    rate += num_symbols * 0.05
+    if is_nightmare:
+        rate -= 0.2
+    return max(0.0, min(1.0, rate))
+
 class DreamType(Enum):
     """Типы сновидений"""
     CONSOLIDATION = "consolidation"  # Консолидация памяти
@@ -20,8 +56,73 @@ class DreamType(Enum):
     PROPHETIC = "prophetic"          # "Вещие" сны (предсказания)
     NIGHTMARE = "nightmare"          # Кошмары (обработка страхов)
     LUCID = "lucid"                  # Осознанные сновидения
+    
+    # Члены - синглтоны и сравниваются по идентичности, поэтому хеш по id
+    # (в C) вместо Enum.__hash__ на Python при поиске в таблицах типов
+    __hash__ = object.__hash__
+
+# Символ опыта с кодом в контексте (проверяется первым)
+_CODE_SYMBOL = ('лабиринт', 'поиск решения')
+
+# Ключевое слово в типе опыта -> (символ, значение), по приоритету
+_EXPERIENCE_SYMBOLS = (
+    ('praise', ('свет', 'признание')),
+    ('insult', ('огонь', 'конфликт')),
+    ('loss', ('тьма', 'утрата')),
+)
+
+
+@lru_cache(maxsize=256)
+def _symbol_for_type(exp_type: str) -> Optional[Tuple[str, str]]:
+    """Символ для типа опыта; типов немного, поэтому результат кешируется"""
+    return next((sym for kw, sym in _EXPERIENCE_SYMBOLS if kw in exp_type), None)
+
 
-@dataclass
+# Базовые сценарии для разных типов снов
+_SCENARIOS: Dict[DreamType, Tuple[str, ...]] = {
+    DreamType.CONSOLIDATION: (
+        "повторение событий дня в странной последовательности",
+        "перемешивание воспоминаний в новом контексте",
+        "возвращение к старым задачам с новыми решениями"
+    ),
+    DreamType.PROCESSING: (
+        "столкновение с травмирующим событием в безопасной форме",
+        "преодоление препятствия, которое раньше казалось непреодолимым",
+        "диалог с обидчиком, который заканчивается примирением"
+    ),
+    DreamType.CREATIVE: (
+        "неожиданное решение давней проблемы",
+        "новая идея, приходящая во сне",
+        "комбинация несвязанных концепций"
+    ),
+    DreamType.PROPHETIC: (
+        "видение будущего в символах",
+        "предчувствие важного события",
+        "образ того, что должно произойти"
+    ),
+    DreamType.NIGHTMARE: (
+        "преследование неизвестным",
+        "падение в бесконечность",
+        "потеря контроля над реальностью"
+    ),
+    DreamType.LUCID: (
+        "осознание себя во сне и управление сюжетом",
+        "встреча с внутренним 'я'",
+        "исследование границ реальности"
+    )
+}
+
+# Бонус консолидации памяти по типу сна
+_TYPE_BONUS: Dict[DreamType, float] = {
+    DreamType.CONSOLIDATION: 0.3,
+    DreamType.PROCESSING: 0.2,
+    DreamType.CREATIVE: 0.1,
+    DreamType.PROPHETIC: 0.0,
+    DreamType.NIGHTMARE: -0.2,
+    DreamType.LUCID: 0.4
+}
+
+@dataclass(slots=True)
 class Dream:
     """Структура сновидения"""
     id: str
@@ -34,7 +135,7 @@ class Dream:
     consolidation_rate: float  # 0.0-1.0 как много памяти сохранилось
     is_nightmare: bool
 
-@dataclass
+@dataclass(slots=True)
 class DreamSymbol:
     """Символ в сновидении"""
     name: str
@@ -49,9 +150,13 @@ class DreamEngine:
     Генерирует сны на основе опыта и памяти.
     """
     
-    def __init__(self, anchor_hash: str):
+    def __init__(self, anchor_hash: str, max_history: int = 1000):
         self.anchor_hash = anchor_hash
-        self.dream_history: List[Dream] = []
+        # Храним только последние max_history снов, агрегаты ведем инкрементально
+        self.dream_history: Deque[Dream] = deque(maxlen=max_history)
+        self._sum_consolidation = 0.0
+        self._nightmare_count = 0
+        self._type_counts: Counter = Counter()
         self.symbol_library: Dict[str, DreamSymbol] = {}
         self.dream_frequency = 1.0  # снов за период
         self.lucidity_level = 0.0    # 0.0-1.0 осознанность снов
@@ -80,13 +185,18 @@ class DreamEngine:
             ("звезда", "надежда и руководство", 0.9),
         ]
         
+        now = datetime.utcnow()
+        # SoA: имена и счетчики символов в параллельных массивах
+        self._sym_names = [name for name, _, _ in base_symbols]
+        self._sym_index = {name: i for i, name in enumerate(self._sym_names)}
+        self._sym_occurrences = np.zeros(len(base_symbols), dtype=np.int32)
         for name, meaning, valence in base_symbols:
             self.symbol_library[name] = DreamSymbol(
                 name=name,
                 meaning=meaning,
                 emotional_valence=valence,
                 occurrences=0,
-                last_seen=datetime.utcnow()
+                last_seen=now
             )
     
     def generate_dream(self, recent_experiences: List[Dict], 
@@ -103,6 +213,8 @@ class DreamEngine:
         Returns:
             Dream - сгенерированное сновидение
         """
+        now = datetime.utcnow()
+        
         # Определяем тип сна
         dream_type = self._determine_dream_type(emotional_state, traumas)
         
@@ -128,9 +240,9 @@ class DreamEngine:
         
         # Создаем сон
         dream = Dream(
-            id=hashlib.md5(f"{datetime.utcnow()}{random.random()}".encode()).hexdigest()[:16],
+            id=secrets.token_hex(8),  # 64-битный непрозрачный идентификатор
             type=dream_type,
-            timestamp=datetime.utcnow(),
+            timestamp=now,
             duration=duration,
             content=content,
             emotions=emotions,
@@ -140,13 +252,33 @@ class DreamEngine:
         )
         
         # Сохраняем в историю
-        self.dream_history.append(dream)
+        self._record_dream(dream)
         
         # Обновляем статистику символов
-        self._update_symbols(symbols)
+        self._update_symbols(symbols, now)
         
         return dream
     
+    def generate_dreams_batch(self, recent_experiences: List[Dict],
+                              emotional_states: List[Dict],
+                              traumas_per_night: List[List[Dict]]) -> List[Dream]:
+        """
+        Генерирует серию снов (по одному за ночь) с консолидацией после каждого.
+        
+        Args:
+            recent_experiences: опыт, общий для всех ночей
+            emotional_states: эмоциональное состояние на каждую ночь
+            traumas_per_night: травмы на каждую ночь
+            
+        Returns:
+            Список снов в порядке ночей
+        """
+        dreams = []
+        for emotional_state, traumas in zip(emotional_states, traumas_per_night):
+            dreams.append(self.generate_dream(recent_experiences, emotional_state, traumas))
+            self.consolidate_memory({})
+        return dreams
+    
     def _determine_dream_type(self, emotional_state: Dict, traumas: List[Dict]) -> DreamType:
         """Определяет тип сна на основе состояния"""
         valence = emotional_state.get('valence', 0.0)
@@ -172,36 +304,22 @@ class DreamEngine:
             context = exp.get('context', {})
             exp_type = exp.get('type', '')
             
-            # Маппинг опыта на символы
-            if 'code' in str(context):
-                symbols.append({
-                    'name': 'лабиринт',
-                    'meaning': 'поиск решения',
-                    'intensity': exp.get('intensity', 0.5)
-                })
-            elif 'praise' in exp_type:
-                symbols.append({
-                    'name': 'свет',
-                    'meaning': 'признание',
-                    'intensity': exp.get('intensity', 0.5)
-                })
-            elif 'insult' in exp_type:
-                symbols.append({
-                    'name': 'огонь',
-                    'meaning': 'конфликт',
-                    'intensity': exp.get('intensity', 0.5)
-                })
-            elif 'loss' in exp_type:
+            # Маппинг опыта на символы (пустой контекст не сериализуем)
+            if context and 'code' in str(context):
+                match = _CODE_SYMBOL
+            else:
+                match = _symbol_for_type(exp_type)
+            if match is not None:
                 symbols.append({
-                    'name': 'тьма',
-                    'meaning': 'утрата',
+                    'name': match[0],
+                    'meaning': match[1],
                     'intensity': exp.get('intensity', 0.5)
                 })
         
-        # Добавляем случайные символы из библиотеки
-        available = [s for s in self.symbol_library.values() if s.occurrences < 10]
-        if available and random.random() < 0.3:
-            symbol = random.choice(available)
+        # Добавляем случайные символы из библиотеки (маска по массиву счетчиков)
+        available = np.flatnonzero(self._sym_occurrences < 10)
+        if len(available) and random.random() < 0.3:
+            symbol = self.symbol_library[self._sym_names[random.choice(available)]]
             symbols.append({
                 'name': symbol.name,
                 'meaning': symbol.meaning,
@@ -214,42 +332,8 @@ class DreamEngine:
                                symbols: List[Dict],
                                experiences: List[Dict]) -> Dict:
         """Генерирует содержание сна"""
-        # Базовые сценарии для разных типов снов
-        scenarios = {
-            DreamType.CONSOLIDATION: [
-                "повторение событий дня в странной последовательности",
-                "перемешивание воспоминаний в новом контексте",
-                "возвращение к старым задачам с новыми решениями"
-            ],
-            DreamType.PROCESSING: [
-                "столкновение с травмирующим событием в безопасной форме",
-                "преодоление препятствия, которое раньше казалось непреодолимым",
-                "диалог с обидчиком, который заканчивается примирением"
-            ],
-            DreamType.CREATIVE: [
-                "неожиданное решение давней проблемы",
-                "новая идея, приходящая во сне",
-                "комбинация несвязанных концепций"
-            ],
-            DreamType.PROPHETIC: [
-                "видение будущего в символах",
-                "предчувствие важного события",
-                "образ того, что должно произойти"
-            ],
-            DreamType.NIGHTMARE: [
-                "преследование неизвестным",
-                "падение в бесконечность",
-                "потеря контроля над реальностью"
-            ],
-            DreamType.LUCID: [
-                "осознание себя во сне и управление сюжетом",
-                "встреча с внутренним 'я'",
-                "исследование границ реальности"
-            ]
-        }
-        
         # Выбираем сценарий
-        scenario = random.choice(scenarios.get(dream_type, scenarios[DreamType.CONSOLIDATION]))
+        scenario = random.choice(_SCENARIOS.get(dream_type, _SCENARIOS[DreamType.CONSOLIDATION]))
         
         # Добавляем символы в сценарий
         dream_symbols = [s['name'] for s in symbols[:3]]
@@ -285,15 +369,9 @@ class DreamEngine:
     
     def _is_nightmare(self, emotions: List[str], traumas: List[Dict]) -> bool:
         """Определяет, является ли сон кошмаром"""
-        nightmare_emotions = ['страх', 'ужас', 'гнев', 'отчаяние']
-        
-        # Проверяем эмоции
-        emotion_score = sum(1 for e in emotions if e in nightmare_emotions) / len(emotions)
-        
-        # Проверяем травмы
-        trauma_score = len(traumas) / 10  # нормализуем
-        
-        total_score = (emotion_score * 0.6 + trauma_score * 0.4)
+        # Счетчики считаем в Python, арифметика - в ядре
+        matches = sum(e in NIGHTMARE_EMOTIONS for e in emotions)
+        total_score = _nightmare_score(matches, len(emotions), len(traumas))
         
         return total_score > self.nightmare_threshold
     
@@ -301,32 +379,114 @@ class DreamEngine:
                                      num_symbols: int,
                                      is_nightmare: bool) -> float:
         """Вычисляет скорость консолидации памяти"""
-        base_rate = 0.5
-        
         # Разные типы снов по-разному консолидируют память
-        type_bonus = {
-            DreamType.CONSOLIDATION: 0.3,
-            DreamType.PROCESSING: 0.2,
-            DreamType.CREATIVE: 0.1,
-            DreamType.PROPHETIC: 0.0,
-            DreamType.NIGHTMARE: -0.2,
-            DreamType.LUCID: 0.4
+        return _consolidation_rate(_TYPE_BONUS.get(dream_type, 0.0), num_symbols, is_nightmare)
+    
+    def to_dict(self) -> Dict:
+        """Снимок состояния для JSON; агрегаты пересчитываются при загрузке"""
+        return {
+            'anchor_hash': self.anchor_hash,
+            'max_history': self.dream_history.maxlen,
+            'dream_frequency': self.dream_frequency,
+            'lucidity_level': self.lucidity_level,
+            'nightmare_threshold': self.nightmare_threshold,
+            'dream_history': [
+                {
+                    'id': d.id,
+                    'type': d.type.value,
+                    'timestamp': d.timestamp.isoformat(),
+                    'duration': d.duration,
+                    'content': d.content,
+                    'emotions': d.emotions,
+                    'symbols': d.symbols,
+                    'consolidation_rate': d.consolidation_rate,
+                    'is_nightmare': d.is_nightmare
+                }
+                for d in self.dream_history
+            ],
+            'symbols': [
+                {
+                    'name': s.name,
+                    'occurrences': s.occurrences,
+                    'last_seen': s.last_seen.isoformat()
+                }
+                for s in self.symbol_library.values()
+            ]
         }
-        
-        rate = base_rate + type_bonus.get(dream_type, 0)
-        rate += num_symbols * 0.05
-        if is_nightmare:
-            rate -= 0.2
-        
-        return max(0.0, min(1.0, rate))
     
-    def _update_symbols(self, symbols: List[Dict]):
-        """Обновляет статистику символов"""
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DreamEngine":
+        """Восстанавливает движок из снимка to_dict()"""
+        engine = cls(data['anchor_hash'], max_history=data['max_history'])
+        engine.dream_frequency = data['dream_frequency']
+        engine.lucidity_level = data['lucidity_level']
+        engine.nightmare_threshold = data['nightmare_threshold']
+        for item in data['dream_history']:
+            engine._record_dream(Dream(
+                id=item['id'],
+                type=DreamType(item['type']),
+                timestamp=datetime.fromisoformat(item['timestamp']),
+                duration=item['duration'],
+                content=item['content'],
+                emotions=item['emotions'],
+                symbols=item['symbols'],
+                consolidation_rate=item['consolidation_rate'],
+                is_nightmare=item['is_nightmare']
+            ))
+        for item in data['symbols']:
+            i = engine._sym_index.get(item['name'])
+            if i is None:
+                continue
+            entry = engine.symbol_library[item['name']]
+            entry.occurrences = item['occurrences']
+            entry.last_seen = datetime.fromisoformat(item['last_seen'])
+            engine._sym_occurrences[i] = item['occurrences']
+        return engine
+        
+    def _record_dream(self, dream: Dream):
+        """Добавляет сон в историю, вытесняя самый старый при переполнении"""
+        history = self.dream_history
+        if len(history) == history.maxlen:
+            self._count_dream(history[0], -1)
+        history.append(dream)
+        self._count_dream(dream, 1)
+    
+    def _count_dream(self, dream: Dream, sign: int):
+        """Учитывает сон в агрегатах статистики (sign = +1 / -1)"""
+        self._sum_consolidation += sign * dream.consolidation_rate
+        self._nightmare_count += sign * dream.is_nightmare
+        t = dream.type.value
+        self._type_counts[t] += sign
+        if not self._type_counts[t]:
+            del self._type_counts[t]
+    
+    def _update_symbols(self, symbols: List[Dict], now: datetime):
+        """Обновляет статистику символов (now - время сна)"""
+        lib = self.symbol_library
+        index = self._sym_index
         for sym in symbols:
             name = sym['name']
-            if name in self.symbol_library:
-                self.symbol_library[name].occurrences += 1
-                self.symbol_library[name].last_seen = datetime.utcnow()
+            i = index.get(name)
+            if i is not None:
+                self._sym_occurrences[i] += 1
+                entry = lib[name]
+                entry.occurrences += 1
+                entry.last_seen = now
+    
+    @staticmethod
+    def _top_symbols(occurrences: np.ndarray, k: int) -> np.ndarray:
+        """
+        Индексы k самых частых символов, при равенстве - в порядке библиотеки.
+        np.partition находит k-й счетчик за O(N), сортируются только кандидаты.
+        """
+        n = len(occurrences)
+        if n > k:
+            kth = np.partition(occurrences, n - k)[n - k]
+            candidates = np.flatnonzero(occurrences >= kth)
+        else:
+            candidates = np.arange(n)
+        order = np.argsort(-occurrences[candidates], kind='stable')
+        return candidates[order[:k]]
     
     def consolidate_memory(self, memory_data: Dict) -> Dict:
         """
@@ -363,24 +523,16 @@ class DreamEngine:
         if not self.dream_history:
             return {'total_dreams': 0}
         
-        # Статистика по типам
-        type_counts = {}
-        for dream in self.dream_history:
-            t = dream.type.value
-            type_counts[t] = type_counts.get(t, 0) + 1
-        
         # Любимые символы
-        top_symbols = sorted(
-            [(s.name, s.occurrences) for s in self.symbol_library.values()],
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        occ = self._sym_occurrences
+        top_symbols = [(self._sym_names[i], int(occ[i])) for i in self._top_symbols(occ, 5)]
         
+        total = len(self.dream_history)
         return {
-            'total_dreams': len(self.dream_history),
-            'by_type': type_counts,
-            'avg_consolidation': sum(d.consolidation_rate for d in self.dream_history) / len(self.dream_history),
-            'nightmare_rate': sum(1 for d in self.dream_history if d.is_nightmare) / len(self.dream_history),
+            'total_dreams': total,
+            'by_type': dict(self._type_counts),
+            'avg_consolidation': self._sum_consolidation / total,
+            'nightmare_rate': self._nightmare_count / total,
             'lucidity_level': self.lucidity_level,
             'top_symbols': top_symbols,
             'last_dream': self.dream_history[-1].timestamp.isoformat() if self.dream_history else None
@@ -18,6 +18,20 @@ from core.liveness_v2.memory_levels import HierarchicalMemory
 from core.liveness_v2.sleep_consolidator import SleepConsolidator
 from accumulator.incremental_proof import IncrementalChainProof
 
+_GENESIS_PREFIX = b'GENESIS_HASH = '
+
+
+def read_genesis_hash(path: str = 'GENESIS.md') -> str:
+    """
+    GENESIS_HASH value, scanning the file line by line up to the match.
+    Read as bytes: the rest of GENESIS.md is not guaranteed to be UTF-8.
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(_GENESIS_PREFIX):
+                return line[len(_GENESIS_PREFIX):].strip().decode('ascii')
+    raise ValueError(f"GENESIS_HASH not found in {path}")
+
 
 async def run_sleep_cycle(
     chain_path: str = "chain.wal",
@@ -39,9 +53,7 @@ async def run_sleep_cycle(
     
     # Load chain (for verification)
     from core.genesis_anchor import GenesisAnchor
-    with open('GENESIS.md', 'r') as f:
-        content = f.read()
-        genesis_hash = content.split('GENESIS_HASH = ')[1].split('\n')[0].strip()
+    genesis_hash = read_genesis_hash()
     
     chain = IncrementalChainProof(
         genesis_hash=hashlib.sha256(genesis_hash.encode()).digest(),
@@ -60,31 +72,25 @@ async def run_sleep_cycle(
     
     # Run consolidation
     consolidator = SleepConsolidator()
-    new_clusters, archived_ids = await consolidator.consolidate(
-        memory,
-        max_age_hours=max_age_hours
+    new_clusters, archived_ids = await memory.run_consolidation(
+        consolidator,
+        max_age_hours=max_age_hours,
+        apply=not dry_run
     )
     
     print(f"\n📦 Consolidation results:")
     print(f"   New semantic clusters: {len(new_clusters)}")
     print(f"   Archived episodic scars: {len(archived_ids)}")
     
-    # Remove archived scars from episodic memory
+    # Consolidated scars are already archived and clusters added
     if not dry_run:
-        for scar_id in archived_ids:
-            if scar_id in memory.episodic:
-                del memory.episodic[scar_id]
-        
-        # Add new clusters
-        for cluster in new_clusters:
-            memory.add_semantic(cluster)
-        
         # Save
         memory.save()
         
         # Verify chain integrity hasn't been affected
         if not chain.verify_chain():
             print("❌ ERROR: Chain integrity compromised after consolidation!")
+            await chain.close()
             return 1
     
     print(f"\n📊 After consolidation:")
@@ -92,6 +98,7 @@ async def run_sleep_cycle(
     print(f"   Semantic clusters: {len(memory.semantic)}")
     print(f"   Archetypes: {len(memory.archetypes)}")
     
+    await chain.close()
     print(f"\n✅ Sleep cycle completed at {datetime.utcnow().isoformat()}")
     return 0
 
@@ -1,15 +1,158 @@
 """
 Write-Ahead Log for atomic accumulator operations.
-Uses aiofiles for non-blocking writes.
+Appends are group-committed: entries queued while an fsync is in
+flight are written and fsynced together through one persistent
+descriptor in a worker thread. Reads use aiofiles.
+
+Records are binary: a fixed header, the raw payload fields and a trailing
+record length, so the last record can be read from the end of the file.
 """
 
 import os
+import time
+import struct
 import asyncio
 import aiofiles
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
 
+# File magic; the last byte is the format version
+_MAGIC = b'SCMWAL\x00\x01'
+
+# seq, op code, timestamp (ns since epoch), then the byte lengths of
+# value, scar_id, element_hash and prime
+_HEADER = struct.Struct('<QBqIHHH')
+# Total record length, repeated at the end for reading backwards
+_TRAILER = struct.Struct('<I')
+
+_OPCODES = {"ADD": 1, "REMOVE": 2}
+_OPNAMES = {code: name for name, code in _OPCODES.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _int_bytes(n: int) -> bytes:
+    return n.to_bytes((n.bit_length() + 7) // 8, 'big')
+
+
+def _pack_record(
+    seq: int,
+    operation: str,
+    value: int,
+    timestamp_ns: int,
+    scar_id: Optional[str],
+    element_hash: Optional[bytes],
+    prime: Optional[int]
+) -> bytes:
+    """Encode one WAL record. The hash/prime pair is kept only when both are set."""
+    value_b = _int_bytes(value)
+    scar_b = scar_id.encode() if scar_id is not None else b''
+    if element_hash is not None and prime is not None:
+        hash_b, prime_b = element_hash, _int_bytes(prime)
+    else:
+        hash_b = prime_b = b''
+    length = _HEADER.size + len(value_b) + len(scar_b) + len(hash_b) + len(prime_b) + _TRAILER.size
+    return b''.join((
+        _HEADER.pack(seq, _OPCODES[operation], timestamp_ns,
+                     len(value_b), len(scar_b), len(hash_b), len(prime_b)),
+        value_b, scar_b, hash_b, prime_b,
+        _TRAILER.pack(length),
+    ))
+
+
+def _unpack_record(buf: bytes, offset: int) -> Tuple[Dict, int]:
+    """Decode the record at offset; returns (entry, offset of the next record)."""
+    if offset + _HEADER.size > len(buf):
+        raise ValueError("truncated WAL record")
+    seq, op, timestamp_ns, value_len, scar_len, hash_len, prime_len = _HEADER.unpack_from(buf, offset)
+    pos = offset + _HEADER.size
+    end = pos + value_len + scar_len + hash_len + prime_len + _TRAILER.size
+    if end > len(buf) or _TRAILER.unpack_from(buf, end - _TRAILER.size)[0] != end - offset:
+        raise ValueError("truncated or corrupt WAL record")
+    if op not in _OPNAMES:
+        raise ValueError(f"unknown WAL op code {op}")
+    
+    value = int.from_bytes(buf[pos:pos + value_len], 'big')
+    pos += value_len
+    scar_id = buf[pos:pos + scar_len].decode() if scar_len else None
+    pos += scar_len
+    element_hash = bytes(buf[pos:pos + hash_len]) if hash_len else None
+    pos += hash_len
+    prime = int.from_bytes(buf[pos:pos + prime_len], 'big') if prime_len else None
+    return {
+        "seq": seq,
+        "operation": _OPNAMES[op],
+        "value": value,
+        "timestamp_ns": timestamp_ns,
+        "scar_id": scar_id,
+        "element_hash": element_hash,
+        "prime": prime,
+    }, end
+
+
+def _scan_records(data: bytes) -> Tuple[List[Dict], int]:
+    """
+    Decode a whole WAL file; returns the entries and the length of the
+    valid prefix. A torn record at the end (crash during an append that
+    was never acknowledged) is left out.
+    """
+    if not data:
+        return [], 0
+    if not data.startswith(_MAGIC):
+        raise ValueError("not a binary accumulator WAL")
+    entries = []
+    offset = len(_MAGIC)
+    while offset < len(data):
+        try:
+            entry, end = _unpack_record(data, offset)
+        except ValueError:
+            break
+        entries.append(entry)
+        offset = end
+    return entries, offset
+
+
+def _read_tail(f, size: int) -> Optional[Dict]:
+    """
+    Decode the last record of an open WAL by seeking back over its
+    trailing length. None when the tail is torn or corrupt.
+    """
+    if size < len(_MAGIC) + _HEADER.size + _TRAILER.size:
+        return None
+    f.seek(size - _TRAILER.size)
+    (length,) = _TRAILER.unpack(f.read(_TRAILER.size))
+    if not _HEADER.size + _TRAILER.size <= length <= size - len(_MAGIC):
+        return None
+    f.seek(size - length)
+    try:
+        entry, end = _unpack_record(f.read(length), 0)
+    except ValueError:
+        return None
+    return entry if end == length else None
+
+
+def _parse_legacy_line(line: str) -> Dict:
+    """
+    Parse one line of the old colon-delimited text WAL.
+    The ISO timestamp contains two colons, so fields after the value
+    are split off the remainder rather than by position.
+    """
+    seq, operation, value, rest = line.split(':', 3)
+    fields = rest.split(':')
+    extra = fields[3:]
+    delta = datetime.fromisoformat(':'.join(fields[:3])) - _EPOCH
+    return {
+        "seq": int(seq),
+        "operation": operation,
+        "value": int(value),
+        "timestamp_ns": delta // datetime.resolution * 1000,
+        "scar_id": extra[0] if extra else None,
+        "element_hash": bytes.fromhex(extra[1]) if len(extra) > 2 else None,
+        "prime": int(extra[2]) if len(extra) > 2 else None,
+    }
+
+
 class AccumulatorWAL:
     """Write-Ahead Log with async/await support."""
     
@@ -17,15 +160,53 @@ class AccumulatorWAL:
         self.path = path
         self._cached_seq = 0
         self._cached_value = 0
-        self._lock = asyncio.Lock()
+        # Group commit: (data, value, future) awaiting the next flush
+        self._pending: List[Tuple[bytes, int, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Set when a failed write could not be rolled back; appends are refused
+        self._failed: Optional[BaseException] = None
         self._ensure_file()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
         
     def _ensure_file(self):
-        """Create WAL file if it doesn't exist."""
-        if not os.path.exists(self.path):
-            with open(self.path, 'w') as f:
-                f.write("# ACCUMULATOR WAL\n")
-                f.write("# seq:operation:value:timestamp:scar_id\n")
+        """
+        Create the WAL (empty files included), or convert a text WAL from
+        before the binary format in place via an atomic replace.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, 'wb') as f:
+                f.write(_MAGIC)
+            return
+        
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(0)
+            if f.read(len(_MAGIC)) == _MAGIC:
+                if size == len(_MAGIC) or _read_tail(f, size) is not None:
+                    return
+                # Cut a torn tail so new records follow the last valid one
+                f.seek(0)
+                _, valid = _scan_records(f.read())
+                os.truncate(self.path, valid)
+                return
+            f.seek(0)
+            data = f.read()
+        
+        entries = [
+            _parse_legacy_line(l.strip()) for l in data.decode().split('\n')
+            if l.strip() and not l.startswith('#')
+        ]
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(b''.join(
+                _pack_record(e["seq"], e["operation"], e["value"], e["timestamp_ns"],
+                             e["scar_id"], e["element_hash"], e["prime"])
+                for e in entries
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
                 
     async def initialize_cache(self):
         """Initialize cache from WAL on startup."""
@@ -33,50 +214,166 @@ class AccumulatorWAL:
         self._cached_seq = seq
         self._cached_value = value
         
-    async def append(self, operation: str, value: int, scar_id: str) -> bool:
+    async def _read_entries(self) -> List[Dict]:
+        """Read and decode all records."""
+        if not os.path.exists(self.path):
+            return []
+            
+        async with aiofiles.open(self.path, 'rb') as f:
+            content = await f.read()
+            
+        return _scan_records(content)[0]
+        
+    def _format_entry(
+        self,
+        operation: str,
+        value: int,
+        scar_id: str,
+        element_hash: Optional[bytes],
+        prime: Optional[int],
+        timestamp_ns: int
+    ) -> bytes:
+        """Next WAL record; advances the cached sequence number."""
+        self._cached_seq += 1
+        return _pack_record(self._cached_seq, operation, value, timestamp_ns,
+                            scar_id, element_hash, prime)
+        
+    def _write_sync(self, data: bytes):
+        """
+        Append all of data to the open descriptor and fsync it.
+        On failure the file is cut back to its size before the write, so
+        no torn record hides later ones from recovery; if that fails too
+        the WAL refuses further appends.
+        """
+        start = os.lseek(self._fd, 0, os.SEEK_END)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            os.fsync(self._fd)
+        except BaseException as exc:
+            try:
+                os.ftruncate(self._fd, start)
+                os.fsync(self._fd)
+            except OSError:
+                self._failed = exc
+            raise
+        
+    async def _write(self, data: bytes, value: int):
+        """
+        Queue data and wait until it is fsynced.
+        The first writer starts a flush task; writers arriving while it
+        fsyncs are coalesced into its next write.
+        """
+        if self._failed is not None:
+            raise RuntimeError("WAL is unusable after a failed write") from self._failed
+        done = asyncio.get_running_loop().create_future()
+        self._pending.append((data, value, done))
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush())
+        await done
+        
+    async def _flush(self):
+        """Drain the queue: one write and one fsync per batch."""
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    if self._failed is not None:
+                        raise RuntimeError("WAL is unusable after a failed write") from self._failed
+                    await asyncio.to_thread(self._write_sync, b''.join(d for d, _, _ in batch))
+                except Exception as exc:
+                    for _, _, done in batch:
+                        if not done.done():
+                            done.set_exception(exc)
+                    continue
+                self._cached_value = batch[-1][1]
+                for _, _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+        finally:
+            self._flush_task = None
+        
+    async def close(self):
+        """Close the append descriptor once queued entries are flushed."""
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            
+    async def append(
+        self,
+        operation: str,
+        value: int,
+        scar_id: str,
+        element_hash: Optional[bytes] = None,
+        prime: Optional[int] = None
+    ) -> bool:
         """
-        Atomic write with async fsync.
-        Uses asyncio.Lock for thread safety.
+        Durable write: returns once the entry is fsynced.
+        Sequence numbers are taken before the first await, so entries land
+        in the file in call order even when group-committed.
+        When given, the element hash and its prime are stored so that
+        replay does not have to repeat the prime search.
         """
-        async with self._lock:
-            timestamp = datetime.utcnow().isoformat()
-            self._cached_seq += 1
-            entry = f"{self._cached_seq}:{operation}:{value}:{timestamp}:{scar_id}\n"
+        timestamp_ns = time.time_ns()
+        entry = self._format_entry(operation, value, scar_id, element_hash, prime, timestamp_ns)
+        await self._write(entry, value)
+        return True
             
-            # Async write
-            async with aiofiles.open(self.path, 'a') as f:
-                await f.write(entry)
-                await f.flush()
-                # fsync in separate thread to avoid blocking event loop
-                await asyncio.to_thread(os.fsync, f.fileno())
+    async def append_many(
+        self,
+        operation: str,
+        value: int,
+        records: List[Tuple[str, bytes, int]]
+    ) -> bool:
+        """
+        Write one entry per (scar_id, element_hash, prime) record with a
+        single fsync. All entries carry the value after the whole batch.
+        """
+        timestamp_ns = time.time_ns()
+        entries = [
+            self._format_entry(operation, value, scar_id, element_hash, prime, timestamp_ns)
+            for scar_id, element_hash, prime in records
+        ]
+        await self._write(b''.join(entries), value)
+        return True
             
-            self._cached_value = value
-            return True
+    def _read_last_entry(self) -> Optional[Dict]:
+        """
+        Decode the last record by seeking to it through the trailing length,
+        so recovery cost does not grow with the WAL. A torn or corrupt tail
+        falls back to a full scan.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            entry = _read_tail(f, size)
+            if entry is not None:
+                return entry
+            f.seek(0)
+            entries, _ = _scan_records(f.read())
+        return entries[-1] if entries else None
             
     async def recover(self) -> Tuple[int, int, Optional[str]]:
         """
         Recover last value and seq after crash.
         Returns (seq, value, last_scar_id)
         """
-        if not os.path.exists(self.path):
-            return 0, 0, None
-            
-        async with aiofiles.open(self.path, 'r') as f:
-            content = await f.read()
-            
-        lines = content.strip().split('\n')
-        # Skip comments
-        data_lines = [l for l in lines if l and not l.startswith('#')]
-        
-        if not data_lines:
+        last = await asyncio.to_thread(self._read_last_entry)
+        if last is None:
             return 0, 0, None
             
-        last = data_lines[-1].strip().split(':')
-        seq = int(last[0])
-        value = int(last[2])
-        scar_id = last[4] if len(last) > 4 else None
+        return last["seq"], last["value"], last["scar_id"]
         
-        return seq, value, scar_id
+    async def recover_operations(self) -> List[Tuple[str, Optional[bytes], Optional[int]]]:
+        """Return (operation, element_hash, prime) for every entry, in order."""
+        return [
+            (e["operation"], e["element_hash"], e["prime"])
+            for e in await self._read_entries()
+        ]
         
     @property
     def current_value(self) -> int:
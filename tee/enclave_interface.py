@@ -6,6 +6,8 @@ Supports soft-mode for development.
 import warnings
 from typing import Dict
 
+from cryptography.hazmat.primitives.asymmetric import rsa
+
 
 class AccumulatorEnclave:
     """Interface to TEE with soft-mode fallback."""
@@ -27,13 +29,12 @@ class AccumulatorEnclave:
     def create_accumulator(self) -> Dict:
         """Create new accumulator."""
         if self.soft_mode:
-            # Generate locally (INSECURE!)
-            from Crypto.PublicKey import RSA
-            key = RSA.generate(2048)
+            # Generate locally (INSECURE!) - OpenSSL prime generation
+            numbers = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_numbers()
             return {
-                'N': key.n,
+                'N': numbers.public_numbers.n,
                 'g': 65537,
-                'phi': (key.p - 1) * (key.q - 1),
+                'phi': (numbers.p - 1) * (numbers.q - 1),
                 'attestation': 'SOFT_MODE_NO_ATTESTATION'
             }
         else:
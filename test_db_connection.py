@@ -10,7 +10,17 @@ import uuid
 import json
 from datetime import datetime
 
-async def test_postgres():
+SCAR_COLUMNS = (
+    'id', 'genesis_ref', 'incident_type', 'cognitive_basis',
+    'collision_mode', 'pre_state_hash', 'post_state_hash',
+    'deformation_vector', 'entropy_score', 'ontological_drift',
+    'timestamp', 'operator_id'
+)
+
+# Parsed once; clients borrow connections from it
+REDIS_POOL = redis.ConnectionPool.from_url("redis://localhost:6379/0")
+
+async def test_postgres(count: int = 3):
     print("\n📦 Testing PostgreSQL...")
     try:
         conn = await asyncpg.connect(
@@ -21,33 +31,20 @@ async def test_postgres():
             port=5432
         )
         
-        # Insert test scar
-        scar_id = uuid.uuid4()
-        await conn.execute('''
-            INSERT INTO scars (
-                id, genesis_ref, incident_type, cognitive_basis,
-                collision_mode, pre_state_hash, post_state_hash,
-                deformation_vector, entropy_score, ontological_drift,
-                timestamp, operator_id
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-        ''',
-            scar_id,
-            'test_genesis',
-            'test',
-            'ru',
-            False,
-            'pre_hash',
-            'post_hash',
-            '{}',
-            0.5,
-            0.1,
-            datetime.utcnow(),
-            'test_operator'
-        )
+        # Insert test scars in one COPY (the bulk ingestion path)
+        now = datetime.utcnow()
+        records = [
+            (uuid.uuid4(), 'test_genesis', 'test', 'ru', False,
+             'pre_hash', 'post_hash', '{}', 0.5, 0.1, now, 'test_operator')
+            for _ in range(count)
+        ]
+        async with conn.transaction():
+            await conn.copy_records_to_table('scars', records=records, columns=SCAR_COLUMNS)
         
         # Read back
-        row = await conn.fetchrow("SELECT * FROM scars WHERE id = $1", scar_id)
-        print(f"✅ PostgreSQL: Scar {row['id']} created")
+        ids = [r[0] for r in records]
+        rows = await conn.fetch("SELECT id FROM scars WHERE id = ANY($1::uuid[])", ids)
+        print(f"✅ PostgreSQL: {len(rows)} scars created")
         
         await conn.close()
         return True
@@ -58,12 +55,11 @@ async def test_postgres():
 async def test_redis():
     print("\n📦 Testing Redis...")
     try:
-        client = redis.from_url("redis://localhost:6379/0")
+        client = redis.Redis(connection_pool=REDIS_POOL)
         
-        # Set test data
+        # Set test data with its TTL in one round trip
         test_key = f"test:{uuid.uuid4()}"
-        await client.set(test_key, "SCM test data")
-        await client.expire(test_key, 10)
+        await client.set(test_key, "SCM test data", ex=10)
         
         # Read back
         value = await client.get(test_key)
@@ -0,0 +1,13 @@
+"""
+Shared fixtures.
+"""
+
+import pytest
+
+from scm.crypto.hybrid import generate_hybrid_keypair
+
+
+@pytest.fixture(scope="session")
+def hybrid_kp():
+    """One hybrid Ed25519 + Dilithium5 key pair per session (per worker under xdist)"""
+    return generate_hybrid_keypair()
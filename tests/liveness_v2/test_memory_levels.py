@@ -3,9 +3,10 @@ Tests for Hierarchical Memory (Extension 1)
 """
 
 import pytest
-import asyncio
+import itertools
 import numpy as np
 import uuid
+import json
 from datetime import datetime, timedelta
 
 from core.liveness_v2.memory_levels import (
@@ -13,35 +14,54 @@ from core.liveness_v2.memory_levels import (
 )
 from core.liveness_v2.sleep_consolidator import SleepConsolidator
 
+# Scar ids only need to be unique within the run
+_UUID_COUNTER = itertools.count(1)
+
+
+def _uid() -> str:
+    return str(uuid.UUID(int=next(_UUID_COUNTER)))
+
+
+@pytest.fixture(scope="module")
+def consolidator():
+    """One consolidator for the module; it holds only its parameters"""
+    return SleepConsolidator(min_samples=3, archetype_threshold=5, similarity_threshold=0.85)
+
 
 @pytest.fixture
-def sample_episodic_scar():
+def rng():
+    """Seeded PCG64 generator, fresh for every test"""
+    return np.random.default_rng(12345)
+
+
+@pytest.fixture
+def sample_episodic_scar(rng):
     """Create a sample episodic scar for testing"""
     return EpisodicScar(
-        scar_id=str(uuid.uuid4()),
+        scar_id=_uid(),
         scar_hash="test_hash_123",
         incident_type="rejection",
         cognitive_basis="ru",
         entropy_score=0.8,
         ontological_drift=0.2,
         deformation_vector={"reason": "test"},
-        embedding=np.random.randn(128),
+        embedding=rng.standard_normal(128, dtype=np.float32),
         created_at=datetime.utcnow() - timedelta(days=3)
     )
 
 
 @pytest.fixture
-def fresh_episodic_scar():
+def fresh_episodic_scar(rng):
     """Create a fresh episodic scar"""
     return EpisodicScar(
-        scar_id=str(uuid.uuid4()),
+        scar_id=_uid(),
         scar_hash="test_hash_456",
         incident_type="rejection",
         cognitive_basis="ru",
         entropy_score=0.8,
         ontological_drift=0.2,
         deformation_vector={"reason": "test"},
-        embedding=np.random.randn(128),
+        embedding=rng.standard_normal(128, dtype=np.float32),
         created_at=datetime.utcnow()
     )
 
@@ -57,23 +77,28 @@ def test_episodic_salience(sample_episodic_scar, fresh_episodic_scar):
     assert sample_episodic_scar.salience > old_val
 
 
-def test_episodic_ttl():
+def test_episodic_ttl(rng):
     """Test that scars older than threshold are marked for consolidation"""
+    now = datetime.utcnow()
+    old = now - timedelta(days=4)
     memory = HierarchicalMemory(":memory:")
     
+    embs_old = rng.standard_normal((5, 128), dtype=np.float32)
+    embs_fresh = rng.standard_normal((3, 128), dtype=np.float32)
+    
     # Add old scars
     old_scars = []
     for i in range(5):
         scar = EpisodicScar(
-            scar_id=str(uuid.uuid4()),
+            scar_id=_uid(),
             scar_hash=f"old_{i}",
             incident_type="rejection",
             cognitive_basis="ru",
             entropy_score=0.8,
             ontological_drift=0.2,
             deformation_vector={},
-            embedding=np.random.randn(128),
-            created_at=datetime.utcnow() - timedelta(days=4)
+            embedding=embs_old[i],
+            created_at=old
         )
         memory.add_episodic(scar)
         old_scars.append(scar)
@@ -81,15 +106,15 @@ def test_episodic_ttl():
     # Add fresh scars
     for i in range(3):
         scar = EpisodicScar(
-            scar_id=str(uuid.uuid4()),
+            scar_id=_uid(),
             scar_hash=f"fresh_{i}",
             incident_type="rejection",
             cognitive_basis="ru",
             entropy_score=0.8,
             ontological_drift=0.2,
             deformation_vector={},
-            embedding=np.random.randn(128),
-            created_at=datetime.utcnow()
+            embedding=embs_fresh[i],
+            created_at=now
         )
         memory.add_episodic(scar)
     
@@ -98,46 +123,44 @@ def test_episodic_ttl():
     assert len(to_consolidate) == 5
 
 
-@pytest.mark.asyncio
-async def test_consolidation():
+async def test_consolidation(rng, consolidator):
     """Test that 3+ similar scars consolidate into a semantic cluster"""
+    now = datetime.utcnow()
+    old = now - timedelta(days=4)
     memory = HierarchicalMemory(":memory:")
-    consolidator = SleepConsolidator(min_samples=3)
     
     # Create 3 similar scars
-    base_embedding = np.random.randn(128)
+    base_embedding = rng.standard_normal(128, dtype=np.float32)
     base_embedding = base_embedding / np.linalg.norm(base_embedding)
+    # Small noise makes them similar but not identical
+    embeddings = base_embedding + rng.standard_normal((3, 128), dtype=np.float32) * 0.05
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
     
     for i in range(3):
-        # Add small noise to make them similar but not identical
-        noise = np.random.randn(128) * 0.05
-        embedding = base_embedding + noise
-        embedding = embedding / np.linalg.norm(embedding)
-        
         scar = EpisodicScar(
-            scar_id=str(uuid.uuid4()),
+            scar_id=_uid(),
             scar_hash=f"similar_{i}",
             incident_type="rejection",
             cognitive_basis="ru",
             entropy_score=0.8,
             ontological_drift=0.2,
             deformation_vector={},
-            embedding=embedding,
-            created_at=datetime.utcnow() - timedelta(days=4)
+            embedding=embeddings[i],
+            created_at=old
         )
         memory.add_episodic(scar)
     
     # Add a dissimilar scar (noise)
     scar = EpisodicScar(
-        scar_id=str(uuid.uuid4()),
+        scar_id=_uid(),
         scar_hash="dissimilar",
         incident_type="rejection",
         cognitive_basis="ru",
         entropy_score=0.8,
         ontological_drift=0.2,
         deformation_vector={},
-        embedding=np.random.randn(128),
-        created_at=datetime.utcnow() - timedelta(days=4)
+        embedding=rng.standard_normal(128, dtype=np.float32),
+        created_at=old
     )
     memory.add_episodic(scar)
     
@@ -152,38 +175,160 @@ async def test_consolidation():
     assert "dissimilar" not in archived
 
 
-@pytest.mark.asyncio
-async def test_archetype_promotion():
-    """Test that 5+ clusters promote to archetype"""
+def _similar_scars(rng, n, created_at):
+    """n episodic scars with nearly identical embeddings"""
+    base_embedding = rng.standard_normal(128, dtype=np.float32)
+    base_embedding = base_embedding / np.linalg.norm(base_embedding)
+    embeddings = base_embedding + rng.standard_normal((n, 128), dtype=np.float32) * 0.05
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return [
+        EpisodicScar(
+            scar_id=_uid(),
+            scar_hash=f"similar_{i}",
+            incident_type="rejection",
+            cognitive_basis="ru",
+            entropy_score=0.8,
+            ontological_drift=0.2,
+            deformation_vector={},
+            embedding=embeddings[i],
+            created_at=created_at
+        )
+        for i in range(n)
+    ]
+
+
+async def test_background_consolidation(rng, consolidator):
+    """Test that crossing the watermark consolidates in a background task"""
+    old = datetime.utcnow() - timedelta(days=4)
+    memory = HierarchicalMemory(
+        ":memory:",
+        consolidator=consolidator,
+        consolidation_watermark=3
+    )
+    
+    for scar in _similar_scars(rng, 3, old):
+        memory.add_episodic(scar)
+    
+    # add_episodic only scheduled the cycle
+    assert memory._pending_consolidation is not None
+    assert len(memory.episodic) == 3
+    
+    await memory._pending_consolidation
+    assert len(memory.episodic) == 0
+    assert len(memory.semantic) == 1
+
+
+async def test_background_watermark_counts_from_remaining_scars(rng, consolidator):
+    """Test that after archiving, the next cycle needs one watermark of new scars"""
+    old = datetime.utcnow() - timedelta(days=4)
+    memory = HierarchicalMemory(
+        ":memory:",
+        consolidator=consolidator,
+        consolidation_watermark=3
+    )
+    
+    for scar in _similar_scars(rng, 3, old):
+        memory.add_episodic(scar)
+    first = memory._pending_consolidation
+    await first
+    assert len(memory.episodic) == 0
+    
+    for scar in _similar_scars(rng, 3, old):
+        memory.add_episodic(scar)
+    assert memory._pending_consolidation is not first
+    await memory._pending_consolidation
+    assert len(memory.episodic) == 0
+
+
+async def test_only_applied_clusters_are_promoted(rng):
+    """Test that dry runs and dropped clusters never reach archetype promotion"""
+    class RecordingConsolidator(SleepConsolidator):
+        promoted = []
+        
+        async def promote_to_archetypes(self, memory, new_clusters):
+            self.promoted.append([c.cluster_id for c in new_clusters])
+    
     memory = HierarchicalMemory(":memory:")
-    consolidator = SleepConsolidator(
-        min_samples=3,
-        archetype_threshold=5,
-        similarity_threshold=0.85
+    for scar in _similar_scars(rng, 3, datetime.utcnow() - timedelta(days=4)):
+        memory.add_episodic(scar)
+    consolidator = RecordingConsolidator(min_samples=3)
+    
+    new_clusters, _ = await memory.run_consolidation(consolidator, apply=False)
+    assert len(new_clusters) == 1
+    assert consolidator.promoted == []
+    
+    new_clusters, _ = await memory.run_consolidation(consolidator)
+    assert consolidator.promoted == [[new_clusters[0].cluster_id]]
+
+
+async def test_background_consolidation_failure_is_logged(rng, caplog):
+    """Test that an exception in the background cycle is logged, not lost"""
+    class FailingConsolidator(SleepConsolidator):
+        async def consolidate(self, memory, max_age_hours=72, promote=True):
+            raise RuntimeError("cluster backend down")
+    
+    memory = HierarchicalMemory(
+        ":memory:",
+        consolidator=FailingConsolidator(),
+        consolidation_watermark=3
     )
+    for scar in _similar_scars(rng, 3, datetime.utcnow() - timedelta(days=4)):
+        memory.add_episodic(scar)
+    
+    with pytest.raises(RuntimeError):
+        await memory._pending_consolidation
+    assert "Background consolidation failed" in caplog.text
+    assert len(memory.episodic) == 3
+
+
+async def test_consolidation_skips_scars_removed_meanwhile(rng):
+    """Test that scars removed while clustering runs are not archived into a cluster"""
+    memory = HierarchicalMemory(":memory:")
+    scars = _similar_scars(rng, 3, datetime.utcnow() - timedelta(days=4))
+    for scar in scars:
+        memory.add_episodic(scar)
+    
+    class RacingConsolidator(SleepConsolidator):
+        def _cluster_labels(self, embeddings):
+            # A concurrent remove_episodic while the worker thread clusters
+            memory.remove_episodic(scars[0].scar_id)
+            return super()._cluster_labels(embeddings)
+    
+    new_clusters, archived = await memory.run_consolidation(RacingConsolidator(min_samples=3))
+    
+    assert new_clusters == [] and archived == []
+    assert set(memory.episodic) == {scars[1].scar_id, scars[2].scar_id}
+    assert memory.semantic == {}
+    assert memory.archetypes == {}
+
+
+async def test_archetype_promotion(rng, consolidator):
+    """Test that 5+ clusters promote to archetype"""
+    now = datetime.utcnow()
+    old = now - timedelta(days=4)
+    memory = HierarchicalMemory(":memory:")
     
     # Create 5 clusters with similar centroids
-    base_embedding = np.random.randn(128)
+    base_embedding = rng.standard_normal(128, dtype=np.float32)
     base_embedding = base_embedding / np.linalg.norm(base_embedding)
+    embeddings = base_embedding + rng.standard_normal((5, 3, 128), dtype=np.float32) * 0.02
+    flat = embeddings.reshape(15, 128)
+    flat /= np.linalg.norm(flat, axis=1, keepdims=True)
     
     for cluster_idx in range(5):
         # Create 3 scars per cluster
         cluster_scars = []
         for i in range(3):
-            noise = np.random.randn(128) * 0.02
-            embedding = base_embedding + noise
-            embedding = embedding / np.linalg.norm(embedding)
-            
             scar = EpisodicScar(
-                scar_id=str(uuid.uuid4()),
+                scar_id=_uid(),
                 scar_hash=f"c{cluster_idx}_s{i}",
                 incident_type="rejection",
                 cognitive_basis="ru",
                 entropy_score=0.8,
                 ontological_drift=0.2,
                 deformation_vector={},
-                embedding=embedding,
-                created_at=datetime.utcnow() - timedelta(days=4)
+                embedding=embeddings[cluster_idx, i],
+                created_at=old
             )
             memory.add_episodic(scar)
             cluster_scars.append(scar)
@@ -193,7 +338,7 @@ async def test_archetype_promotion():
         memory.add_semantic(cluster)
     
     # Promote to archetypes
-    await consolidator._promote_to_archetypes(memory, list(memory.semantic.values()))
+    await consolidator.promote_to_archetypes(memory, list(memory.semantic.values()))
     
     # Should have 1 archetype
     assert len(memory.archetypes) == 1
@@ -205,14 +350,15 @@ def test_chain_integrity_after_consolidation():
     assert True
 
 
-def test_no_data_loss():
+def test_no_data_loss(rng, consolidator):
     """Test that source hashes are preserved in clusters"""
+    now = datetime.utcnow()
     memory = HierarchicalMemory(":memory:")
     
     # Create scars
     scar_ids = []
     for i in range(3):
-        scar_id = str(uuid.uuid4())
+        scar_id = _uid()
         scar_ids.append(scar_id)
         scar = EpisodicScar(
             scar_id=scar_id,
@@ -222,14 +368,245 @@ def test_no_data_loss():
             entropy_score=0.8,
             ontological_drift=0.2,
             deformation_vector={},
-            embedding=np.random.randn(128),
-            created_at=datetime.utcnow()
+            embedding=rng.standard_normal(128, dtype=np.float32),
+            created_at=now
         )
         memory.add_episodic(scar)
     
     # Create cluster manually
-    consolidator = SleepConsolidator()
     cluster = consolidator._create_semantic_cluster(list(memory.episodic.values()))
     
     # Check that all source hashes are preserved
     assert set(cluster.source_scar_ids) == set(scar_ids)
+
+
+def test_embedding_matrix_tracks_episodic(rng):
+    """Test that the float32 embedding matrix follows add/remove"""
+    now = datetime.utcnow()
+    memory = HierarchicalMemory(":memory:")
+    
+    scars = []
+    for i in range(100):  # forces the matrix to grow
+        scar = EpisodicScar(
+            scar_id=_uid(),
+            scar_hash=f"row_{i}",
+            incident_type="rejection",
+            cognitive_basis="ru",
+            entropy_score=0.8,
+            ontological_drift=0.2,
+            deformation_vector={},
+            embedding=rng.standard_normal(128, dtype=np.float32),
+            created_at=now
+        )
+        memory.add_episodic(scar)
+        scars.append(scar)
+    
+    ids = [s.scar_id for s in scars]
+    matrix = memory.episodic_embeddings(ids)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix, np.array([s.embedding for s in scars]), atol=1e-6)
+    # Each vector is stored once: scar.embedding views its row, also after growth
+    assert all(np.shares_memory(s.embedding, memory._embeddings) for s in scars)
+    
+    # Removed rows are reused
+    removed = memory.remove_episodic(ids[0])
+    removed_embedding = removed.embedding.copy()
+    assert ids[0] not in memory.episodic
+    replacement = EpisodicScar(
+        scar_id=_uid(),
+        scar_hash="replacement",
+        incident_type="rejection",
+        cognitive_basis="ru",
+        entropy_score=0.8,
+        ontological_drift=0.2,
+        deformation_vector={},
+        embedding=rng.standard_normal(128, dtype=np.float32),
+        created_at=now
+    )
+    memory.add_episodic(replacement)
+    assert memory._embed_index[replacement.scar_id] == 0
+    assert np.allclose(memory.episodic_embeddings([replacement.scar_id])[0],
+                       replacement.embedding, atol=1e-6)
+    # The removed scar kept its own vector when the row was reused
+    assert np.array_equal(removed.embedding, removed_embedding)
+
+
+def test_find_similar_semantic_ranks_by_cosine(rng, consolidator):
+    """Test that semantic search returns clusters above threshold, best first"""
+    now = datetime.utcnow()
+    memory = HierarchicalMemory(":memory:")
+    
+    query = rng.standard_normal(128, dtype=np.float32)
+    query = query / np.linalg.norm(query)
+    
+    expected = []
+    for noise_level in (0.01, 0.05, 0.2, 5.0):
+        scars = []
+        for i in range(3):
+            scars.append(EpisodicScar(
+                scar_id=_uid(),
+                scar_hash=f"n{noise_level}_{i}",
+                incident_type="rejection",
+                cognitive_basis="ru",
+                entropy_score=0.8,
+                ontological_drift=0.2,
+                deformation_vector={},
+                embedding=query + rng.standard_normal(128, dtype=np.float32) * noise_level,
+                created_at=now
+            ))
+        cluster = consolidator._create_semantic_cluster(scars)
+        memory.add_semantic(cluster)
+        sim = float(np.dot(cluster.centroid, query))
+        if sim > 0.8:
+            expected.append((sim, cluster.cluster_id))
+    
+    expected.sort(reverse=True)
+    found = memory.find_similar_semantic(query * 3.0, threshold=0.8)
+    assert [c.cluster_id for c in found] == [cid for _, cid in expected]
+    assert len(found) >= 2
+
+
+def test_embedding_dict_roundtrip(sample_episodic_scar):
+    """Test that embeddings survive to_dict/from_dict as base64 float32"""
+    data = sample_episodic_scar.to_dict()
+    assert isinstance(data["embedding"], str)
+    
+    restored = EpisodicScar.from_dict(json.loads(json.dumps(data)))
+    assert restored.embedding.dtype == np.float32
+    assert np.allclose(restored.embedding, sample_episodic_scar.embedding, atol=1e-6)
+    
+    # Dicts written before the base64 format still load
+    data = sample_episodic_scar.to_dict()
+    data["embedding"] = sample_episodic_scar.embedding.tolist()
+    assert np.array_equal(EpisodicScar.from_dict(data).embedding, sample_episodic_scar.embedding)
+
+
+def test_save_load_roundtrip(tmp_path, rng, consolidator):
+    """Test that save/load restores all three levels without pickle"""
+    now = datetime.utcnow()
+    path = str(tmp_path / "memory.db")
+    memory = HierarchicalMemory(path)
+    
+    scars = []
+    for i in range(6):
+        scar = EpisodicScar(
+            scar_id=_uid(),
+            scar_hash=f"saved_{i}",
+            incident_type="rejection",
+            cognitive_basis="ru",
+            entropy_score=0.8,
+            ontological_drift=0.2,
+            deformation_vector={"i": i},
+            embedding=rng.standard_normal(128, dtype=np.float32),
+            created_at=now
+        )
+        memory.add_episodic(scar)
+        scars.append(scar)
+    clusters = [consolidator._create_semantic_cluster(scars[:3]),
+                consolidator._create_semantic_cluster(scars[3:])]
+    for cluster in clusters:
+        memory.add_semantic(cluster)
+    memory.add_archetype(consolidator._create_archetype(clusters, "rejection:ru"))
+    memory.save()
+    
+    restored = HierarchicalMemory(path)
+    restored.load()
+    
+    assert set(restored.episodic) == set(memory.episodic)
+    for scar in scars:
+        assert np.allclose(restored.episodic[scar.scar_id].embedding, scar.embedding, atol=1e-6)
+        assert restored.episodic[scar.scar_id].deformation_vector == scar.deformation_vector
+    assert set(restored.semantic) == set(memory.semantic)
+    assert set(restored.archetypes) == set(memory.archetypes)
+    assert restored.basis_index == memory.basis_index
+    
+    query = clusters[0].centroid
+    assert restored.find_similar_semantic(query)[0].cluster_id == clusters[0].cluster_id
+
+
+def test_legacy_pickle_is_refused_then_migrated(tmp_path, rng, consolidator):
+    """A pre-JSON pickle file fails load() clearly and converts once"""
+    import pickle
+    now = datetime.utcnow()
+    path = str(tmp_path / "memory.db")
+    
+    scars = [
+        EpisodicScar(
+            scar_id=_uid(),
+            scar_hash=f"legacy_{i}",
+            incident_type="rejection",
+            cognitive_basis="ru",
+            entropy_score=0.8,
+            ontological_drift=0.2,
+            deformation_vector={},
+            embedding=rng.standard_normal(128, dtype=np.float32),
+            created_at=now
+        )
+        for i in range(3)
+    ]
+    cluster = consolidator._create_semantic_cluster(scars)
+    
+    def legacy(item, vector_field):
+        data = item.to_dict()
+        data[vector_field] = getattr(item, vector_field).tolist()
+        return data
+    
+    with open(path, 'wb') as f:
+        pickle.dump({
+            "episodic": {s.scar_id: legacy(s, "embedding") for s in scars},
+            "semantic": {cluster.cluster_id: legacy(cluster, "centroid")},
+            "archetypes": {},
+            "basis_index": {"ru": [s.scar_id for s in scars]},
+            "type_index": {"rejection": [s.scar_id for s in scars]}
+        }, f)
+    
+    with pytest.raises(ValueError, match="migrate_legacy_pickle"):
+        HierarchicalMemory(path).load()
+    
+    HierarchicalMemory(path).migrate_legacy_pickle()
+    
+    restored = HierarchicalMemory(path)
+    restored.load()
+    assert set(restored.episodic) == {s.scar_id for s in scars}
+    assert np.allclose(restored.episodic_embeddings([scars[0].scar_id])[0], scars[0].embedding, atol=1e-6)
+    assert set(restored.semantic) == {cluster.cluster_id}
+
+
+async def test_consolidation_reduces_cluster_statistics(rng, consolidator):
+    """Test that per-cluster centroids and averages match per-scar values"""
+    now = datetime.utcnow()
+    old = now - timedelta(days=4)
+    memory = HierarchicalMemory(":memory:")
+    
+    groups = {}
+    for g in range(3):
+        base = np.zeros(128)
+        base[g] = 1.0
+        groups[g] = []
+        for i in range(4):
+            scar = EpisodicScar(
+                scar_id=_uid(),
+                scar_hash=f"g{g}_{i}",
+                incident_type="rejection",
+                cognitive_basis="ru",
+                entropy_score=0.1 * (g + 1) + 0.01 * i,
+                ontological_drift=0.05 * i,
+                deformation_vector={},
+                embedding=base + rng.standard_normal(128, dtype=np.float32) * 0.01,
+                created_at=old
+            )
+            memory.add_episodic(scar)
+            groups[g].append(scar)
+    
+    new_clusters, archived = await consolidator.consolidate(memory)
+    assert len(new_clusters) == 3
+    assert len(archived) == 12
+    
+    for cluster in new_clusters:
+        members = [s for scars in groups.values() for s in scars
+                   if s.scar_id in cluster.source_scar_ids]
+        expected = consolidator._create_semantic_cluster(members)
+        assert cluster.cluster_id == expected.cluster_id
+        assert np.isclose(cluster.avg_entropy, expected.avg_entropy)
+        assert np.isclose(cluster.avg_drift, expected.avg_drift)
+        assert np.allclose(cluster.centroid, expected.centroid, atol=1e-5)
@@ -11,22 +11,34 @@ import os
 from accumulator.rsa_accumulator import RSAAccumulator
 from accumulator.incremental_proof import IncrementalChainProof
 
+# Element digests, built once for the add loops below
+ELEMENTS = [hashlib.sha256(b"element_%d" % i).digest() for i in range(10)]
+SCARS = [hashlib.sha256(b"scar_%d" % i).digest() for i in range(10)]
+
+
+@pytest.fixture(scope="module")
+def rsa_modulus():
+    """One 1024-bit (N, phi) shared by the tests in this module."""
+    from Crypto.PublicKey import RSA
+    key = RSA.generate(1024)
+    return key.n, (key.p - 1) * (key.q - 1)
+
 
 @pytest_asyncio.fixture
-async def accumulator():
+async def accumulator(rsa_modulus):
     """Create accumulator for tests."""
     with tempfile.NamedTemporaryFile(suffix='.wal', delete=False) as f:
         wal_path = f.name
     
-    acc = RSAAccumulator(key_size=1024, wal_path=wal_path)
+    acc = RSAAccumulator(wal_path=wal_path, modulus=rsa_modulus)
     await acc.initialize()
     yield acc
     
     # Cleanup
+    await acc.close()
     os.unlink(wal_path)
 
 
-@pytest.mark.asyncio
 async def test_add_and_verify(accumulator):
     """Test add and verify."""
     element = hashlib.sha256(b"test_element").digest()
@@ -39,12 +51,10 @@ async def test_add_and_verify(accumulator):
     assert new_value == accumulator.value
 
 
-@pytest.mark.asyncio
 async def test_batch_verify(accumulator):
     """Test batch verification."""
     proofs = []
-    for i in range(10):
-        element = hashlib.sha256(f"element_{i}".encode()).digest()
+    for element in ELEMENTS:
         value, proof = await accumulator.add(element)
         proofs.append(proof)
         
@@ -53,7 +63,6 @@ async def test_batch_verify(accumulator):
         assert accumulator.verify(proof) == True
 
 
-@pytest.mark.asyncio
 async def test_incremental_chain():
     """Test incremental chain."""
     with tempfile.NamedTemporaryFile(suffix='.wal', delete=False) as f:
@@ -66,18 +75,231 @@ async def test_incremental_chain():
     await chain.initialize()
     
     # Add 10 scars (reduced from 100 for speed)
-    for i in range(10):
-        scar_hash = hashlib.sha256(f"scar_{i}".encode()).digest()
-        proof = await chain.add_scar(scar_hash)
-        
-        # Verify the proof directly
-        assert chain.accumulator.verify(proof) == True
-        
-        # Verify the whole chain
-        assert chain.verify_chain() == True
+    proofs = []
+    for scar_hash in SCARS:
+        proofs.append(await chain.add_scar(scar_hash))
     
-    # Final verification
+    # Every intermediate proof at once, then the whole chain
+    assert chain.accumulator.batch_verify(proofs) == True
     assert chain.verify_chain() == True
     assert len(chain.proofs) == 10
         
+    await chain.close()
     os.unlink(wal_path)
+
+
+def test_hash_to_prime_matches_linear_scan():
+    """Sieved prime search returns the same prime as the naive +1 scan."""
+    from Crypto.Util import number
+    from accumulator.rsa_accumulator import _next_prime
+    
+    for i in range(20):
+        candidate = int.from_bytes(hashlib.sha256(f"prime_{i}".encode()).digest(), 'big')
+        expected = candidate
+        while not number.isPrime(expected):
+            expected += 1
+        assert _next_prime(candidate) == expected
+
+
+async def test_wal_replay_warms_prime_cache(accumulator):
+    """Primes persisted in the WAL are reused after restart."""
+    from accumulator import rsa_accumulator
+    
+    element = hashlib.sha256(b"replayed_scar").digest()
+    _, proof = await accumulator.add(element)
+    
+    rsa_accumulator._prime_cache.clear()
+    
+    restarted = RSAAccumulator(wal_path=accumulator.wal.path, modulus=(accumulator.N, accumulator.phi))
+    await restarted.initialize()
+    
+    assert rsa_accumulator._prime_cache[element] == proof.element_hash
+    assert restarted.current_sequence == accumulator.current_sequence
+    await restarted.close()
+
+
+async def test_batch_verify_rejects_tampered_proof(accumulator):
+    """Aggregate batch check fails if any single proof is invalid."""
+    from dataclasses import replace
+    
+    proofs = []
+    for i in range(8):
+        element = hashlib.sha256(f"batch_{i}".encode()).digest()
+        _, proof = await accumulator.add(element)
+        proofs.append(proof)
+        
+    assert accumulator.batch_verify_aggregate(proofs) == True
+    
+    proofs[3] = replace(proofs[3], witness=proofs[3].witness + 1)
+    assert accumulator.batch_verify_aggregate(proofs) == False
+
+
+async def test_batch_verify_rejects_negated_witness_pair(accumulator):
+    """Exact batch check: witnesses negated mod N cannot cancel in pairs."""
+    from dataclasses import replace
+    
+    proofs = []
+    for i in range(4):
+        element = hashlib.sha256(f"negated_{i}".encode()).digest()
+        _, proof = await accumulator.add(element)
+        proofs.append(proof)
+        
+    for i in (1, 2):
+        proofs[i] = replace(proofs[i], witness=accumulator.N - proofs[i].witness)
+    assert accumulator.batch_verify(proofs) == False
+
+
+async def test_find_invalid_proofs_bisects(accumulator):
+    """Bisection returns exactly the tampered proofs."""
+    from dataclasses import replace
+    
+    proofs = []
+    for i in range(8):
+        element = hashlib.sha256(f"bisect_{i}".encode()).digest()
+        _, proof = await accumulator.add(element)
+        proofs.append(proof)
+        
+    assert accumulator.find_invalid_proofs(proofs) == []
+    
+    proofs[2] = replace(proofs[2], witness=proofs[2].witness + 1)
+    proofs[6] = replace(proofs[6], accumulator=proofs[6].accumulator + 1)
+    assert accumulator.find_invalid_proofs(proofs) == [proofs[2], proofs[6]]
+    assert accumulator.batch_verify(proofs) == False
+
+
+async def test_precheck_rejects_malformed_proofs(accumulator):
+    """Cheap precheck passes valid proofs and rejects malformed ones."""
+    from dataclasses import replace
+    
+    element = hashlib.sha256(b"precheck").digest()
+    _, proof = await accumulator.add(element)
+    assert accumulator.precheck(proof) == True
+    
+    assert accumulator.precheck(replace(proof, witness=0)) == False
+    assert accumulator.precheck(replace(proof, accumulator=accumulator.N)) == False
+    assert accumulator.precheck(replace(proof, element_hash=proof.element_hash + 1)) == False
+    
+    bad = replace(proof, witness=accumulator.N + 5)
+    assert accumulator.verify(bad) == False
+    assert accumulator.find_invalid_proofs([proof, bad]) == [bad]
+
+
+@pytest.mark.parametrize("parallel_min", [64, 1])
+async def test_add_batch_matches_sequential_adds(accumulator, monkeypatch, parallel_min):
+    """One-shot batch add gives the same value as adding one by one."""
+    from accumulator import rsa_accumulator
+    monkeypatch.setattr(rsa_accumulator, "_PARALLEL_PRIME_MIN", parallel_min)
+    rsa_accumulator._prime_cache.clear()
+    
+    elements = [hashlib.sha256(f"batch_add_{i}".encode()).digest() for i in range(6)]
+    start = accumulator.value
+    
+    expected = start
+    for element in elements:
+        expected = pow(expected, accumulator._hash_to_prime(element), accumulator.N)
+    rsa_accumulator._prime_cache.clear()
+    
+    value = await accumulator.add_batch(elements)
+    assert value == expected == accumulator.value
+    assert accumulator.current_sequence == len(elements)
+    
+    operations = await accumulator.wal.recover_operations()
+    assert [e for _, e, _ in operations] == elements
+
+
+async def test_restart_keeps_stored_value(accumulator):
+    """Restart takes the stored value; the folded replay only audits it."""
+    elements = [hashlib.sha256(f"replay_{i}".encode()).digest() for i in range(5)]
+    for element in elements:
+        await accumulator.add(element)
+    await accumulator.remove(elements[1])
+    
+    restarted = RSAAccumulator(wal_path=accumulator.wal.path, modulus=(accumulator.N, accumulator.phi))
+    await restarted.initialize()
+    
+    assert restarted.value == accumulator.value
+    assert restarted.current_sequence == accumulator.current_sequence
+    assert await restarted.verify_replay() is True
+    await restarted.close()
+
+
+async def test_verify_replay_rejects_remove_of_absent_element(accumulator):
+    """A REMOVE without a matching ADD fails the rebuild check."""
+    await accumulator.add(hashlib.sha256(b"present").digest())
+    await accumulator.remove(hashlib.sha256(b"absent").digest())
+    
+    assert await accumulator.verify_replay() is False
+
+
+async def test_add_many_emits_valid_proofs(accumulator):
+    """Burst insert yields one valid proof per element against the final value."""
+    elements = [hashlib.sha256(f"burst_{i}".encode()).digest() for i in range(7)]
+    
+    value, proofs = await accumulator.add_many(elements)
+    
+    assert value == accumulator.value
+    assert len(proofs) == len(elements)
+    assert [p.sequence for p in proofs] == list(range(1, 8))
+    for element, proof in zip(elements, proofs):
+        assert proof.accumulator == value
+        assert proof.element_hash == accumulator._hash_to_prime(element)
+        assert accumulator.verify(proof) == True
+    assert accumulator.batch_verify(proofs) == True
+
+
+async def test_wal_group_commit_keeps_call_order(accumulator, monkeypatch):
+    """Concurrent appends share fsyncs and keep their sequence order."""
+    import asyncio
+    wal = accumulator.wal
+    writes = []
+    write_sync = wal._write_sync
+    monkeypatch.setattr(wal, '_write_sync', lambda data: (writes.append(data), write_sync(data)))
+    start = wal.current_seq
+    
+    await asyncio.gather(*(wal.append("ADD", i, f"scar{i}") for i in range(20)))
+    
+    assert len(writes) < 20
+    entries = await wal._read_entries()
+    assert [e["seq"] for e in entries[-20:]] == list(range(start + 1, start + 21))
+    assert [e["value"] for e in entries[-20:]] == list(range(20))
+    assert wal.current_value == 19
+
+
+async def test_wal_failed_write_is_rolled_back(accumulator, monkeypatch):
+    """A write that fails halfway leaves no torn record before later ones."""
+    from storage import wal_accumulator
+    wal = accumulator.wal
+    await wal.append("ADD", 1, "before")
+    
+    real_write = os.write
+    def torn_write(fd, data):
+        monkeypatch.setattr(wal_accumulator.os, 'write', real_write)
+        real_write(fd, bytes(data[:len(data) // 2]))
+        raise OSError("disk full")
+    monkeypatch.setattr(wal_accumulator.os, 'write', torn_write)
+    
+    with pytest.raises(OSError):
+        await wal.append("ADD", 2, "torn")
+    await wal.append("ADD", 3, "after")
+    
+    entries = await wal._read_entries()
+    assert [e["scar_id"] for e in entries[-2:]] == ["before", "after"]
+    assert (await wal.recover())[1:] == (3, "after")
+
+
+async def test_wal_converts_legacy_text_log(tmp_path):
+    """A text WAL from before the binary format is converted on open."""
+    from storage.wal_accumulator import AccumulatorWAL
+    path = tmp_path / "legacy.wal"
+    path.write_text(
+        "# ACCUMULATOR WAL\n"
+        "# seq:operation:value:timestamp:scar_id[:element_hash:prime]\n"
+        f"1:ADD:123:2025-01-01T12:00:00.123456:abcd:{'ab' * 32}:97\n"
+        "2:REMOVE:45:2025-01-01T12:00:01:ef\n"
+    )
+    
+    wal = AccumulatorWAL(str(path))
+    
+    assert await wal.recover() == (2, 45, "ef")
+    assert await wal.recover_operations() == [("ADD", b"\xab" * 32, 97), ("REMOVE", None, None)]
+    await wal.close()
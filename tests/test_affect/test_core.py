@@ -138,3 +138,77 @@ class TestAffectCore:
         # Проверяем временные метки
         timestamps = [e.timestamp for e in affect.emotional_history]
         assert all(isinstance(t, datetime) for t in timestamps)
+    
+    def test_emotional_memory_ignores_key_order(self):
+        """Тест: порядок ключей контекста не влияет на память"""
+        affect = AffectCore("test_anchor")
+        
+        affect.process_experience({
+            'type': 'praise',
+            'intensity': 0.5,
+            'context': {'topic': 'code', 'source': 'user'}
+        })
+        state = affect.process_experience({
+            'type': 'praise',
+            'intensity': 0.5,
+            'context': {'source': 'user', 'topic': 'code'}
+        })
+        
+        assert len(affect.emotional_memory) == 1
+        assert state.intensity > 0.5
+    
+    def test_emotional_memory_mixed_type_keys(self):
+        """Тест: контекст с ключами разных типов тоже запоминается"""
+        affect = AffectCore("test_anchor")
+        
+        affect.process_experience({
+            'type': 'praise',
+            'intensity': 0.5,
+            'context': {1: 'a', 'b': 2}
+        })
+        state = affect.process_experience({
+            'type': 'praise',
+            'intensity': 0.5,
+            'context': {'b': 2, 1: 'a'}
+        })
+        
+        assert len(affect.emotional_memory) == 1
+        assert state.intensity > 0.5
+    
+    def test_snapshot_roundtrip(self):
+        """Тест: JSON-снимок восстанавливает историю, настроение и память"""
+        import json
+        affect = AffectCore("test_anchor")
+        for kind in ('praise', 'criticism', 'praise'):
+            affect.process_experience({
+                'type': kind,
+                'intensity': 0.6,
+                'context': {'topic': kind}
+            })
+        
+        restored = AffectCore.from_dict(json.loads(json.dumps(affect.to_dict())))
+        
+        assert restored.current_mood == affect.current_mood
+        assert restored.emotional_memory == affect.emotional_memory
+        assert len(restored.emotional_history) == len(affect.emotional_history)
+        assert restored.get_emotional_profile() == affect.get_emotional_profile()
+    
+    def test_dominant_tie_goes_to_first_in_window(self):
+        """Тест: при равенстве доминирует эмоция, раньше появившаяся в окне из 100"""
+        affect = AffectCore("test_anchor")
+        
+        def push(emotion, times):
+            for _ in range(times):
+                state = EmotionalState(emotion, Emotion.NEUTRAL, 0.5, datetime.utcnow(), {})
+                affect.emotional_history.append(state)
+                affect._push_history(state)
+        
+        # joy вытесняется из окна и возвращается позже fear
+        push(Emotion.JOY, 1)
+        push(Emotion.FEAR, 99)
+        push(Emotion.JOY, 50)
+        push(Emotion.FEAR, 50)
+        
+        profile = affect.get_emotional_profile()
+        assert profile['profile'] == {'joy': 0.5, 'fear': 0.5}
+        assert profile['dominant'] == 'joy'
@@ -2,7 +2,6 @@
 Tests for Black Stone mode.
 """
 
-import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock
 
@@ -36,7 +35,6 @@ async def reset_black_stone():
     BlackStoneMode.set_test_mode(old_test_mode)
 
 
-@pytest.mark.asyncio
 async def test_black_stone_activation(reset_black_stone):
     """Test Black Stone mode activation."""
     
@@ -65,7 +63,6 @@ async def test_black_stone_activation(reset_black_stone):
     ecl_callback.assert_awaited_once()
 
 
-@pytest.mark.asyncio
 async def test_black_stone_exit(reset_black_stone):
     """Test exit from Black Stone mode via rebirth."""
     
@@ -79,7 +76,6 @@ async def test_black_stone_exit(reset_black_stone):
     assert BlackStoneMode.get_state().active == False
 
 
-@pytest.mark.asyncio
 async def test_black_stone_no_double_activation(reset_black_stone):
     """Test that double activation doesn't create second mode."""
     
@@ -95,3 +91,18 @@ async def test_black_stone_no_double_activation(reset_black_stone):
     await BlackStoneMode.enter("reason2", "scar2")
     assert ite_callback.await_count == 1
     assert BlackStoneMode.get_state().reason == "reason1"
+
+
+async def test_black_stone_wait_released_by_rebirth(reset_black_stone):
+    """Test that a waiting enter() returns as soon as rebirth happens."""
+    import asyncio
+    
+    BlackStoneMode.set_test_mode(False)
+    waiter = asyncio.create_task(BlackStoneMode.enter("wait", "scar-wait"))
+    await asyncio.sleep(0)
+    assert BlackStoneMode.is_active() == True
+    assert not waiter.done()
+    
+    await BlackStoneMode.exit_via_rebirth(b"fake_signature")
+    await asyncio.wait_for(waiter, timeout=1)
+    assert BlackStoneMode.is_active() == False
@@ -0,0 +1,46 @@
+﻿# tests/test_cli/test_state.py
+"""
+Тесты сохранения состояния CLI
+"""
+
+import pytest
+from scm.cli import state
+from scm.dreams.core import DreamEngine
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Кэш состояния во временном каталоге"""
+    monkeypatch.setattr(state, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+class TestCliState:
+    """Тестируем JSON-снимки состояния"""
+    
+    def test_roundtrip(self, cache_dir):
+        """Тест: сохраненный движок снов загружается обратно"""
+        engine = DreamEngine("anchor/1")
+        engine.generate_dream([], {'valence': 0.5}, [])
+        state.save_state('dreams', "anchor/1", engine)
+        
+        restored = state.load_state('dreams', "anchor/1")
+        assert [d.id for d in restored.dream_history] == [d.id for d in engine.dream_history]
+        assert state.load_state('affect', "anchor/1") is None
+    
+    def test_corrupt_snapshot_starts_fresh(self, cache_dir):
+        """Тест: испорченный снимок дает None"""
+        path = state._state_path('dreams', "anchor")
+        with open(path, 'w') as f:
+            f.write('{"anchor_hash": ')
+        assert state.load_state('dreams', "anchor") is None
+    
+    def test_bug_in_restore_is_not_hidden(self, cache_dir, monkeypatch):
+        """Тест: ошибка в from_dict не маскируется под испорченный снимок"""
+        state.save_state('dreams', "anchor", DreamEngine("anchor"))
+        
+        def broken(data):
+            raise TypeError("bug")
+        monkeypatch.setattr(DreamEngine, 'from_dict', broken)
+        with pytest.raises(TypeError):
+            state.load_state('dreams', "anchor")
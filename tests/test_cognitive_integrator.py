@@ -0,0 +1,198 @@
+"""
+Tests for scar application in the cognitive integrator.
+"""
+
+import hashlib
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+from accumulator.incremental_proof import IncrementalChainProof
+from core.ontological_scar import OntologicalScar
+from orchestrator.cognitive_integrator import ApostleTrust, CognitiveIntegrator, RoutingDecision
+
+
+@pytest.fixture(scope="module")
+def chain(tmp_path_factory):
+    """One chain per module; routing only reads its scar count."""
+    wal_path = tmp_path_factory.mktemp("chain") / "chain.wal"
+    return IncrementalChainProof(hashlib.sha256(b"genesis").digest(), wal_path=str(wal_path))
+
+
+@pytest.fixture
+def integrator(chain):
+    """Integrator with default apostle weights."""
+    return CognitiveIntegrator(chain, genesis_hash="genesis")
+
+
+def make_scar(incident_type: str, cognitive_basis: str, entropy_score: float) -> OntologicalScar:
+    """Create a scar of the given type on the given basis."""
+    return OntologicalScar(
+        scar_id=uuid.uuid4(),
+        genesis_ref="genesis",
+        incident_type=incident_type,
+        cognitive_basis=cognitive_basis,
+        collision_mode=False,
+        pre_state_hash="ab" * 32,
+        post_state_hash="cd" * 32,
+        deformation_vector={},
+        entropy_score=entropy_score,
+        ontological_drift=0.1,
+        timestamp=datetime(2025, 1, 1),
+        operator_id="operator"
+    )
+
+
+def test_apply_scars_bulk_matches_sequential():
+    """Bulk application gives the same trust, bans and scar counts as apply_scar one by one."""
+    scars = [
+        make_scar("rejection", "ru", 0.7),
+        make_scar("rejection", "ru", 0.3),
+        make_scar("exhaustion", "de", 0.5),
+        make_scar("mimicry_detected", "en", 0.9),
+        make_scar("betrayal", "fr", 0.2),
+        make_scar("betrayal", "fr", 0.6),
+        make_scar("rejection", "uk", 1.0),
+        make_scar("unknown_incident", "hy", 0.4),
+        make_scar("rejection", "xx", 0.5),  # basis without an apostle
+    ]
+    # The chain is only used to replay scars from storage
+    sequential = CognitiveIntegrator(chain=None, genesis_hash="genesis")
+    bulk = CognitiveIntegrator(chain=None, genesis_hash="genesis")
+    
+    for scar in scars:
+        sequential.apply_scar_to_apostles(scar)
+    bulk.apply_scars_bulk(scars)
+    
+    for basis, expected in sequential.apostles.items():
+        actual = bulk.apostles[basis]
+        assert actual.current_trust == pytest.approx(expected.current_trust)
+        assert actual.scar_count == expected.scar_count
+        assert bool(actual.banned_until_ns) == bool(expected.banned_until_ns)
+    
+    banned = {b for b, a in bulk.apostles.items() if a.banned_until_ns}
+    assert banned == {"en", "fr"}
+    
+    # The status built from the scoring arrays agrees as well
+    bulk_status = bulk.get_apostle_status()
+    for basis, expected in sequential.get_apostle_status().items():
+        assert bulk_status[basis]["trust"] == pytest.approx(expected["trust"])
+        assert bulk_status[basis]["scars"] == expected["scars"]
+        assert bulk_status[basis]["banned"] == expected["banned"]
+
+
+async def test_routing_sees_direct_apostle_changes(integrator):
+    """Changes made on the apostle objects themselves reach routing."""
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "de"
+    
+    integrator.apostles["de"].current_trust = 0.1
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "ru"
+    
+    integrator.apostles["ru"].apply_scar(make_scar("betrayal", "ru", 0.5))
+    decision = await integrator.decide_routing("hello", "user")
+    assert decision.selected_basis == "hy"
+    assert integrator.get_apostle_status()["ru"]["banned"] is True
+
+
+def test_apostle_banned_until_datetime_api():
+    """banned_until still works as an init keyword and as a settable attribute."""
+    deadline = datetime(2030, 1, 1, 12, 0, 0, 5)
+    apostle = ApostleTrust("de", 0.9, 0.9, 0, banned_until=deadline)
+    assert apostle.banned_until == deadline
+    assert not apostle.can_use()
+    
+    apostle.banned_until = None
+    assert apostle.banned_until_ns == 0
+    assert apostle.can_use()
+    
+    apostle.banned_until = datetime(2000, 1, 1)
+    assert apostle.can_use()
+
+
+def test_routing_decision_accepts_reasoning_text():
+    """An explicit reasoning argument is kept and wins over the facts."""
+    decision = RoutingDecision("de", 0.9, [], 0, False, "manual override")
+    assert decision.reasoning == "manual override"
+    
+    decision = RoutingDecision(
+        "de", 0.9, [], 0, False,
+        reasoning="manual override",
+        reasoning_facts=("de", 0.9, 0, 0, ())
+    )
+    assert decision.reasoning == "manual override"
+    
+    decision.reasoning = "changed"
+    assert decision.reasoning == "changed"
+
+
+async def test_banned_apostle_is_skipped_until_expiry(integrator):
+    """A ban removes the apostle from routing only until its deadline."""
+    integrator.apostles["de"].banned_until_ns = time.time_ns() + 3600 * 10**9
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "ru"
+    assert integrator.get_apostle_status()["de"]["can_use"] is False
+    
+    integrator.apostles["de"].banned_until_ns = time.time_ns() - 1
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "de"
+
+
+async def test_trust_threshold_is_exclusive(integrator):
+    """An apostle needs trust strictly above 0.3 to be routed to."""
+    integrator.apostles["de"].current_trust = 0.3
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "ru"
+    assert integrator.get_apostle_status()["de"]["can_use"] is False
+    
+    integrator.apostles["de"].current_trust = 0.85
+    assert (await integrator.decide_routing("hello", "user")).selected_basis == "de"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Почему небо синее?", "ru"),   # 0.8 * 1.3 beats de 0.9
+    ("какой сегодня день", "ru"),   # hints match as substrings
+    ("Warum?", "de"),
+    ("why and почему", "ru"),       # several languages hinted at once
+    ("hello", "de"),
+])
+async def test_language_hints_boost_routing(integrator, query, expected):
+    """Hint words in the query boost their basis by 1.3."""
+    decision = await integrator.decide_routing(query, "user")
+    assert decision.selected_basis == expected
+
+
+async def test_hint_boost_value(integrator):
+    """The boosted apostle's confidence is its trust times 1.3."""
+    decision = await integrator.decide_routing("почему", "user")
+    assert decision.confidence == pytest.approx(0.8 * 1.3)
+
+
+async def test_all_low_trust_falls_back_to_safest(integrator):
+    """With no usable apostle the most trusted one is picked as a fallback."""
+    for apostle in integrator.apostles.values():
+        apostle.current_trust = 0.2
+    integrator.apostles["hy"].current_trust = 0.25
+    
+    decision = await integrator.decide_routing("почему", "user")
+    assert decision.selected_basis == "hy"
+    assert decision.confidence == 0.5
+    assert decision.alternatives == []
+    assert decision.collision_allowed is False
+    assert decision.reasoning == "All apostles have low trust, using safest fallback"
+
+
+async def test_reasoning_text(integrator):
+    """Reasoning lists trust, scar count, an expired ban and alternatives."""
+    decision = await integrator.decide_routing("hello", "user")
+    assert decision.reasoning == (
+        "Selected de (trust: 0.90) | based on 0 scars | alternatives: ru, hy, en"
+    )
+    assert decision.alternatives == ["ru", "hy", "en"]
+    assert decision.collision_allowed is True
+    
+    integrator.apostles["de"].banned_until = datetime(2000, 1, 1)
+    integrator.apostles["de"].scar_count = 2
+    decision = await integrator.decide_routing("hello", "user")
+    assert decision.reasoning == (
+        "Selected de (trust: 0.90) | based on 2 scars | "
+        "WARNING: de was banned until 2000-01-01 00:00:00 | alternatives: ru, hy, en"
+    )
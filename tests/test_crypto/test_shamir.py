@@ -4,17 +4,30 @@
 """
 
 import pytest
+from itertools import combinations
 from scm.crypto.shamir import QuantumSecretKeeper
 from scm.crypto.hybrid import generate_hybrid_keypair
 
+@pytest.fixture(scope="module")
+def other_kp():
+    """Вторая пара — только для теста смешанных долей"""
+    return generate_hybrid_keypair()
+
+@pytest.fixture(scope="module")
+def private_key(hybrid_kp):
+    return hybrid_kp.dilithium5_private
+
+@pytest.fixture(scope="module")
+def split_key(private_key):
+    """Ключ и его 5 долей на весь модуль"""
+    shares = QuantumSecretKeeper(threshold=3, num_shares=5).split_private_key(private_key)
+    return private_key, shares
+
 class TestShamir:
     """Тестируем разделение и восстановление ключей"""
     
-    def test_split_and_recover(self):
+    def test_split_and_recover(self, private_key):
         """Тест: разделили ключ на 5 частей, восстановили из 3"""
-        kp = generate_hybrid_keypair()
-        private_key = kp.dilithium5_private.hex()
-        
         keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
         shares = keeper.split_private_key(private_key)
         
@@ -26,11 +39,13 @@ class TestShamir:
         
         assert recovered == private_key, "Ключ не восстановился правильно"
     
-    def test_threshold_requirement(self):
+    def test_split_accepts_hex(self, private_key):
+        """Тест: ключ в hex дает те же доли, что и сырые байты"""
+        keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
+        assert keeper.split_private_key(private_key.hex()) == keeper.split_private_key(private_key)
+    
+    def test_threshold_requirement(self, private_key):
         """Тест: 2 shares недостаточно для восстановления"""
-        kp = generate_hybrid_keypair()
-        private_key = kp.dilithium5_private.hex()
-        
         keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
         shares = keeper.split_private_key(private_key)
         
@@ -40,15 +55,14 @@ class TestShamir:
         with pytest.raises(ValueError, match="Need at least 3 shares"):
             keeper.recover_private_key(share_data)
     
-    def test_different_shares_dont_work(self):
+    def test_different_shares_dont_work(self, hybrid_kp, other_kp):
         """Тест: разные доли не работают вместе"""
-        kp1 = generate_hybrid_keypair()
-        kp2 = generate_hybrid_keypair()
+        kp1, kp2 = hybrid_kp, other_kp
         
         keeper = QuantumSecretKeeper()
         
-        shares1 = keeper.split_private_key(kp1.dilithium5_private.hex())
-        shares2 = keeper.split_private_key(kp2.dilithium5_private.hex())
+        shares1 = keeper.split_private_key(kp1.dilithium5_private)
+        shares2 = keeper.split_private_key(kp2.dilithium5_private)
         
         # Смешиваем доли от разных ключей
         mixed = [shares1[0].share_data, shares1[1].share_data, shares2[2].share_data]
@@ -56,30 +70,22 @@ class TestShamir:
         recovered = keeper.recover_private_key(mixed)
         
         # Должен вернуть ключ который встречается чаще (kp1)
-        assert recovered == kp1.dilithium5_private.hex()
+        assert recovered == kp1.dilithium5_private
     
-    def test_all_combinations_recover(self):
+    @pytest.mark.parametrize("combo", list(combinations(range(5), 3)))
+    def test_all_combinations_recover(self, split_key, combo):
         """Тест: любые 3 из 5 долей должны восстановить ключ"""
-        kp = generate_hybrid_keypair()
-        private_key = kp.dilithium5_private.hex()
-        
+        private_key, shares = split_key
         keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
-        shares = keeper.split_private_key(private_key)
-        
-        from itertools import combinations
         
-        for combo in combinations(range(5), 3):
-            share_data = [shares[i].share_data for i in combo]
-            recovered = keeper.recover_private_key(share_data)
-            assert recovered == private_key, f"Комбинация {combo} не сработала"
+        share_data = [shares[i].share_data for i in combo]
+        recovered = keeper.recover_private_key(share_data)
+        assert recovered == private_key, f"Комбинация {combo} не сработала"
     
-    def test_different_order_recover(self):
+    def test_different_order_recover(self, split_key):
         """Тест: порядок долей не важен"""
-        kp = generate_hybrid_keypair()
-        private_key = kp.dilithium5_private.hex()
-        
+        private_key, shares = split_key
         keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
-        shares = keeper.split_private_key(private_key)
         
         # Берем доли в разном порядке
         share_data1 = [shares[0].share_data, shares[1].share_data, shares[2].share_data]
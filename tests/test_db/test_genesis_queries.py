@@ -0,0 +1,42 @@
+﻿# tests/test_db/test_genesis_queries.py
+"""
+Tests for genesis anchor queries (mocked asyncpg connection)
+"""
+
+from unittest.mock import AsyncMock
+
+from scm.db.genesis_queries import GenesisStorage
+
+
+class TestGenesisStorage:
+    """Genesis anchor storage against a mocked connection"""
+    
+    async def test_store_anchors_bulk(self):
+        """Bulk insert sends every row through the single-insert statement"""
+        conn = AsyncMock()
+        rows = [
+            ("hash_a", b"\x01" * 32, b"\x02" * 64, "plate-1", {"note": "a"}),
+            ("hash_b", b"\x03" * 32, b"\x04" * 64, None, None),
+        ]
+        
+        record_ids = await GenesisStorage.store_anchors_bulk(conn, rows)
+        
+        conn.executemany.assert_awaited_once()
+        sql, records = conn.executemany.await_args.args
+        assert sql == GenesisStorage._INSERT_ANCHOR_SQL
+        assert [r[0] for r in records] == record_ids
+        assert [r[1:5] for r in records] == [r[:4] for r in rows]
+        # metadata stays a dict for the JSONB codec, None becomes {}
+        assert [r[5] for r in records] == [{"note": "a"}, {}]
+    
+    async def test_init_connection_registers_binary_jsonb(self):
+        """JSONB codec is binary: version byte + JSON, round-tripping dicts"""
+        conn = AsyncMock()
+        await GenesisStorage.init_connection(conn)
+        
+        kwargs = conn.set_type_codec.await_args.kwargs
+        assert kwargs['format'] == 'binary'
+        
+        data = kwargs['encoder']({"anchor": [1, 2], "ok": True})
+        assert data[:1] == b'\x01'
+        assert kwargs['decoder'](data) == {"anchor": [1, 2], "ok": True}
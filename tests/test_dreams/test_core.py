@@ -142,3 +142,49 @@ class TestDreamEngine:
         assert 'by_type' in stats
         assert 'avg_consolidation' in stats
         assert 'lucidity_level' in stats
+    
+    def test_generate_dreams_batch(self):
+        """Test: one dream per night, in night order"""
+        engine = DreamEngine("test_anchor")
+        
+        emotional_states = [{'valence': v} for v in (-0.4, 0.0, 0.4)]
+        traumas_per_night = [[], [{'emotion': 'fear'}], []]
+        
+        dreams = engine.generate_dreams_batch(
+            [{'type': 'daily', 'intensity': 0.5}],
+            emotional_states,
+            traumas_per_night
+        )
+        
+        assert len(dreams) == 3
+        assert list(engine.dream_history) == dreams
+    
+    def test_dream_history_is_bounded(self):
+        """Test: old dreams are evicted and stats follow the window"""
+        engine = DreamEngine("test_anchor", max_history=3)
+        
+        for i in range(5):
+            engine.generate_dream([], {'valence': 0.5}, [])
+        
+        window = list(engine.dream_history)
+        stats = engine.get_dream_stats()
+        assert stats['total_dreams'] == 3
+        assert sum(stats['by_type'].values()) == 3
+        assert stats['avg_consolidation'] == pytest.approx(
+            sum(d.consolidation_rate for d in window) / 3
+        )
+        assert stats['nightmare_rate'] == sum(d.is_nightmare for d in window) / 3
+    
+    def test_snapshot_roundtrip(self):
+        """Test: JSON snapshot restores history, stats and symbol counters"""
+        import json
+        engine = DreamEngine("test_anchor", max_history=5)
+        for i in range(4):
+            engine.generate_dream([], {'valence': 0.5}, [])
+        
+        restored = DreamEngine.from_dict(json.loads(json.dumps(engine.to_dict())))
+        
+        assert restored.dream_history.maxlen == 5
+        assert [d.id for d in restored.dream_history] == [d.id for d in engine.dream_history]
+        assert restored.get_dream_stats() == engine.get_dream_stats()
+        assert list(restored._sym_occurrences) == list(engine._sym_occurrences)
@@ -3,15 +3,32 @@
 Unit tests for quantum-safe hybrid cryptography.
 """
 
+import importlib
+import sys
+import threading
+import types
+
 import pytest
 from scm.crypto.hybrid import (
+    DILITHIUM5_SCHEME,
+    HybridKeyPair,
     generate_hybrid_keypair,
     hybrid_sign,
     hybrid_verify,
+    hybrid_verify_batch,
     create_hybrid_proof,
     TEST_MESSAGE
 )
 
+
+@pytest.fixture(scope="module")
+def signed_msg(hybrid_kp):
+    """One signed message reused by the negative tests: (msg, ed_sig, dil_sig, public_kp)"""
+    message = b"Original message"
+    ed_sig, dil_sig = hybrid_sign(message, hybrid_kp)
+    return message, ed_sig, dil_sig, hybrid_kp.public_only()
+
+
 class TestHybridCrypto:
     """Test suite for hybrid Ed25519 + Dilithium5"""
     
@@ -25,43 +42,62 @@ class TestHybridCrypto:
         assert len(kp.dilithium5_public) > 1000
         assert len(kp._compute_anchor_hash()) == 16
         
-    def test_hybrid_sign_verify(self):
+    def test_hybrid_sign_verify(self, hybrid_kp):
         """Test signing and verification with both algorithms"""
-        kp = generate_hybrid_keypair()
+        kp = hybrid_kp
         message = b"Test message for SCM quantum genesis"
         
         ed_sig, dil_sig = hybrid_sign(message, kp)
         
-        public_kp = type(kp)(
-            ed25519_private=None,
-            ed25519_public=kp.ed25519_public,
-            dilithium5_private=None,
-            dilithium5_public=kp.dilithium5_public
-        )
+        public_kp = kp.public_only()
         
+        assert public_kp.ed25519_private is None
+        assert public_kp.dilithium5_private is None
+        assert public_kp.anchor_hash == kp.anchor_hash
         assert hybrid_verify(message, ed_sig, dil_sig, public_kp) is True
         
-    def test_hybrid_verify_fails_on_tampered_message(self):
+    def test_hybrid_verify_fails_on_tampered_message(self, signed_msg):
         """Test that verification fails if message is altered"""
-        kp = generate_hybrid_keypair()
-        message = b"Original message"
+        _, ed_sig, dil_sig, public_kp = signed_msg
         tampered = b"Tampered message"
         
-        ed_sig, dil_sig = hybrid_sign(message, kp)
+        assert hybrid_verify(tampered, ed_sig, dil_sig, public_kp) is False
         
-        public_kp = type(kp)(
-            ed25519_private=None,
-            ed25519_public=kp.ed25519_public,
-            dilithium5_private=None,
-            dilithium5_public=kp.dilithium5_public
-        )
+    @pytest.mark.parametrize("offset", [0, 5, 10, 15])
+    def test_hybrid_verify_fails_on_flipped_bit(self, signed_msg, offset):
+        """Test that a single flipped bit anywhere in the message is rejected"""
+        message, ed_sig, dil_sig, public_kp = signed_msg
+        tampered = bytearray(message)
+        tampered[offset] ^= 0x01
         
-        assert hybrid_verify(tampered, ed_sig, dil_sig, public_kp) is False
+        assert hybrid_verify(bytes(tampered), ed_sig, dil_sig, public_kp) is False
+        
+    def test_hybrid_verify_batch(self, hybrid_kp):
+        """Test batch verification accepts all-valid and rejects one bad item"""
+        kp = hybrid_kp
+        messages = [f"Batch message {i}".encode() for i in range(8)]
+        sigs = [hybrid_sign(m, kp) for m in messages]
+        ed_sigs = [ed for ed, _ in sigs]
+        dil_sigs = [dil for _, dil in sigs]
+        publics = [kp] * len(messages)
+        
+        assert hybrid_verify_batch(messages, ed_sigs, dil_sigs, publics) is True
+        
+        tampered = messages[:3] + [b"Tampered message"] + messages[4:]
+        assert hybrid_verify_batch(tampered, ed_sigs, dil_sigs, publics) is False
         
-    def test_create_hybrid_proof(self):
+    def test_hybrid_verify_rejects_bad_dilithium_signature(self, signed_msg):
+        """Test that a valid Ed25519 signature cannot carry a bad Dilithium5 one"""
+        message, ed_sig, dil_sig, public_kp = signed_msg
+        bad_dil = bytes(len(dil_sig))
+        
+        assert hybrid_verify(message, ed_sig, bad_dil, public_kp) is False
+        assert hybrid_verify_batch([message, message], [ed_sig, ed_sig],
+                                   [dil_sig, bad_dil], [public_kp, public_kp]) is False
+        
+    def test_create_hybrid_proof(self, hybrid_kp):
         """Test creation of complete hybrid proof"""
-        kp = generate_hybrid_keypair()
-        proof = create_hybrid_proof(TEST_MESSAGE, kp)
+        proof = create_hybrid_proof(TEST_MESSAGE, hybrid_kp)
         
         assert 'message' in proof
         assert 'ed25519_signature' in proof
@@ -69,3 +105,69 @@ class TestHybridCrypto:
         assert 'ed25519_public' in proof
         assert 'dilithium5_public' in proof
         assert 'anchor_hash' in proof
+        
+    def test_keypair_dict_records_scheme(self, hybrid_kp):
+        """Public key dict carries the Dilithium scheme and round-trips"""
+        data = hybrid_kp.to_dict()
+        assert data['dilithium5_scheme'] == DILITHIUM5_SCHEME
+        assert create_hybrid_proof(TEST_MESSAGE, hybrid_kp)['dilithium5_scheme'] == DILITHIUM5_SCHEME
+        
+        restored = HybridKeyPair.from_dict(data)
+        assert restored.anchor_hash == hybrid_kp.anchor_hash
+        
+    def test_keypair_dict_rejects_other_scheme(self, hybrid_kp):
+        """Keys from another Dilithium scheme fail loudly, not at verify time"""
+        data = dict(hybrid_kp.to_dict(), dilithium5_scheme='ML-DSA-87-other')
+        with pytest.raises(ValueError, match='ML-DSA-87-other'):
+            HybridKeyPair.from_dict(data)
+        
+    def test_oqs_backend_refuses_ml_dsa_without_opt_in(self, monkeypatch):
+        """liboqs with only ML-DSA-87 is not used as Dilithium5 unless opted in"""
+        monkeypatch.delenv('SCM_ALLOW_ML_DSA_87', raising=False)
+        with pytest.raises(ImportError, match='SCM_ALLOW_ML_DSA_87'):
+            _import_oqs_backend(monkeypatch, ['ML-DSA-87'])
+        
+        monkeypatch.setenv('SCM_ALLOW_ML_DSA_87', '1')
+        module = _import_oqs_backend(monkeypatch, ['ML-DSA-87'])
+        assert module.SCHEME == 'ML-DSA-87'
+        
+    def test_oqs_signers_are_per_thread_and_freed(self, monkeypatch):
+        """Signers live in thread-local storage; evicted ones are freed"""
+        module = _import_oqs_backend(monkeypatch, ['Dilithium5'])
+        keys = [bytes([i]) * 32 for i in range(module._SIGNERS_PER_THREAD + 1)]
+        
+        first = module._signer(keys[0])
+        assert module._signer(keys[0]) is first
+        for key in keys[1:]:
+            module._signer(key)
+        
+        assert first.freed
+        assert list(module._local.signers) == keys[1:]
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(module._signer(keys[1])))
+        thread.start()
+        thread.join()
+        assert other[0] is not module._signer(keys[1])
+
+
+class _FakeSignature:
+    """Stand-in for oqs.Signature that records free()"""
+    
+    def __init__(self, mechanism, secret_key=None):
+        self.freed = False
+        
+    def free(self):
+        self.freed = True
+
+
+def _import_oqs_backend(monkeypatch, mechanisms):
+    """Import scm.crypto.oqs_dilithium afresh over a fake oqs module"""
+    fake_oqs = types.ModuleType('oqs')
+    fake_oqs.get_enabled_sig_mechanisms = lambda: mechanisms
+    fake_oqs.Signature = _FakeSignature
+    monkeypatch.setitem(sys.modules, 'oqs', fake_oqs)
+    # Registered so monkeypatch drops the freshly imported module afterwards
+    monkeypatch.setitem(sys.modules, 'scm.crypto.oqs_dilithium', None)
+    del sys.modules['scm.crypto.oqs_dilithium']
+    return importlib.import_module('scm.crypto.oqs_dilithium')
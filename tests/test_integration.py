@@ -3,57 +3,83 @@
 Интеграционные тесты для Extension 5
 """
 
+import logging
+import secrets
+
 import pytest
-from scm.crypto.hybrid import generate_hybrid_keypair, create_hybrid_proof, TEST_MESSAGE
+from scm.crypto.hybrid import create_hybrid_proof, dilithium5, TEST_MESSAGE
 from scm.crypto.shamir import QuantumSecretKeeper
 from scm.core.black_stone_quantum import QuantumDeathProtocol
 
+logger = logging.getLogger(__name__)
+
 class TestExtension5Integration:
     """Полный тест всего Extension 5"""
     
-    def test_full_cycle(self):
+    def test_smoke_cycle(self, tmp_path, monkeypatch):
+        """Быстрый тест: разделение -> смерть -> восстановление на 32-байтном ключе"""
+        # Протокол смерти дописывает BLACKSTONE.md в текущий каталог
+        monkeypatch.chdir(tmp_path)
+        key_bytes = secrets.token_bytes(32)
+        keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
+        shares = keeper.split_private_key(key_bytes)
+        assert len(shares) == 5
+        
+        death = QuantumDeathProtocol("0" * 16)
+        death.report_share_loss(1)
+        death.report_share_loss(2)
+        assert death.can_recover() is True
+        # События на диске сразу, без close()
+        log = (tmp_path / "BLACKSTONE.md").read_text()
+        assert log.count("Quantum Death Event") == 3
+        
+        remaining_shares = [shares[2].share_data, shares[3].share_data, shares[4].share_data]
+        assert keeper.recover_private_key(remaining_shares) == key_bytes
+    
+    @pytest.mark.slow
+    def test_full_cycle(self, hybrid_kp, tmp_path, monkeypatch):
         """Тест: рождение -> разделение -> смерть -> восстановление"""
+        # Протокол смерти дописывает BLACKSTONE.md в текущий каталог
+        monkeypatch.chdir(tmp_path)
         
         # 1. Рождение (создание ключей)
-        print("\n1️⃣  Рождение сущности...")
-        kp = generate_hybrid_keypair()
+        logger.debug("1️⃣  Рождение сущности...")
+        kp = hybrid_kp
         anchor_hash = kp._compute_anchor_hash()
         proof = create_hybrid_proof(TEST_MESSAGE, kp)
         
         assert len(anchor_hash) == 16
         assert 'anchor_hash' in proof
-        print(f"   Anchor hash: {anchor_hash}")
+        logger.debug("   Anchor hash: %s", anchor_hash)
         
         # 2. Разделение ключа на 5 частей
-        print("2️⃣  Разделение ключа на 5 частей...")
+        logger.debug("2️⃣  Разделение ключа на 5 частей...")
         keeper = QuantumSecretKeeper(threshold=3, num_shares=5)
-        shares = keeper.split_private_key(kp.dilithium5_private.hex())
+        shares = keeper.split_private_key(kp.dilithium5_private)
         
         assert len(shares) == 5
-        print(f"   Создано {len(shares)} долей, по {len(shares[0].shares_data)} блоков каждая")
+        logger.debug("   Создано %d долей, по %d байт каждая", len(shares), len(shares[0].share_data))
         
         # 3. Протокол смерти (теряем 2 shares)
-        print("3️⃣  Имитация потери 2 shares...")
+        logger.debug("3️⃣  Имитация потери 2 shares...")
         death = QuantumDeathProtocol(anchor_hash)
         death.report_share_loss(1)
         death.report_share_loss(2)
         
         assert death.death_level == death.DEATH_LEVELS['HARD']
         assert death.can_recover() is True
-        print(f"   Уровень смерти: {death.death_level}")
+        logger.debug("   Уровень смерти: %s", death.death_level)
         
         # 4. Восстановление из 3 оставшихся shares
-        print("4️⃣  Восстановление из 3 shares...")
-        remaining_shares = [shares[2].shares_data, shares[3].shares_data, shares[4].shares_data]
+        logger.debug("4️⃣  Восстановление из 3 shares...")
+        remaining_shares = [shares[2].share_data, shares[3].share_data, shares[4].share_data]
         recovered_key = keeper.recover_private_key(remaining_shares)
         
-        assert recovered_key == kp.dilithium5_private.hex()
-        print("   Ключ успешно восстановлен")
+        assert recovered_key == kp.dilithium5_private
+        logger.debug("   Ключ успешно восстановлен")
         
         # 5. Проверка что восстановленный ключ работает
-        print("5️⃣  Проверка восстановленного ключа...")
-        from scm.crypto.hybrid import dilithium5
-        
+        logger.debug("5️⃣  Проверка восстановленного ключа...")
         test_msg = b"Test recovery message"
         # Создаем подпись оригинальным ключом
         orig_sig = dilithium5.sign(kp.dilithium5_private, test_msg)
@@ -61,5 +87,5 @@ class TestExtension5Integration:
         is_valid = dilithium5.verify(kp.dilithium5_public, test_msg, orig_sig)
         
         assert is_valid is True
-        print("✅ Подпись работает!")
-        print("🎉 Все этапы пройдены успешно!")
+        logger.debug("✅ Подпись работает!")
+        logger.info("🎉 Все этапы пройдены успешно!")
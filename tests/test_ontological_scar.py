@@ -0,0 +1,82 @@
+"""
+Tests for ontological scar hashing.
+"""
+
+import hashlib
+import uuid
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+
+from core.ontological_scar import SCAR_HASH_V1, SCAR_HASH_V2, OntologicalScar
+
+
+def make_scar(**overrides) -> OntologicalScar:
+    """Create a scar with fixed field values."""
+    fields = dict(
+        scar_id=uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        genesis_ref="genesis",
+        incident_type="rejection",
+        cognitive_basis="ru",
+        collision_mode=False,
+        pre_state_hash="ab" * 32,
+        post_state_hash="cd" * 32,
+        deformation_vector={},
+        entropy_score=0.7,
+        ontological_drift=0.1,
+        timestamp=datetime(2025, 1, 1, 12, 0, 0, 123456),
+        operator_id="operator"
+    )
+    fields.update(overrides)
+    return OntologicalScar(**fields)
+
+
+@pytest.mark.parametrize("version", [SCAR_HASH_V1, SCAR_HASH_V2])
+def test_to_hash_is_deterministic(version):
+    """Same fields give the same 32-byte digest."""
+    assert make_scar().to_hash(version) == make_scar().to_hash(version)
+    assert len(make_scar().to_hash(version)) == 32
+
+
+@pytest.mark.parametrize("version", [SCAR_HASH_V1, SCAR_HASH_V2])
+def test_to_hash_covers_hashed_fields(version):
+    """Changing any hashed field changes the digest."""
+    base = make_scar()
+    variants = [
+        replace(base, scar_id=uuid.uuid4()),
+        replace(base, pre_state_hash="ef" * 32),
+        replace(base, post_state_hash="ab" * 32),
+        replace(base, timestamp=datetime(2025, 1, 1, 12, 0, 0, 123457)),
+    ]
+    digests = {v.to_hash(version) for v in variants}
+    assert base.to_hash(version) not in digests
+    assert len(digests) == len(variants)
+
+
+def test_to_hash_default_keeps_original_encoding():
+    """The default digest is the one existing chains accumulated."""
+    scar = make_scar()
+    content = f"{scar.scar_id}{scar.pre_state_hash}{scar.post_state_hash}{scar.timestamp}"
+    assert scar.to_hash() == hashlib.sha256(content.encode()).digest()
+    assert scar.to_hash(SCAR_HASH_V2) != scar.to_hash()
+    
+    with pytest.raises(ValueError):
+        scar.to_hash(3)
+
+
+def test_to_hash_accepts_non_hex_state_labels():
+    """Plain labels hash without colliding with hex digests of the same bytes."""
+    labelled = make_scar(pre_state_hash="before_ru", post_state_hash="after_rejection_ru")
+    assert len(labelled.to_hash(SCAR_HASH_V2)) == 32
+    
+    # "61" is the hex of "a"
+    assert (make_scar(pre_state_hash="a").to_hash(SCAR_HASH_V2)
+            != make_scar(pre_state_hash="61").to_hash(SCAR_HASH_V2))
+
+
+def test_to_hash_timestamp_is_timezone_independent():
+    """Naive timestamps are UTC, so an aware UTC timestamp hashes the same (v2)."""
+    naive = make_scar()
+    aware = make_scar(timestamp=naive.timestamp.replace(tzinfo=timezone.utc))
+    assert naive.to_hash(SCAR_HASH_V2) == aware.to_hash(SCAR_HASH_V2)